@@ -1,9 +1,24 @@
 import os
-from typing import Dict, Optional, Any
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from math import ceil
+from typing import Dict, Optional, Any, Callable, Iterable, Iterator, List, Set, Tuple, Union
 
 import allure
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from utils.reporting import step, attach
+
+# Количество параллельных потоков для массовых операций
+DEFAULT_BULK_WORKERS = 16
+# Размер страницы при постраничном обходе списков
+DEFAULT_PAGE_SIZE = 100
+# Поля рецепта, которые заполняет сервер: при копировании не передаются
+RECIPE_SERVER_FIELDS = ('id', 'image', 'created_by', 'created_at', 'updated_at', 'rating', 'last_cooked',
+                        'properties', 'food_properties', 'shared')
 
 
 class TandoorAPIClient:
@@ -28,6 +43,12 @@ class TandoorAPIClient:
         }
         print(" Используем Bearer Token аутентификацию")
 
+        # Одна сессия с пулом соединений: keep-alive вместо нового TCP на каждый запрос
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=DEFAULT_BULK_WORKERS, pool_maxsize=DEFAULT_BULK_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def _make_request(self, method: str, endpoint: str, **kwargs)-> Dict[str, Any]:
         """ Внутренний метод для выполнения HTTP-запросов
 
@@ -50,7 +71,7 @@ class TandoorAPIClient:
         url = f"{self.base_url}/api/{endpoint}"
 
         try:
-            response = requests.request(method, url, headers=self.headers, timeout=30, **kwargs)
+            response = self.session.request(method, url, headers=self.headers, timeout=30, **kwargs)
             print(f"[API] Запрос: {method} {url}")
             print(f"[API] Статус: {response.status_code}")
             print(f"[API] Ответ: {response.text[:200]}...")
@@ -88,9 +109,125 @@ class TandoorAPIClient:
             print(f"Ошибка запроса: {e}")
             return {'status_code': None, 'error': str(e)}
 
+    def _get_page(self, endpoint: str, page: int, page_size: int, **params) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """Получает одну страницу списка.
+        Возвращает (объекты, общее количество, есть ли следующая страница)"""
+        response = self._make_request('GET', endpoint, params={'page': page, 'page_size': page_size, **params})
+        if response.get('status_code') != 200:
+            raise RuntimeError(f"Не удалось получить страницу {page} списка {endpoint}: "
+                               f"статус {response.get('status_code')}")
+        data = response.get('json')
+        # Непагинированные списки приходят массивом целиком
+        if isinstance(data, list):
+            return data, len(data), False
+        data = data or {}
+        results = data.get('results', [])
+        return results, data.get('count', len(results)), bool(data.get('next'))
+
+    def iter_list(self, endpoint: str, page_size: int = DEFAULT_PAGE_SIZE, **params) -> Iterator[Dict[str, Any]]:
+        """Постранично обходит список объектов (recipe/, food/, meal-plan/ и т.д.)"""
+        page = 1
+        while True:
+            results, _, has_next = self._get_page(endpoint, page, page_size, **params)
+            yield from results
+            if not has_next:
+                return
+            page += 1
+
+    def _ids_via_get(self, endpoint: str, ids: Set[int],
+                     max_workers: int = DEFAULT_BULK_WORKERS) -> Tuple[Set[int], Set[int]]:
+        """Проверяет существование объектов параллельными GET-запросами по ID"""
+        endpoint = endpoint.strip('/')
+        existing, missing = set(), set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._make_request, 'GET', f'{endpoint}/{object_id}/'): object_id
+                       for object_id in ids}
+            for future in as_completed(futures):
+                status_code = future.result().get('status_code')
+                if status_code == 200:
+                    existing.add(futures[future])
+                elif status_code in (404, 410):
+                    missing.add(futures[future])
+                else:
+                    raise RuntimeError(f"Не удалось проверить {endpoint}/{futures[future]}: статус {status_code}")
+        return existing, missing
+
+    @step("Проверить существование объектов {endpoint} по набору ID")
+    def check_ids_exist(self, endpoint: str, ids: Iterable[int],
+                        page_size: int = DEFAULT_PAGE_SIZE,
+                        small_set_threshold: int = DEFAULT_BULK_WORKERS) -> Tuple[Set[int], Set[int]]:
+        """
+        Делит набор ID на существующие и отсутствующие на сервере
+
+        Небольшие наборы проверяются параллельными GET по ID. Для больших наборов
+        сравнивается число оставшихся страниц списка с числом ID и выбирается
+        более дешевый способ; обход страниц прекращается, как только найдены все ID.
+
+        Returns:
+            Tuple[Set[int], Set[int]]: (существующие ID, отсутствующие ID)
+        """
+        wanted = set(ids)
+        endpoint = endpoint.strip('/') + '/'
+        if len(wanted) <= small_set_threshold:
+            return self._ids_via_get(endpoint, wanted)
+
+        results, count, has_next = self._get_page(endpoint, 1, page_size)
+        existing = {item['id'] for item in results} & wanted
+        remaining_pages = max(ceil(count / page_size) - 1, 0)
+
+        if has_next and len(wanted - existing) < remaining_pages:
+            print(f" Проверка {len(wanted - existing)} ID через GET дешевле {remaining_pages} страниц")
+            found, _ = self._ids_via_get(endpoint, wanted - existing)
+            existing |= found
+        else:
+            page = 1
+            while has_next and existing != wanted:
+                page += 1
+                results, _, has_next = self._get_page(endpoint, page, page_size)
+                existing |= {item['id'] for item in results} & wanted
+
+        return existing, wanted - existing
+
+    @step("Удалить объекты {endpoint} по набору ID")
+    def delete_many(self, endpoint: str, ids: Iterable[int],
+                    max_workers: int = DEFAULT_BULK_WORKERS) -> Tuple[Set[int], Set[int]]:
+        """
+        Удаляет объекты параллельными DELETE-запросами.
+        Уже отсутствующие объекты (404) считаются удаленными.
+
+        Returns:
+            Tuple[Set[int], Set[int]]: (удаленные ID, ID, которые удалить не удалось)
+        """
+        endpoint = endpoint.strip('/')
+        deleted, failed = set(), set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._make_request, 'DELETE', f'{endpoint}/{object_id}/'): object_id
+                       for object_id in set(ids)}
+            for future in as_completed(futures):
+                if future.result().get('status_code') in (204, 404):
+                    deleted.add(futures[future])
+                else:
+                    failed.add(futures[future])
+        print(f" Удалено {endpoint}: {len(deleted)}, ошибок: {len(failed)}")
+        return deleted, failed
+
+    @step("Проверить, что объекты {endpoint} удалены")
+    def verify_ids_deleted(self, endpoint: str, ids: Iterable[int]) -> Set[int]:
+        """Возвращает ID, которые все еще существуют (пустое множество - все удалены).
+        RuntimeError, если существование не удалось проверить (ошибка сети, статус не 200/404/410)"""
+        existing, _ = self.check_ids_exist(endpoint, ids)
+        return existing
+
+    @step("Проверить, что объекты {endpoint} созданы")
+    def verify_ids_exist(self, endpoint: str, ids: Iterable[int]) -> Set[int]:
+        """Возвращает ID, которые не найдены (пустое множество - все существуют).
+        RuntimeError, если существование не удалось проверить (ошибка сети, статус не 200/404/410)"""
+        _, missing = self.check_ids_exist(endpoint, ids)
+        return missing
+
 # === МЕТОДЫ ДЛЯ РЕЦЕПТОВ ===
 
-    @allure.step("Импорт рецепта по URL: '{recipe_url}'")
+    @step("Импорт рецепта по URL: '{recipe_url}'")
     def import_recipe_from_url(self, recipe_url: str)  -> Dict[str, Any]:
         """Импортирует рецепт по URL """
         data = {
@@ -103,22 +240,51 @@ class TandoorAPIClient:
         print(f" Ответ импорта: {response}")
         return response
 
-    @allure.step("Получить список всех рецептов")
+    @step("Получить список всех рецептов")
     def get_recipes(self)  -> Dict[str, Any]:
         """Получает список всех рецептов"""
         return self._make_request('GET', 'recipe/')
 
-    @allure.step("Получить рецепт по ID = {recipe_id}")
+    @step("Получить рецепт по ID = {recipe_id}")
     def get_recipe_by_id(self, recipe_id: int)  -> Dict[str, Any]:
         """Получает рецепт по ID"""
         return self._make_request('GET', f'recipe/{recipe_id}/')
 
-    @allure.step("Создать рецепт с данными")
+    @step("Создать рецепт с данными")
     def create_recipe(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Создает рецепт"""
         return self._make_request('POST', 'recipe/', json=data)
 
-    @allure.step("Удалить рецепт по ID = {recipe_id}")
+    @step("Изменить рецепт ID = {recipe_id}")
+    def update_recipe(self, recipe_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Частично обновляет рецепт (PATCH): меняются только переданные поля"""
+        return self._make_request('PATCH', f'recipe/{recipe_id}/', json=data)
+
+    @step("Скопировать рецепт ID = {recipe_id} под названием '{name}'")
+    def copy_recipe(self, recipe_id: int, name: str) -> Dict[str, Any]:
+        """
+        Создает копию рецепта (шаги и ингредиенты) с другим названием.
+        Продукты и единицы измерения сервер находит по названиям, шаги и ингредиенты создаются заново.
+
+        Returns:
+            Dict[str, Any]: ответ создания копии (или ответ чтения исходного рецепта при ошибке)
+        """
+        source = self.get_recipe_by_id(recipe_id)
+        if source.get('status_code') != 200:
+            return source
+
+        recipe = {key: value for key, value in source['json'].items() if key not in RECIPE_SERVER_FIELDS}
+        recipe['name'] = name
+        recipe['internal'] = True
+        recipe['steps'] = [
+            {**{key: value for key, value in recipe_step.items() if key != 'id'},
+             'ingredients': [{key: value for key, value in ingredient.items() if key != 'id'}
+                             for ingredient in recipe_step.get('ingredients', [])]}
+            for recipe_step in recipe.get('steps', [])
+        ]
+        return self.create_recipe(recipe)
+
+    @step("Удалить рецепт по ID = {recipe_id}")
     def delete_recipe(self, recipe_id: int) -> bool:
         """Удаляет рецепт по ID"""
 
@@ -151,22 +317,113 @@ class TandoorAPIClient:
 
 # === МЕТОДЫ ДЛЯ ПЛАНОВ ПИТАНИЯ ===
 
-    @allure.step("Создать план питания")
+    @step("Создать план питания")
     def create_meal_plan(self, meal_plan_data: Dict[str, Any]) -> Dict[str, Any]:
         """Создает план питания"""
         return self._make_request('POST', 'meal-plan/', json=meal_plan_data)
 
-    @allure.step("Получить план питания по ID = {meal_plan_id}")
+    @staticmethod
+    def build_meal_plan_payloads(recipes: List[Union[int, Dict[str, Any]]],
+                                 start_date: date,
+                                 end_date: date,
+                                 meal_types: List[str],
+                                 servings: Union[float, Callable[[date, str], float]] = 1.0,
+                                 shared_user_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Разворачивает набор рецептов, диапазон дат и типы питания в список данных для планов
+
+        Args:
+            recipes: рецепты (ID или словари с ключом 'id'), назначаются по кругу
+            start_date: первый день диапазона (включительно)
+            end_date: последний день диапазона (включительно)
+            meal_types: названия типов питания, например ['Завтрак', 'Обед', 'Ужин']
+            servings: число порций или функция (день, тип питания) -> число порций
+            shared_user_ids: ID пользователей, с которыми делится план
+
+        Returns:
+            List[Dict[str, Any]]: данные для create_meal_plan в порядке дат
+        """
+        if not recipes:
+            raise ValueError('Не передано ни одного рецепта для планирования')
+        if end_date < start_date:
+            raise ValueError('Дата окончания раньше даты начала')
+
+        recipe_ids = [recipe['id'] if isinstance(recipe, dict) else recipe for recipe in recipes]
+        shared = [{'id': user_id} for user_id in (shared_user_ids or [])]
+
+        payloads = []
+        slot = 0
+        day = start_date
+        while day <= end_date:
+            plan_date = f"{day.isoformat()}T00:00:00Z"
+            for meal_type in meal_types:
+                plan_servings = servings(day, meal_type) if callable(servings) else servings
+                payloads.append({
+                    'title': f"{meal_type} {day.isoformat()}",
+                    'recipe': {'id': recipe_ids[slot % len(recipe_ids)]},
+                    'servings': float(plan_servings),
+                    'from_date': plan_date,
+                    'to_date': plan_date,
+                    'meal_type': {'name': meal_type},
+                    'shared': shared
+                })
+                slot += 1
+            day += timedelta(days=1)
+        return payloads
+
+    @step("Массово создать планы питания с {start_date} по {end_date}")
+    def schedule_meal_plans(self,
+                            recipes: List[Union[int, Dict[str, Any]]],
+                            start_date: date,
+                            end_date: date,
+                            meal_types: List[str],
+                            servings: Union[float, Callable[[date, str], float]] = 1.0,
+                            shared_user_ids: Optional[Iterable[int]] = None,
+                            max_workers: int = DEFAULT_BULK_WORKERS) -> Dict[str, List[int]]:
+        """
+        Создает планы питания на диапазон дат параллельными запросами
+
+        Returns:
+            Dict[str, List[int]]: ID созданных планов, сгруппированные по дате (YYYY-MM-DD)
+        """
+        payloads = self.build_meal_plan_payloads(recipes, start_date, end_date,
+                                                 meal_types, servings, shared_user_ids)
+        created = defaultdict(list)
+        failed = []
+
+        # _make_request вызывается напрямую: шаг allure на каждый план не нужен
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._make_request, 'POST', 'meal-plan/', json=payload): payload
+                       for payload in payloads}
+            for future in as_completed(futures):
+                payload = futures[future]
+                response = future.result()
+                plan_date = payload['from_date'][:10]
+                if response.get('status_code') == 201 and response.get('json'):
+                    created[plan_date].append(response['json']['id'])
+                else:
+                    failed.append({'payload': payload, 'status_code': response.get('status_code')})
+
+        total = sum(len(ids) for ids in created.values())
+        print(f" Создано планов: {total} из {len(payloads)}")
+        if failed:
+            print(f" Не удалось создать планов: {len(failed)}")
+            attach(str(failed[:50]), name='Ошибки массового создания планов',
+                   attachment_type=allure.attachment_type.TEXT)
+
+        return {plan_date: sorted(ids) for plan_date, ids in sorted(created.items())}
+
+    @step("Получить план питания по ID = {meal_plan_id}")
     def get_meal_plan_id(self, meal_plan_id: int) -> Dict[str, Any]:
         """Получает план питания"""
         return self._make_request('GET', f'meal-plan/{meal_plan_id}/')
 
-    @allure.step("Получить список планов питания")
+    @step("Получить список планов питания")
     def get_all_meal_plans(self)-> Dict[str, Any]:
         """Получает список планов питания"""
         return self._make_request('GET', 'meal-plan/')
 
-    @allure.step("Удалить план питания по ID = {plan_id}")
+    @step("Удалить план питания по ID = {plan_id}")
     def delete_meal_plan(self, plan_id: int) -> bool:
         """Удаляет план питания"""
         response = self._make_request('DELETE', f'meal-plan/{plan_id}/')
@@ -175,32 +432,76 @@ class TandoorAPIClient:
             # response — это словарь, содержащий 'status_code'
         return response.get('status_code') == 204
 
+    @step("Создать план питания для рецепта ID = {recipe_id} на {plan_date}")
+    def create_meal_plan_for_recipe(self,
+                                    recipe_id: int,
+                                    plan_date: date,
+                                    title: str,
+                                    meal_type: str,
+                                    servings: float = 1.0,
+                                    add_to_shopping_list: bool = False) -> Dict[str, Any]:
+        """
+        Создает план питания так же, как форма в UI, включая отметку
+        "Добавить в лист покупок" (продукты рецепта попадают в список покупок)
+        """
+        plan_datetime = f"{plan_date.isoformat()}T00:00:00Z"
+        return self.create_meal_plan({
+            'title': title,
+            'recipe': {'id': recipe_id},
+            'servings': float(servings),
+            'from_date': plan_datetime,
+            'to_date': plan_datetime,
+            'meal_type': {'name': meal_type},
+            'addshopping': add_to_shopping_list
+        })
+
+    @step("Найти планы питания рецепта ID = {recipe_id}")
+    def get_meal_plans_for_recipe(self, recipe_id: int) -> List[Dict[str, Any]]:
+        """Все планы питания с указанным рецептом (обход всех страниц списка)"""
+        return [plan for plan in self.iter_list('meal-plan')
+                if (plan.get('recipe') or {}).get('id') == recipe_id]
+
+    @step("Удалить все планы питания рецепта ID = {recipe_id}")
+    def delete_meal_plans_for_recipe(self, recipe_id: int) -> int:
+        """Удаляет планы рецепта (вместе с ними сервер удаляет связанные продукты из списка покупок)
+
+        Returns:
+            int: количество удаленных планов
+        """
+        plan_ids = [plan['id'] for plan in self.get_meal_plans_for_recipe(recipe_id)]
+        if not plan_ids:
+            return 0
+        deleted, failed = self.delete_many('meal-plan', plan_ids)
+        if failed:
+            print(f" Не удалось удалить планы: {sorted(failed)}")
+        return len(deleted)
+
 # === МЕТОДЫ ДЛЯ СПИСКА ПОКУПОК ===
 
-    @allure.step("Получить список покупок, связанных с рецептами")
+    @step("Получить список покупок, связанных с рецептами")
     def get_shopping_list_recipe(self) -> Dict:
         """Получает список покупок, связанных с рецептами"""
         return self._make_request('GET', 'shopping-list-recipe/')
 
-    @allure.step("Получить список покупок, НЕ связанных с рецептами")
+    @step("Получить список покупок, НЕ связанных с рецептами")
     def get_shopping_list_entry(self) -> Dict[str, Any]:
         """Получает список покупок, НЕ связанных с рецептами"""
         return self._make_request('GET', 'shopping-list-entry/')
 
-    @allure.step("Добавить продукты в список покупок, связанных с рецептами")
+    @step("Добавить продукты в список покупок, связанных с рецептами")
     def create_shopping_list_entry(self, entries_for_shopping_list: Dict[str, Any]) -> Dict[str, Any]:
         """Добавляет данные в список покупок без привязки к рецепту"""
         return self._make_request('POST', 'shopping-list-entry/', json=entries_for_shopping_list)
 
-    @allure.step("Удалить продукты НЕ связанные с рецептами "
-                 "из списока покупок по ID = {shopping_list_id}")
+    @step("Удалить продукты НЕ связанные с рецептами "
+          "из списока покупок по ID = {shopping_list_id}")
     def delete_shopping_list(self, shopping_list_id: int)-> Dict[str, Any]:
         """Удаляет данные из списка покупок по ID.
         Удаление позиции не связанных с рецепом"""
         return self._make_request('DELETE', f'shopping-list-entry/{shopping_list_id}/')
 
-    @allure.step("Удалить продукты связанные с рецептами "
-                 "из списока покупок по ID = {shopping_list_id}")
+    @step("Удалить продукты связанные с рецептами "
+          "из списока покупок по ID = {shopping_list_id}")
     def delete_shopping_list_rec(self, shopping_list_id)-> Dict[str, Any]:
         """Удаляет данные из списка покупок по ID.
         Удаление позиции связанных с рецепом"""
@@ -208,16 +509,17 @@ class TandoorAPIClient:
 
 # === ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ===
 
-    @allure.step("Проверить, что план удален по ID = {plan_id}")
+    @step("Проверить, что план удален по ID = {plan_id}")
     def verify_plan_deleted(self, plan_id: int) -> bool:
-        """Проверяет, что план удален по ID"""
-        response = self._make_request('GET', f'meal-plan/{plan_id}/')
-        if response and response.get('status_code') == 404:
-            return True
-        return False
+        """Проверяет, что план удален по ID (False и при ошибке сети или неожиданном статусе ответа)"""
+        try:
+            return not self.verify_ids_deleted('meal-plan', [plan_id])
+        except RuntimeError as e:
+            print(f"Не удалось проверить удаление плана {plan_id}: {e}")
+            return False
 
 
-    @allure.step("Сохраняет рецепт в базу данных Tandoor")
+    @step("Сохраняет рецепт в базу данных Tandoor")
     def save_recipe(self, recipe_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Сохраняет рецепт в базу данных Tandoor
@@ -243,7 +545,7 @@ class TandoorAPIClient:
             print(f" Ошибка при сохранении рецепта: {e}")
             return None
 
-    @allure.step("Проверка соединения с API.Пытается получить список рецептов.")
+    @step("Проверка соединения с API.Пытается получить список рецептов.")
     def test_connection(self) -> bool:
         """Проверяет соединение с API."""
         print(" Проверяю соединение API...")
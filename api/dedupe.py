@@ -0,0 +1,216 @@
+import hashlib
+from array import array
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Dict, Optional, Any, Iterable, List, Set, Tuple
+
+from api.client import TandoorAPIClient, DEFAULT_BULK_WORKERS
+from api.search_index import normalize_text
+from utils.reporting import step
+
+# 64 хеш-функции = 16 полос по 4 строки: пары с похожестью от ~0.5 почти всегда попадают в кандидаты
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+# Минимальная оценка сходства Жаккара, при которой рецепты считаются дубликатами
+DEFAULT_THRESHOLD = 0.7
+# Минимальное сходство Жаккара наборов продуктов: без общих ингредиентов рецепты не дубликаты,
+# даже если названия почти совпадают ("Картофельное пюре <дата>")
+DEFAULT_INGREDIENT_OVERLAP = 0.5
+
+
+def recipe_features(recipe: Dict[str, Any], shingle_size: int = 3) -> Set[str]:
+    """
+    Признаки рецепта для сравнения: символьные шинглы нормализованного названия
+    и названия продуктов ингредиентов (если карточка содержит шаги)
+    """
+    name = f" {normalize_text(recipe.get('name') or '')} "
+    features = {name[i:i + shingle_size] for i in range(max(len(name) - shingle_size + 1, 1))}
+    features.update('food:' + food for food in recipe_foods(recipe))
+    return features
+
+
+def recipe_foods(recipe: Dict[str, Any]) -> Set[str]:
+    """Нормализованные названия продуктов ингредиентов (пусто, если в карточке нет шагов)"""
+    foods = set()
+    for step in recipe.get('steps') or []:
+        for ingredient in step.get('ingredients') or []:
+            food = (ingredient.get('food') or {}).get('name')
+            if food:
+                foods.add(normalize_text(food))
+    return foods
+
+
+def ingredient_count(recipe: Dict[str, Any]) -> int:
+    """Количество ингредиентов в карточке рецепта"""
+    return sum(len(step.get('ingredients') or []) for step in recipe.get('steps') or [])
+
+
+class RecipeDeduplicator:
+    """
+    Поиск почти одинаковых рецептов через MinHash/LSH по названию и ингредиентам.
+    Рецепты объединяются, только если совпадают и названия, и наборы продуктов:
+    рецепты без ингредиентов в карточке дубликатами не считаются.
+    Сначала строится отчет (dry-run), удаление выполняется отдельным вызовом apply().
+    """
+
+    def __init__(self,
+                 threshold: float = DEFAULT_THRESHOLD,
+                 num_perm: int = DEFAULT_NUM_PERM,
+                 bands: int = DEFAULT_BANDS,
+                 ingredient_overlap: float = DEFAULT_INGREDIENT_OVERLAP) -> None:
+        """
+        Args:
+            threshold: минимальная оценка сходства для объединения в кластер
+            ingredient_overlap: минимальное сходство наборов продуктов двух рецептов
+            num_perm: количество хеш-функций MinHash
+            bands: количество полос LSH (num_perm должно делиться на bands)
+        """
+        if num_perm % bands:
+            raise ValueError('num_perm должно делиться на bands без остатка')
+        self.threshold = threshold
+        self.ingredient_overlap = ingredient_overlap
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Шинглы сильно повторяются между рецептами: хеши считаются один раз
+        self._hash_cache: Dict[str, array] = {}
+
+    def _feature_hashes(self, feature: str) -> array:
+        """num_perm стабильных между запусками 32-битных хешей признака (SHAKE-128)"""
+        hashes = self._hash_cache.get(feature)
+        if hashes is None:
+            hashes = array('I', hashlib.shake_128(feature.encode('utf-8')).digest(4 * self.num_perm))
+            self._hash_cache[feature] = hashes
+        return hashes
+
+    def signature(self, features: Set[str]) -> Tuple[int, ...]:
+        """MinHash-сигнатура множества признаков"""
+        if not features:
+            return (0,) * self.num_perm
+        return tuple(map(min, zip(*map(self._feature_hashes, features))))
+
+    def similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Оценка сходства Жаккара по двум сигнатурам"""
+        return sum(x == y for x, y in zip(first, second)) / self.num_perm
+
+    def ingredients_match(self, first: Set[str], second: Set[str]) -> bool:
+        """Наборы продуктов двух рецептов достаточно пересекаются (пустой набор не совпадает ни с чем)"""
+        if not first or not second:
+            return False
+        return len(first & second) / len(first | second) >= self.ingredient_overlap
+
+    # === ПОИСК ДУБЛИКАТОВ ===
+
+    @step("Построить отчет о дубликатах рецептов")
+    def find_duplicates(self, recipes: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Группирует похожие рецепты и выбирает в каждой группе оставляемый рецепт
+
+        Returns:
+            Dict[str, Any]: отчет
+                {
+                    'scanned': int,  # сколько рецептов просмотрено
+                    'clusters': [{'survivor': {...}, 'duplicates': [{...}], 'similarity': float}],
+                    'to_delete': List[int]  # ID рецептов, которые будут удалены
+                }
+        """
+        recipes_by_id = {}
+        signatures = {}
+        foods = {}
+        buckets = defaultdict(list)
+        for recipe in recipes:
+            recipe_id = recipe['id']
+            recipes_by_id[recipe_id] = recipe
+            foods[recipe_id] = recipe_foods(recipe)
+            signature = self.signature(recipe_features(recipe))
+            signatures[recipe_id] = signature
+            for band in range(self.bands):
+                band_key = (band, signature[band * self.rows:(band + 1) * self.rows])
+                buckets[band_key].append(recipe_id)
+
+        # Объединение кандидатов (union-find) с проверкой оценки сходства
+        parent = {recipe_id: recipe_id for recipe_id in recipes_by_id}
+
+        def find(recipe_id):
+            while parent[recipe_id] != recipe_id:
+                parent[recipe_id] = parent[parent[recipe_id]]
+                recipe_id = parent[recipe_id]
+            return recipe_id
+
+        checked = set()
+        best_similarity = defaultdict(float)
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            # Корзины маленькие, поэтому сравниваются все пары: сходство не транзитивно,
+            # и пара несоседних дубликатов не должна зависеть от порядка рецептов в корзине
+            for other, current in combinations(bucket, 2):
+                pair = (other, current) if other < current else (current, other)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                score = self.similarity(signatures[other], signatures[current])
+                if score >= self.threshold and self.ingredients_match(foods[other], foods[current]):
+                    root_other, root_current = find(other), find(current)
+                    if root_other != root_current:
+                        parent[root_current] = root_other
+                    best_similarity[other] = max(best_similarity[other], score)
+                    best_similarity[current] = max(best_similarity[current], score)
+
+        groups = defaultdict(list)
+        for recipe_id in recipes_by_id:
+            groups[find(recipe_id)].append(recipes_by_id[recipe_id])
+
+        clusters = []
+        to_delete = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            # Оставляем самый полный рецепт, при равенстве - самый ранний
+            members.sort(key=lambda recipe: (-ingredient_count(recipe), recipe['id']))
+            survivor, duplicates = members[0], members[1:]
+            clusters.append({
+                'survivor': {'id': survivor['id'], 'name': survivor.get('name')},
+                'duplicates': [{'id': recipe['id'], 'name': recipe.get('name')} for recipe in duplicates],
+                'similarity': min(best_similarity[recipe['id']] for recipe in members)
+            })
+            to_delete.extend(recipe['id'] for recipe in duplicates)
+
+        clusters.sort(key=lambda cluster: cluster['survivor']['id'])
+        report = {'scanned': len(recipes_by_id), 'clusters': clusters, 'to_delete': sorted(to_delete)}
+        print(f" Просмотрено рецептов: {report['scanned']}, групп дубликатов: {len(clusters)}, "
+              f"к удалению: {len(to_delete)}")
+        return report
+
+    @step("Построить отчет о дубликатах рецептов на сервере")
+    def find_duplicates_on_server(self,
+                                  api_client: TandoorAPIClient,
+                                  with_ingredients: bool = True,
+                                  max_workers: int = DEFAULT_BULK_WORKERS) -> Dict[str, Any]:
+        """
+        Обходит все страницы списка рецептов и строит отчет.
+        Карточки рецептов загружаются ради ингредиентов: без них (with_ingredients=False)
+        ни один рецепт не попадет в группу дубликатов.
+        """
+        recipes = list(api_client.iter_list('recipe/'))
+        if with_ingredients:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = executor.map(lambda recipe: api_client.get_recipe_by_id(recipe['id']), recipes)
+                recipes = [response['json'] if response.get('status_code') == 200 else recipe
+                           for recipe, response in zip(recipes, responses)]
+        return self.find_duplicates(recipes)
+
+    @staticmethod
+    @step("Удалить дубликаты рецептов по отчету")
+    def apply(api_client: TandoorAPIClient,
+              report: Dict[str, Any],
+              max_workers: Optional[int] = None) -> Tuple[Set[int], Set[int]]:
+        """
+        Удаляет рецепты из отчета параллельными запросами
+
+        Returns:
+            Tuple[Set[int], Set[int]]: (удаленные ID, ID, которые удалить не удалось)
+        """
+        return api_client.delete_many('recipe', report['to_delete'],
+                                      max_workers=max_workers or DEFAULT_BULK_WORKERS)
@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Optional, Any, Iterable, List
+
+from api.client import TandoorAPIClient
+from utils.auth_session import worker_id
+from utils.reporting import step
+
+# Каталог локальных копий (в корне проекта, вне git)
+MIRROR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+
+
+def default_mirror_path() -> str:
+    """Файл копии воркера pytest-xdist: общий файл воркеры блокировали бы и перезаписывали друг другу"""
+    return os.path.join(MIRROR_DIR, f'tandoor_mirror_{worker_id()}.sqlite3')
+
+
+# Как часто выполнять полную сверку (ловит удаленные на сервере объекты), секунды
+DEFAULT_FULL_SYNC_INTERVAL = 6 * 60 * 60
+
+# Синхронизируемые ресурсы: эндпоинт и параметр фильтра "изменено после"
+# (None - сервер не умеет отдавать изменения, ресурс всегда читается целиком)
+MIRROR_RESOURCES = {
+    'recipe': {'endpoint': 'recipe/', 'delta_param': 'updatedat'},
+    'food': {'endpoint': 'food/', 'delta_param': None},
+    'meal-plan': {'endpoint': 'meal-plan/', 'delta_param': None},
+    'shopping-list-entry': {'endpoint': 'shopping-list-entry/', 'delta_param': 'updated_after'},
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    resource TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (resource, id)
+);
+CREATE INDEX IF NOT EXISTS objects_updated ON objects (resource, updated_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    resource TEXT PRIMARY KEY,
+    last_sync REAL,
+    last_full_sync REAL
+);
+"""
+
+
+class TandoorMirror:
+    """
+    Локальная копия (SQLite) рецептов, продуктов, планов питания и списка покупок.
+    Первый вызов sync() загружает все объекты, последующие - только измененные.
+    """
+
+    def __init__(self,
+                 api_client: TandoorAPIClient,
+                 db_path: Optional[str] = None,
+                 full_sync_interval: float = DEFAULT_FULL_SYNC_INTERVAL) -> None:
+        """
+        Args:
+            api_client: клиент Tandoor API
+            db_path: путь к файлу базы (по умолчанию - файл воркера; ':memory:' - только в памяти процесса)
+            full_sync_interval: период полной сверки с сервером, секунды
+        """
+        self.api_client = api_client
+        self.full_sync_interval = full_sync_interval
+        db_path = db_path or default_mirror_path()
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Закрывает соединение с базой"""
+        self.connection.close()
+
+    # === СИНХРОНИЗАЦИЯ ===
+
+    @step("Синхронизировать локальную копию Tandoor")
+    def sync(self, resources: Optional[Iterable[str]] = None, force_full: bool = False) -> Dict[str, int]:
+        """
+        Синхронизирует ресурсы с сервером
+
+        Returns:
+            Dict[str, int]: количество загруженных объектов по ресурсам
+        """
+        loaded = {}
+        for resource in resources or MIRROR_RESOURCES:
+            loaded[resource] = self.sync_resource(resource, force_full=force_full)
+        return loaded
+
+    def sync_resource(self, resource: str, force_full: bool = False) -> int:
+        """Синхронизирует один ресурс: дельта по updated_at или полная сверка"""
+        config = MIRROR_RESOURCES[resource]
+        state = self.connection.execute(
+            'SELECT last_sync, last_full_sync FROM sync_state WHERE resource = ?', (resource,)
+        ).fetchone()
+        now = time.time()
+        since = self._last_updated_at(resource)
+
+        full_due = (state is None or state['last_full_sync'] is None
+                    or now - state['last_full_sync'] >= self.full_sync_interval)
+        if force_full or full_due or config['delta_param'] is None or since is None:
+            count = self._full_sync(resource)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO sync_state (resource, last_sync, last_full_sync) VALUES (?, ?, ?)',
+                (resource, now, now))
+            print(f"[MIRROR] {resource}: полная сверка, объектов {count}")
+        else:
+            # Отметка времени берется с сервера (max updated_at), а не с локальных часов
+            objects = self.api_client.iter_list(config['endpoint'], **{config['delta_param']: since})
+            count = self._upsert(resource, objects)
+            self.connection.execute('UPDATE sync_state SET last_sync = ? WHERE resource = ?', (now, resource))
+            print(f"[MIRROR] {resource}: изменено с {since}: {count}")
+
+        self.connection.commit()
+        return count
+
+    def _full_sync(self, resource: str) -> int:
+        """Загружает ресурс целиком и удаляет локальные объекты, которых больше нет на сервере"""
+        objects = list(self.api_client.iter_list(MIRROR_RESOURCES[resource]['endpoint']))
+        self.connection.execute('DELETE FROM objects WHERE resource = ?', (resource,))
+        return self._upsert(resource, objects)
+
+    def _upsert(self, resource: str, objects: Iterable[Dict[str, Any]]) -> int:
+        """Вставляет или обновляет объекты ресурса"""
+        rows = [(resource, item['id'], item.get('updated_at'), json.dumps(item, ensure_ascii=False))
+                for item in objects]
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO objects (resource, id, updated_at, data) VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def _last_updated_at(self, resource: str) -> Optional[str]:
+        """Самая поздняя отметка updated_at среди локальных объектов ресурса"""
+        row = self.connection.execute(
+            'SELECT MAX(updated_at) AS last FROM objects WHERE resource = ?', (resource,)
+        ).fetchone()
+        return row['last']
+
+    # === ЧТЕНИЕ ===
+
+    def get(self, resource: str, object_id: int) -> Optional[Dict[str, Any]]:
+        """Возвращает объект по ID или None"""
+        row = self.connection.execute(
+            'SELECT data FROM objects WHERE resource = ? AND id = ?', (resource, object_id)
+        ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def all(self, resource: str) -> List[Dict[str, Any]]:
+        """Возвращает все объекты ресурса, отсортированные по ID"""
+        rows = self.connection.execute(
+            'SELECT data FROM objects WHERE resource = ? ORDER BY id', (resource,)
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def ids(self, resource: str) -> set:
+        """Возвращает множество ID объектов ресурса"""
+        rows = self.connection.execute('SELECT id FROM objects WHERE resource = ?', (resource,))
+        return {row['id'] for row in rows}
+
+    def count(self, resource: str) -> int:
+        """Количество объектов ресурса в локальной копии"""
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM objects WHERE resource = ?', (resource,)
+        ).fetchone()[0]
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        """Произвольный SQL-запрос к локальной копии (поддерживает json_extract)"""
+        return self.connection.execute(sql, tuple(params)).fetchall()
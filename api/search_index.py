@@ -0,0 +1,206 @@
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Any, Iterable, List, Set
+
+from api.client import TandoorAPIClient, DEFAULT_BULK_WORKERS
+
+_TOKEN_RE = re.compile(r'\w+')
+_SHORT_I_PLACEHOLDER = '\ue000'
+
+
+def normalize_text(text: str) -> str:
+    """
+    Приводит строку к виду для поиска: нижний регистр, ё -> е,
+    без диакритики (é -> e). Буква й сохраняется.
+    """
+    text = text.casefold().replace('ё', 'е')
+    if not text.isascii():
+        # й временно заменяется символом из частной области, чтобы NFKD не превратил ее в и
+        text = unicodedata.normalize('NFKD', text.replace('й', _SHORT_I_PLACEHOLDER))
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+        text = text.replace(_SHORT_I_PLACEHOLDER, 'й')
+    return ' '.join(text.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает нормализованную строку на слова"""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def recipe_search_terms(recipe: Dict[str, Any]) -> List[str]:
+    """Собирает слова для индекса: название, ключевые слова и продукты ингредиентов"""
+    texts = [recipe.get('name') or '']
+    for keyword in recipe.get('keywords') or []:
+        texts.append(keyword.get('name') or keyword.get('label') or '')
+    for step in recipe.get('steps') or []:
+        for ingredient in step.get('ingredients') or []:
+            food = ingredient.get('food') or {}
+            texts.append(food.get('name') or '')
+    return tokenize(' '.join(texts))
+
+
+class RecipeSearchIndex:
+    """
+    Инвертированный индекс рецептов в памяти процесса.
+    Поиск по точному названию, словам и префиксам без запросов к серверу.
+    """
+
+    def __init__(self) -> None:
+        self._names: Dict[int, str] = {}
+        self._doc_tokens: Dict[int, tuple] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._exact: Dict[str, Set[int]] = {}
+        # Отсортированный словарь для поиска по префиксу, перестраивается лениво
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # === НАПОЛНЕНИЕ ===
+
+    def add_recipe(self, recipe: Dict[str, Any]) -> None:
+        """Добавляет рецепт в индекс (повторное добавление обновляет запись)"""
+        recipe_id = recipe['id']
+        if recipe_id in self._names:
+            self.remove_recipe(recipe_id)
+
+        name = recipe.get('name') or ''
+        # intern: одинаковые слова у разных рецептов хранятся в одном экземпляре
+        tokens = tuple(sys.intern(token) for token in set(recipe_search_terms(recipe)))
+        self._names[recipe_id] = name
+        self._doc_tokens[recipe_id] = tokens
+        self._exact.setdefault(normalize_text(name), set()).add(recipe_id)
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = {recipe_id}
+                self._vocabulary_dirty = True
+            else:
+                ids.add(recipe_id)
+
+    def add_recipes(self, recipes: Iterable[Dict[str, Any]]) -> int:
+        """Добавляет несколько рецептов, возвращает их количество"""
+        count = 0
+        for recipe in recipes:
+            self.add_recipe(recipe)
+            count += 1
+        return count
+
+    def remove_recipe(self, recipe_id: int) -> None:
+        """Удаляет рецепт из индекса"""
+        name = self._names.pop(recipe_id, None)
+        if name is None:
+            return
+        exact_key = normalize_text(name)
+        self._exact[exact_key].discard(recipe_id)
+        if not self._exact[exact_key]:
+            del self._exact[exact_key]
+        for token in self._doc_tokens.pop(recipe_id):
+            ids = self._postings[token]
+            ids.discard(recipe_id)
+            if not ids:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+
+    @classmethod
+    def from_client(cls,
+                    api_client: TandoorAPIClient,
+                    with_ingredients: bool = False,
+                    max_workers: int = DEFAULT_BULK_WORKERS) -> 'RecipeSearchIndex':
+        """
+        Строит индекс по списку рецептов с сервера.
+        Список не содержит ингредиентов: with_ingredients=True дополнительно
+        параллельно загружает карточки рецептов.
+        """
+        index = cls()
+        index.update_from_client(api_client, with_ingredients=with_ingredients, max_workers=max_workers)
+        return index
+
+    def update_from_client(self,
+                           api_client: TandoorAPIClient,
+                           since: Optional[str] = None,
+                           with_ingredients: bool = False,
+                           max_workers: int = DEFAULT_BULK_WORKERS) -> int:
+        """Добавляет/обновляет рецепты, измененные после since (None - все рецепты)"""
+        params = {'updatedat': since} if since else {}
+        recipes = list(api_client.iter_list('recipe/', **params))
+        if with_ingredients:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = executor.map(lambda recipe: api_client.get_recipe_by_id(recipe['id']), recipes)
+                recipes = [response['json'] if response.get('status_code') == 200 else recipe
+                           for recipe, response in zip(recipes, responses)]
+        return self.add_recipes(recipes)
+
+    @classmethod
+    def from_mirror(cls, mirror) -> 'RecipeSearchIndex':
+        """Строит индекс по локальной копии (api.mirror.TandoorMirror) без запросов к серверу"""
+        index = cls()
+        index.add_recipes(mirror.all('recipe'))
+        return index
+
+    # === ПОИСК ===
+
+    def name(self, recipe_id: int) -> Optional[str]:
+        """Название рецепта по ID"""
+        return self._names.get(recipe_id)
+
+    def resolve(self, name: str) -> List[int]:
+        """ID рецептов с точно таким названием (без учета регистра, ё/е и диакритики)"""
+        return sorted(self._exact.get(normalize_text(name), ()))
+
+    def resolve_one(self, name: str) -> int:
+        """ID единственного рецепта с таким названием; иначе исключение"""
+        ids = self.resolve(name)
+        if len(ids) != 1:
+            raise LookupError(f"Ожидался один рецепт '{name}', найдено: {ids}")
+        return ids[0]
+
+    def tokens_with_prefix(self, prefix: str) -> List[str]:
+        """Слова индекса, начинающиеся с префикса"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        prefix = normalize_text(prefix)
+        tokens = []
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            tokens.append(self._vocabulary[position])
+            position += 1
+        return tokens
+
+    def search(self, query: str, prefix: bool = True) -> List[int]:
+        """
+        ID рецептов, содержащих все слова запроса.
+        При prefix=True последнее слово ищется как префикс ("карамел" найдет "карамельный").
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        exact_sets = [self._postings.get(token, set()) for token in tokens[:-1]]
+        if not prefix:
+            exact_sets.append(self._postings.get(tokens[-1], set()))
+        exact_sets.sort(key=len)
+
+        result = set(exact_sets[0]) if exact_sets else None
+        for ids in exact_sets[1:]:
+            if not result:
+                return []
+            result &= ids
+        if not prefix:
+            return sorted(result)
+
+        last = tokens[-1]
+        if result is not None:
+            # Фильтруем найденных кандидатов по их словам, не объединяя все слова с префиксом
+            return sorted(recipe_id for recipe_id in result
+                          if any(token.startswith(last) for token in self._doc_tokens[recipe_id]))
+
+        matched = set()
+        for token in self.tokens_with_prefix(last):
+            matched |= self._postings[token]
+        return sorted(matched)
@@ -1,14 +1,43 @@
+import json
 import os
 import time
-from typing import Optional, Tuple
+from typing import Callable, Dict, Optional, Any, List, Tuple
 
 import allure
-from selenium.common import TimeoutException
+from selenium.common import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 
+from utils.reporting import step, attach
+from utils.step_tracer import traced_wait
+
+from .cached_element import CachedElement
+from .performance import performance_log
+from .scripts import (READY_INSTRUMENTATION_JS, READY_STATE_JS, FILL_FORM_JS, READ_FORM_JS, SNAPSHOT_LIST_JS,
+                      IDLE_STATE_JS, NAVIGATION_TIMING_JS)
+
+# Сколько DOM должен не меняться, чтобы страница считалась отрисованной, мс
+READY_QUIET_MS = 200
+# Пауза между проверками готовности, секунды
+READY_POLL_INTERVAL = 0.05
+# Пауза между пробами DOM в проверках наличия/видимости, секунды
+PROBE_POLL_INTERVAL = 0.05
+
+
+def xpath_literal(value: str) -> str:
+    """
+    Строковый литерал XPath 1.0 для произвольного текста. Экранирования в XPath 1.0 нет,
+    поэтому текст с обоими видами кавычек собирается через concat()
+    """
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in value.split("'")) + ")"
+
 
 class BasePage:
     """Базовый класс для всех страниц"""
@@ -25,37 +54,207 @@ class BasePage:
         self.timeout = timeout  # Сохраняем timeout как атрибут
         self.wait = WebDriverWait(driver, timeout)
         self.base_url = os.getenv('BASE_URL', 'http://localhost:8080')
+        # Найденные элементы по локаторам, действуют до следующей навигации
+        self._element_cache: Dict[Tuple[str, str], CachedElement] = {}
+        # Время последнего действия страницы (клик, ввод, навигация)
+        self._last_action_at = 0.0
+        # Метрики производительности последней навигации (open_url)
+        self.last_navigation_timing: Optional[Dict[str, Any]] = None
+        # Инструментирование готовности устанавливается при первой навигации/проверке:
+        # создание страницы не обращается к браузеру (драйвер может еще запускаться в фоне)
 
     # === НАВИГАЦИЯ ===
-    @allure.step("Открыть базовый URL")
+    @step("Открыть базовый URL")
     def open_base_page(self) -> 'BasePage':
         """Открывает базовый URL"""
+        self._install_ready_instrumentation()
         self.driver.get(self.base_url)
         return self
 
-    @allure.step("Открыть URL: {url}")
+    @step("Открыть URL: {url}")
     def open_url(self, url: str) -> None:
-        """Открывает конкретный URL"""
+        """Открывает конкретный URL и ждет готовности приложения"""
+        self._install_ready_instrumentation()
         self.driver.get(url)
+        self._on_navigation()
+        self._mark_action()
+        self.wait_for_app_ready()
+        self.collect_navigation_timing()
 
-    @allure.step("Обновить страницу")
+    @step("Обновить страницу")
     def refresh_page(self)-> None:
         """Обновить страницу"""
+        self._install_ready_instrumentation()
         self.driver.refresh()
-        time.sleep(1)
+        self._on_navigation()
+        self._mark_action()
+        self.wait_for_app_ready()
+
+    def _on_navigation(self) -> None:
+        """Вызывается после загрузки нового документа: страницы сбрасывают здесь свои кеши"""
+        self.invalidate_element_cache()
+
+    # === ОЖИДАНИЕ ГОТОВНОСТИ ===
+
+    def _install_ready_instrumentation(self) -> None:
+        """Регистрирует счетчик запросов и наблюдатель DOM для каждого нового документа (через CDP).
+        Без CDP (Remote WebDriver) скрипт устанавливается при первой проверке готовности"""
+        if getattr(self.driver, '_qa_ready_registered', False):
+            return
+        try:
+            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                                        {'source': READY_INSTRUMENTATION_JS})
+            self.driver._qa_ready_registered = True
+        except (AttributeError, WebDriverException):
+            pass
+
+    @step("Дождаться готовности приложения")
+    @traced_wait('wait_for_app_ready')
+    def wait_for_app_ready(
+        self,
+        timeout: Optional[float] = None,
+        quiet_ms: int = READY_QUIET_MS
+    ) -> bool:
+        """
+        Ждет, пока нет незавершенных fetch/XHR, Vue отрисовал изменения
+        и структура DOM не меняется quiet_ms миллисекунд (анимации классов и текст не учитываются).
+        Заменяет фиксированные паузы.
+
+        Returns:
+            bool: True - приложение готово, False - не дождались за таймаут
+        """
+        self._install_ready_instrumentation()
+        wait_timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + wait_timeout
+        state = None
+        while time.monotonic() < deadline:
+            try:
+                state = self.driver.execute_async_script(READY_STATE_JS)
+                if state is None:
+                    # Документ открыт до регистрации скрипта: запросы, начатые раньше, не учитываются
+                    self.driver.execute_script(READY_INSTRUMENTATION_JS)
+                elif (state['document'] == 'complete' and state['inflight'] == 0
+                      and state['quiet'] >= quiet_ms):
+                    return True
+            except WebDriverException:
+                # Страница в процессе навигации - пробуем еще раз
+                pass
+            time.sleep(READY_POLL_INTERVAL)
+        print(f"Приложение не пришло в готовность за {wait_timeout}с: {state}")
+        return False
+
+    # === МЕТРИКИ ПРОИЗВОДИТЕЛЬНОСТИ ===
+
+    def collect_navigation_timing(self) -> Optional[Dict[str, Any]]:
+        """Собирает Navigation/Resource Timing и длинные задачи текущей страницы одним скриптом,
+        записывает в общий журнал (pages.performance) и прикладывает к отчету"""
+        try:
+            timing = self.driver.execute_script(NAVIGATION_TIMING_JS)
+        except WebDriverException as e:
+            print(f"Не удалось получить метрики навигации: {e}")
+            return None
+        if not timing:
+            return None
+        timing['page'] = type(self).__name__
+        self.last_navigation_timing = timing
+        performance_log.record(timing)
+        attach(lambda: json.dumps(timing, ensure_ascii=False, indent=2),
+               name=f"Метрики навигации {timing['page']}",
+               attachment_type=allure.attachment_type.JSON)
+        return timing
+
+    @step("Проверить бюджет производительности: {metric} <= {limit_ms} мс")
+    def assert_performance_budget(self, metric: str, limit_ms: float) -> None:
+        """Проверяет метрику последней навигации (например 'tti_ms') против бюджета"""
+        assert self.last_navigation_timing, "Нет метрик навигации: страница не открывалась через open_url"
+        value = self.last_navigation_timing.get(metric)
+        assert value is not None, f"Метрика {metric} недоступна в этом браузере"
+        assert value <= limit_ms, (f"{self.last_navigation_timing['url']}: {metric} = {value:.0f} мс, "
+                                   f"бюджет {limit_ms:.0f} мс")
+
+    # === ПОЛИТИКА ОЖИДАНИЙ ===
+
+    def _mark_action(self) -> None:
+        self._last_action_at = time.monotonic()
+
+    def is_app_idle(self, quiet_ms: int = READY_QUIET_MS) -> bool:
+        """
+        Мгновенная проверка без ожидания: нет запросов, DOM не меняется quiet_ms
+        и с последнего действия страницы прошло не меньше quiet_ms.
+        В простаивающем приложении ожидание появления/исчезновения элемента бессмысленно.
+        """
+        if time.monotonic() - self._last_action_at < quiet_ms / 1000:
+            return False
+        try:
+            state = self.driver.execute_script(IDLE_STATE_JS)
+        except WebDriverException:
+            return False
+        return bool(state) and (state['document'] == 'complete' and state['inflight'] == 0
+                                and state['quiet'] >= quiet_ms)
+
+    @traced_wait('poll')
+    def _poll(self, probe: Callable[[], Any], timeout: float, stop_when_idle: bool = False) -> Any:
+        """
+        Опрашивает DOM сразу и затем каждые PROBE_POLL_INTERVAL, пока probe() не вернет
+        истинное значение. Прекращает ожидание по таймауту; с stop_when_idle - и когда приложение
+        простаивает. Досрочный выход нужен только проверкам отсутствия: в простаивающем приложении
+        видимый элемент уже не исчезнет, а ожидаемый элемент может появиться позже
+        (рендер после загрузки данных не всегда виден как сетевая активность).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                result = probe()
+            except WebDriverException:
+                # Элемент устарел или страница в процессе навигации
+                result = None
+            if result or time.monotonic() >= deadline or (stop_when_idle and self.is_app_idle()):
+                return result
+            time.sleep(PROBE_POLL_INTERVAL)
+
+    def _first_visible(self, locator: Tuple[str, str]) -> Optional[WebElement]:
+        return next((element for element in self.driver.find_elements(*locator) if element.is_displayed()), None)
+
+    # === КЕШ ЭЛЕМЕНТОВ ===
+
+    def _resolve(self, locator: Tuple[str, str], timeout: Optional[int] = None) -> WebElement:
+        """Поиск элемента с ожиданием его появления, без кеша"""
+        wait_timeout = timeout if timeout is not None else self.timeout
+        return WebDriverWait(self.driver, wait_timeout).until(EC.presence_of_element_located(locator))
+
+    def _remember_element(self, locator: Tuple[str, str], element: WebElement) -> CachedElement:
+        cached = element if isinstance(element, CachedElement) else CachedElement(element, locator, self._resolve)
+        self._element_cache[locator] = cached
+        return cached
+
+    def cached_element(self, locator: Tuple[str, str], timeout: Optional[int] = None) -> CachedElement:
+        """
+        Элемент из кеша страницы; при промахе - поиск с ожиданием.
+        Устаревший элемент находится заново при первой команде к нему.
+        """
+        cached = self._element_cache.get(locator)
+        if cached is None:
+            cached = self._remember_element(locator, self._resolve(locator, timeout))
+        return cached
+
+    def invalidate_element_cache(self, locator: Optional[Tuple[str, str]] = None) -> None:
+        """Сбрасывает кеш элементов целиком или для одного локатора"""
+        if locator is None:
+            self._element_cache.clear()
+        else:
+            self._element_cache.pop(locator, None)
 
     # === ПОИСК ЭЛЕМЕНТОВ ===
-    @allure.step("Найти элемент: {locator}")
+    @step("Найти элемент: {locator}")
     def find_element(
         self,
         locator: Tuple[str, str],
         timeout: Optional[int] = None
     ) -> WebElement:
         """Найти элемент с ожиданием его появления"""
-        wait_timeout = timeout if timeout is not None else self.timeout
-        return self.wait.until(EC.presence_of_element_located(locator))
+        return self.cached_element(locator, timeout)
 
-    @allure.step("Найти элементы: {locator}")
+    @step("Найти элементы: {locator}")
     def find_elements(
     self,
     locator: Tuple[str, str],  # ✅ Добавить
@@ -65,18 +264,17 @@ class BasePage:
         wait_timeout = timeout if timeout is not None else self.timeout
         return self.wait.until(EC.presence_of_all_elements_located(locator))
 
-    @allure.step("Кликнуть по элементу: {locator}")
+    @step("Кликнуть по элементу: {locator}")
     def click(self, locator: Tuple[str, str], timeout: Optional[int] = None) -> None:
         """Кликнуть по элементу"""
-        wait_timeout = timeout if timeout is not None else self.timeout
         try:
-            element = self.wait.until(EC.presence_of_element_located(locator))
-            element.click()
+            self.cached_element(locator, timeout).click()
+            self._mark_action()
         except Exception as e:
             print(f"Ошибка при клике на {locator}: {e}")
             raise
 
-    @allure.step("Ввести текст '{text}' в элемент: {locator}")
+    @step("Ввести текст '{text}' в элемент: {locator}")
     def input_text(
         self,
         locator: Tuple[str, str],
@@ -85,14 +283,15 @@ class BasePage:
         """Ввод текста в поле с предварительной очисткой"""
         # ждём, что элемент не только есть, но и активен для взаимодействия
         try:
-            element = self.wait.until(EC.presence_of_element_located(locator))
+            element = self.cached_element(locator)
             element.clear()
             element.send_keys(text)
+            self._mark_action()
         except Exception as e:
             print(f"Ошибка при вводе текста в {locator}: {e}")
             raise
 
-    @allure.step("Получить текст из элемента: {locator}")
+    @step("Получить текст из элемента: {locator}")
     def get_text(self, locator: Tuple[str, str]) -> str:
         """Получает текст из элемента"""
         try:
@@ -102,31 +301,117 @@ class BasePage:
             print(f"Ошибка при получении текста из {locator}: {e}")
             raise
 
+    # === СНИМКИ СПИСКОВ ===
+
+    @step("Получить снимок списка: {item_locator}")
+    def snapshot_list(
+        self,
+        item_locator: Tuple[str, str],
+        fields: Optional[Dict[str, Tuple[str, str]]] = None,
+        group_header_css: Optional[str] = None,
+        container_locator: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Читает весь список за один вызов execute_script вместо запроса на каждый элемент
+
+        Args:
+            item_locator: локатор элементов списка
+            fields: дополнительные поля {имя: (CSS внутри элемента или '', атрибут или 'text')}
+            group_header_css: CSS заголовков групп (требует CSS-локатор элементов)
+            container_locator: область поиска (по умолчанию весь документ)
+
+        Returns:
+            List[Dict[str, Any]]: [{'text': ..., 'group': заголовок группы или None, 'visible': ..., <поля>...}]
+        """
+        by, selector = item_locator
+        if group_header_css and by != By.CSS_SELECTOR:
+            raise ValueError("Группировка по заголовкам поддерживается только для CSS-локаторов")
+        item = {'by': by, 'selector': selector}
+        container = None
+        if container_locator:
+            container = {'by': container_locator[0], 'selector': container_locator[1]}
+        return self.driver.execute_script(SNAPSHOT_LIST_JS, item, group_header_css, fields or {}, container)
+
+    # === ФОРМЫ ===
+
+    @staticmethod
+    def form_field(
+        locator: Tuple[str, str],
+        value: Any = None,
+        action: str = 'value',
+        option: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Описание поля для fill_form
+
+        Args:
+            locator: локатор поля (By.CSS_SELECTOR или By.XPATH)
+            value: значение (для check - True/False)
+            action: value - ввод, check - чекбокс, click - клик, select - выбор в multiselect
+            option: текст варианта multiselect, если отличается от введенного значения
+        """
+        by, selector = locator
+        return {'by': by, 'selector': selector, 'value': value, 'action': action, 'option': option}
+
+    @step("Заполнить форму одним скриптом")
+    def fill_form(self, fields: List[Dict[str, Any]], option_timeout: Optional[float] = None) -> List[str]:
+        """
+        Заполняет поля формы по порядку за один вызов execute_async_script
+        (события input/change для компонентов Vue), затем проверяет значения.
+
+        Returns:
+            List[str]: ошибки заполнения и несовпадения значений (пустой список - все заполнено)
+        """
+        wait_timeout = option_timeout if option_timeout is not None else self.timeout
+        result = self.driver.execute_async_script(FILL_FORM_JS, fields, wait_timeout * 1000)
+        self._mark_action()
+        errors = list(result.get('errors', []))
+        self.wait_for_app_ready()
+
+        actual_values = self.driver.execute_script(READ_FORM_JS, fields)
+        for field, actual in zip(fields, actual_values):
+            expected = field['option'] or field['value']
+            if field['action'] == 'check':
+                matches = actual == bool(field['value'])
+            elif field['action'] == 'select':
+                matches = actual is not None and str(expected).lower() in str(actual).lower()
+            elif field['action'] == 'value':
+                matches = actual == str(field['value'])
+            else:
+                continue
+            if not matches:
+                errors.append(f"Поле {field['selector']}: ожидалось '{expected}', получено '{actual}'")
+
+        if errors:
+            print(f"Ошибки заполнения формы: {errors}")
+        return errors
+
     # ===ПРОВЕРКИ===
 
-    @allure.step("Проверить наличие элемента: {locator}")
+    @step("Проверить наличие элемента: {locator}")
     def is_element_present(self, locator, timeout=None) -> bool:
-        """Проверяет наличие элемента на странице"""
+        """Проверяет наличие элемента на странице (сразу, затем короткими опросами)"""
         try:
             wait_timeout = timeout if timeout is not None else self.timeout
-            WebDriverWait(self.driver, wait_timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-            allure.attach(
+            # Проверка наличия всегда обращается к DOM, найденный элемент обновляет кеш
+            elements = self._poll(lambda: self.driver.find_elements(*locator), wait_timeout)
+            if not elements:
+                self.invalidate_element_cache(locator)
+                attach(
+                    f"Элемент {str(locator)} НЕ найден (таймаут)",
+                    name="element_not_found",
+                    attachment_type=allure.attachment_type.TEXT
+                )
+                return False
+            self._remember_element(locator, elements[0])
+            attach(
                 f"Элемент {str(locator)} присутствует на странице",
                 name="element_present",
                 attachment_type=allure.attachment_type.TEXT
             )
             return True
-        except TimeoutException:
-            allure.attach(
-                f"Элемент {str(locator)} НЕ найден (таймаут)",
-                name="element_not_found",
-                attachment_type=allure.attachment_type.TEXT
-            )
-            return False
         except Exception as e:
-            allure.attach(
+            attach(
                 f"Ошибка при проверке элемента {str(locator)}: {e}",
                 name="element_check_error",
                 attachment_type=allure.attachment_type.TEXT
@@ -134,7 +419,7 @@ class BasePage:
             print(f"Неожиданная ошибка при проверке элемента {locator}: {e}")
             return False
 
-    @allure.step("Проверить видимость элемента: {locator}")
+    @step("Проверить видимость элемента: {locator}")
     def is_element_visible(
     self,
     locator: Tuple[str, str],
@@ -143,59 +428,86 @@ class BasePage:
         """Проверяет видимость элемента (не кидает исключения)"""
         try:
             wait_timeout = timeout if timeout is not None else self.timeout
-            allure.attach(
+            attach(
                 f"Параметры проверки видимости:\n"
                 f"Локатор: {locator}\n"
                 f"Таймаут: {wait_timeout}с",
                 name="invisibility_check_params",
                 attachment_type=allure.attachment_type.TEXT
             )
-            WebDriverWait(self.driver, wait_timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
-            allure.attach(
+            element = self._poll(lambda: self._first_visible(locator), wait_timeout)
+            if element is None:
+                raise TimeoutException(f"Элемент {locator} не стал видимым")
+            self._remember_element(locator, element)
+            attach(
                 f"Элемент {str(locator)} видим на странице",
                 name="element_visible",
                 attachment_type=allure.attachment_type.TEXT
             )
             return True
         except TimeoutException:
-            allure.attach(
+            self.invalidate_element_cache(locator)
+            attach(
                 f"Элемент {str(locator)} НЕ видим (таймаут)",
                 name="element_not_visible",
                 attachment_type=allure.attachment_type.TEXT
             )
             return False
 
-    @allure.step("Проверить невидимость элемента: {locator}")
+    @step("Проверить невидимость элемента: {locator}")
     def is_element_invisible(
     self,
     locator: Tuple[str, str],
     timeout: Optional[int] = None
 ) -> bool:
-        """Проверяет, что элемент невидим (не кидает исключения)"""
+        """Проверяет, что элемент невидим (не кидает исключения).
+        Отсутствие проверяется сразу; видимый элемент в простаивающем приложении - сразу False"""
         try:
             wait_timeout = timeout if timeout is not None else self.timeout
-            allure.attach(
+            attach(
                 f"Параметры проверки невидимости:\n"
                 f"Локатор: {locator}\n"
                 f"Таймаут: {wait_timeout}с",
                 name="invisibility_check_params",
                 attachment_type=allure.attachment_type.TEXT
             )
-            WebDriverWait(self.driver, wait_timeout).until(
-                EC.invisibility_of_element_located(locator)
-            )
-            allure.attach(
+            if not self._poll(lambda: self._first_visible(locator) is None, wait_timeout, stop_when_idle=True):
+                raise TimeoutException(f"Элемент {locator} все еще видим")
+            self.invalidate_element_cache(locator)
+            attach(
                 f"Элемент {str(locator)} невидим (как и ожидалось)",
                 name="element_invisible",
                 attachment_type=allure.attachment_type.TEXT
             )
             return True
         except TimeoutException:
-            allure.attach(
-                f"Элемент {str(locator)} все еще видим (таймаут)",
+            attach(
+                f"Элемент {str(locator)} все еще видим (таймаут или приложение простаивает)",
                 name="element_still_visible",
                 attachment_type=allure.attachment_type.TEXT
             )
             return False
+
+    @step("Проверить отсутствие элемента: {locator}")
+    def is_element_absent(
+    self,
+    locator: Tuple[str, str],
+    timeout: Optional[int] = None
+) -> bool:
+        """Проверяет, что элемента нет в DOM (не кидает исключения) - замена `not is_element_present(...)`.
+        Отсутствие проверяется сразу; найденный элемент в простаивающем приложении - сразу False"""
+        wait_timeout = timeout if timeout is not None else self.timeout
+        if self._poll(lambda: not self.driver.find_elements(*locator), wait_timeout, stop_when_idle=True):
+            self.invalidate_element_cache(locator)
+            attach(
+                f"Элемент {str(locator)} отсутствует (как и ожидалось)",
+                name="element_absent",
+                attachment_type=allure.attachment_type.TEXT
+            )
+            return True
+        attach(
+            f"Элемент {str(locator)} все еще присутствует (таймаут или приложение простаивает)",
+            name="element_still_present",
+            attachment_type=allure.attachment_type.TEXT
+        )
+        return False
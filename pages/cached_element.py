@@ -0,0 +1,32 @@
+from typing import Callable, Tuple
+
+from selenium.common import StaleElementReferenceException
+from selenium.webdriver.remote.webelement import WebElement
+
+
+class CachedElement(WebElement):
+    """
+    WebElement из кеша страницы. Если элемент устарел (Vue перерисовал узел),
+    он заново находится по своему локатору и команда повторяется один раз.
+    """
+
+    def __init__(self,
+                 element: WebElement,
+                 locator: Tuple[str, str],
+                 resolve: Callable[[Tuple[str, str]], WebElement]) -> None:
+        """
+        Args:
+            element: найденный элемент
+            locator: локатор, по которому элемент находится заново
+            resolve: функция поиска элемента по локатору (с ожиданием)
+        """
+        super().__init__(element.parent, element.id)
+        self.locator = locator
+        self._resolve = resolve
+
+    def _execute(self, command, params=None):
+        try:
+            return super()._execute(command, params)
+        except StaleElementReferenceException:
+            self._id = self._resolve(self.locator).id
+            return super()._execute(command, params)
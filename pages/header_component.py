@@ -1,9 +1,10 @@
-import time
 from typing import Optional
 
 import allure
 from selenium.webdriver.common.by import By
 
+from utils.reporting import step, attach
+
 from .base_page import BasePage
 
 
@@ -20,54 +21,54 @@ class HeaderComponent(BasePage):
 
     # ===НАВИГАЦИЯ===
 
-    @allure.step("Перейти к разделу планов питания")
+    @step("Перейти к разделу планов питания")
     def go_to_meal_plan(self):
         """ Переход к разделу планов питания"""
         self.click(self.MEAL_PLAN_LINK)
         print("Перешли к планам питания")
-        time.sleep(2)
+        self.wait_for_app_ready()
 
-    @allure.step("Перейти к списку покупок")
+    @step("Перейти к списку покупок")
     def go_to_shopping_list(self):
         """ Переход к списку покупок"""
         self.click(self.SHOPPING_LIST_LINK)  # Кликаем на кнопку
         print("Вы перешли к списку покупок")
-        time.sleep(2)
+        self.wait_for_app_ready()
 
-    @allure.step("Открыть меню пользователя")
+    @step("Открыть меню пользователя")
     def go_to_user_menu(self):
         """ Переход в меню пользователя"""
         self.click(self.USER_MENU)
         print("Вы перешли в меню пользователя")
-        time.sleep(2)
+        self.wait_for_app_ready()
 
     # ===ПРОВЕРКИ===
 
-    @allure.step("Проверить авторизацию пользователя")
+    @step("Проверить авторизацию пользователя")
     def is_user_logged_in(self) -> bool:
         """Проверяет, авторизован ли пользователь."""
-        # Вариант 1: Проверяем по наличию кнопки входа
-        if self.is_element_visible(self.LOGIN_BUTTON, timeout=3):
-            allure.attach("Пользователь не авторизован (видна кнопка входа)",
-                          name="Результат проверки",
-                          attachment_type=allure.attachment_type.TEXT)
+        # Вариант 1: Проверяем по наличию кнопки входа (у авторизованного ее нет - не ждем таймаут)
+        if not self.is_element_absent(self.LOGIN_BUTTON, timeout=3):
+            attach("Пользователь не авторизован (видна кнопка входа)",
+                   name="Результат проверки",
+                   attachment_type=allure.attachment_type.TEXT)
             return False  # не авторизован
 
         # Вариант 2: Проверяем по наличию имени пользователя
         if self.is_element_visible(self.USERNAME_DISPLAY, timeout=3):
-            allure.attach("Пользователь авторизован (видно имя)",
-                          name="Результат проверки",
-                          attachment_type=allure.attachment_type.TEXT)
+            attach("Пользователь авторизован (видно имя)",
+                   name="Результат проверки",
+                   attachment_type=allure.attachment_type.TEXT)
             return True  # авторизован
 
-        allure.attach("Не удалось определить статус авторизации",
-                      name="Результат проверки",
-                      attachment_type=allure.attachment_type.TEXT)
+        attach("Не удалось определить статус авторизации",
+               name="Результат проверки",
+               attachment_type=allure.attachment_type.TEXT)
         return False  # не удалось определить
 
     # ===ПОЛУЧЕНИЕ ДАННЫХ===
 
-    @allure.step("Получить имя пользователя")
+    @step("Получить имя пользователя")
     def get_username(self) -> Optional[str]:
         """Получает имя авторизованного пользователя.
         Возвращает None если пользователь не авторизован."""
@@ -77,11 +78,11 @@ class HeaderComponent(BasePage):
 
     # ===ДЕЙСТВИЯ===
 
-    @allure.step("Выйти из системы")
+    @step("Выйти из системы")
     def logout(self) -> None:
         """Выход из системы"""
         self.go_to_user_menu()
-        time.sleep(1)
+        self.wait_for_app_ready()
         self.click(self.LOGOUT_BUTTON)
         print("Вышли из системы")
-        time.sleep(2)
+        self.wait_for_app_ready()
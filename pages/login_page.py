@@ -1,10 +1,11 @@
 import json
 import os
 
-import allure
 from dotenv import load_dotenv
 from selenium.webdriver.common.by import By
 
+from utils.reporting import step
+
 from .base_page import BasePage
 
 
@@ -19,13 +20,13 @@ class LoginPage(BasePage):
         super().__init__(driver)
         self.page_url = f"{self.base_url}/accounts/login/?next=/"
 
-    @allure.step("Открыть страницу логина")
+    @step("Открыть страницу логина")
     def open_login_page(self) -> 'LoginPage':
         """Открывает страницу логина"""
         self.open_url(self.page_url)
         return self
 
-    @allure.step("Выполнить вход в систему c последующим сохранением cookies")
+    @step("Выполнить вход в систему c последующим сохранением cookies")
     def login_user(self) -> None:
         """ Выполняет вход в систему с последующим сохранением cookies """
         self.open_login_page()
@@ -46,7 +47,28 @@ class LoginPage(BasePage):
             with open('cookies.json', 'w', encoding='utf-8') as f:
                 json.dump(cookies, f)
 
-    @allure.step("Проверить, успешен ли логин")
+    @step("Войти в систему подстановкой cookies сохраненной сессии")
+    def login_with_session(self, auth_session) -> bool:
+        """
+        Подставляет cookies сессии (utils.auth_session.AuthSessionProvider) вместо ввода логина и пароля.
+        Возвращает False, если сессию получить не удалось - тогда нужен обычный login_user().
+        """
+        cookies = auth_session.get_cookies()
+        if not cookies:
+            return False
+
+        # Cookies можно добавить только для открытого домена
+        self.open_login_page()
+        for cookie in cookies:
+            self.driver.add_cookie(cookie)
+        self.open_base_page()
+
+        if self.is_login_successful():
+            return True
+        auth_session.invalidate()
+        return False
+
+    @step("Проверить, успешен ли логин")
     def is_login_successful(self) -> bool:
         """Проверяет, успешен ли логин"""
         try:
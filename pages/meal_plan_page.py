@@ -1,7 +1,8 @@
-import time
-from typing import Tuple, Any, Optional
+from datetime import date
+from typing import Dict, Tuple, Any, List, Optional
 
 import allure
+from selenium.common import StaleElementReferenceException
 from selenium.webdriver import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
@@ -9,6 +10,12 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 
 from pages import BasePage
+from pages.base_page import xpath_literal
+from pages.scripts import CALENDAR_CELLS_JS, CALENDAR_FIRST_DATE_JS
+from utils.reporting import step, attach
+
+# Сколько раз можно переключить период календаря в поисках даты
+MAX_PERIOD_STEPS = 36
 
 
 class MealPlanPage(BasePage):
@@ -23,8 +30,11 @@ class MealPlanPage(BasePage):
     CARD_EVENTS = (By.CSS_SELECTOR, ".card.cv-item")
     PLAN_FORM = (By.XPATH,
                  "//span[@class='v-btn__content' and contains(., 'Планирование')]")
-    CREATE_BUTTON = (By.CSS_SELECTOR,
-                     "div.cv-day.future.hasItems[aria-label='12']")
+
+    # Календарь (vue-simple-calendar)
+    DAY_CELL = "div.cv-day.d{date}"  # ячейка дня по дате ГГГГ-ММ-ДД
+    PREVIOUS_PERIOD_BUTTON = (By.CSS_SELECTOR, "button.previousPeriod")
+    NEXT_PERIOD_BUTTON = (By.CSS_SELECTOR, "button.nextPeriod")
 
     # Поля формы
     RECIPE_INPUT = (By.XPATH,
@@ -65,34 +75,87 @@ class MealPlanPage(BasePage):
         """ Инициализация страницы планов питания."""
         super().__init__(driver)
         self.page_url = f"{self.base_url}/mealplan"
+        # Карта дата -> ячейка видимого периода, сбрасывается при смене периода и навигации
+        self._calendar_cells: Optional[Dict[str, WebElement]] = None
+        self._calendar_dates: List[str] = []
+
+    def _on_navigation(self) -> None:
+        super()._on_navigation()
+        self._calendar_cells = None
 
     # ===НАВИГАЦИЯ===
 
-    @allure.step("Открыть страницу плана по ссылке")
+    @step("Открыть страницу плана по ссылке")
     def open_meal_plan_page(self)-> 'MealPlanPage':
         """Открыцвает по ссылке страницу плана"""
         self.open_url(self.page_url)
         return self
 
-    @allure.step("Получить локатор карточки плана по названию: '{plan_name}'")
+    @step("Получить локатор карточки плана по названию: '{plan_name}'")
     def get_plan_card_locator_by_name(self, plan_name: str) -> Tuple[str, str]:
-        """Получает локатор для всей карточки плана по названию"""
-        # Находим карточку по тексту внутри неё
+        """Получает локатор для всей карточки плана по точному названию.
+        Названия тестовых планов уникальны для воркера (utils.namespacing), поэтому
+        карточки других воркеров с похожим названием не совпадают. Кавычки в названии допустимы"""
         return (By.XPATH,
-                f"//div[contains(@class, 'cv-item') and .//span[contains(@class, 'one-line-text') and contains(text(), '{plan_name}')]]")
+                f"//div[contains(@class, 'cv-item') and .//span[contains(@class, 'one-line-text') "
+                f"and normalize-space(.)={xpath_literal(plan_name)}]]")
 
     # === РАБОТА С ДАТАМИ ===
 
-    @allure.step("Получить локатор дня по дню: {day_number}")
+    def get_day_locator(self, plan_date: date) -> Tuple[str, str]:
+        """Однозначный локатор ячейки дня по дате"""
+        return By.CSS_SELECTOR, self.DAY_CELL.format(date=plan_date.isoformat())
+
+    def get_calendar_cells(self, refresh: bool = False) -> Dict[str, WebElement]:
+        """Карта дата (ГГГГ-ММ-ДД) -> ячейка видимого периода, строится одним скриптом и кешируется"""
+        if self._calendar_cells is None or refresh:
+            self.wait_for_app_ready()
+            snapshot = self.driver.execute_script(CALENDAR_CELLS_JS)
+            self._calendar_cells = snapshot['cells']
+            self._calendar_dates = snapshot['dates']
+        return self._calendar_cells
+
+    @step("Перейти в календаре к дате {plan_date}")
+    def navigate_to_date(self, plan_date: date) -> WebElement:
+        """Переключает период календаря, пока дата не станет видимой, и возвращает ее ячейку"""
+        wanted = plan_date.isoformat()
+        for _ in range(MAX_PERIOD_STEPS):
+            cells = self.get_calendar_cells()
+            if wanted in cells:
+                return cells[wanted]
+            if not self._calendar_dates:
+                raise Exception("Календарь не отрисован: ячейки дней не найдены")
+            # Даты ISO сравниваются как строки
+            forward = wanted > self._calendar_dates[-1]
+            self._switch_period(self.NEXT_PERIOD_BUTTON if forward else self.PREVIOUS_PERIOD_BUTTON)
+        raise Exception(f"Дата {wanted} не найдена за {MAX_PERIOD_STEPS} переключений периода")
+
+    def _switch_period(self, button_locator: Tuple[str, str]) -> None:
+        """Переключает период и ждет, пока календарь отрисует новые дни"""
+        first_cell = self.driver.execute_script(CALENDAR_FIRST_DATE_JS)
+        self.click(button_locator)
+        self.wait.until(lambda driver: driver.execute_script(CALENDAR_FIRST_DATE_JS) != first_cell)
+        self._calendar_cells = None
+
+    @step("Кликнуть на день {plan_date}")
+    def click_date(self, plan_date: date) -> None:
+        """Открывает форму плана кликом по ячейке дня с указанной датой"""
+        cell = self.navigate_to_date(plan_date)
+        try:
+            cell.click()
+        except StaleElementReferenceException:
+            # Календарь перерисовался после построения карты
+            self.get_calendar_cells(refresh=True)[plan_date.isoformat()].click()
+        print(f"Кликнули на день {plan_date}")
+
+    @step("Получить локатор дня по дню: {day_number}")
     def get_day_locator_by_number(self, day_number: int) -> Tuple[str, str]:
-        """Находит и кликает на день в календаре"""
-        locator = (By.CSS_SELECTOR, f"div.cv-day[aria-label='{day_number}']")
-        time.sleep(2)  # Даем время на загрузку календаря
-        self.click(locator)
-        print(f"Кликнули на день {day_number}")
-        return locator
+        """Кликает на день текущего месяца и возвращает локатор его ячейки"""
+        plan_date = date.today().replace(day=day_number)
+        self.click_date(plan_date)
+        return self.get_day_locator(plan_date)
 
-    @allure.step("Выбрать дату с числом: {day_number}")
+    @step("Выбрать дату с числом: {day_number}")
     def click_date_by_number(self, day_number: int) -> None:
         """Кликает на кнопку даты с указанным числом"""
         # Преобразуем в строку если передали число
@@ -104,14 +167,14 @@ class MealPlanPage(BasePage):
         self.find_element(locator).click()
         print(f" Выбрана дата: {day_str}")
 
-    @allure.step("Получить форму плана питания")
+    @step("Получить форму плана питания")
     def get_plan_form(self)-> WebElement:
         """Получает форму плана питания после выбора дня"""
         return self.wait.until(EC.visibility_of_element_located(self.PLAN_FORM))
 
     # === РАБОТА С ФОРМОЙ ===
 
-    @allure.step("Ввести заголовок: {title}")
+    @step("Ввести заголовок: {title}")
     def enter_title(self, title: str) -> None:
         """Вводит заголовок в соответствующее поле"""
         if not self.is_form_opened():
@@ -120,7 +183,7 @@ class MealPlanPage(BasePage):
         self.input_text(self.TITLE_INPUT, title)
         print(f"Введен заголовок: {title}")
 
-    @allure.step("Ввести рецепт: {recipe_name}")
+    @step("Ввести рецепт: {recipe_name}")
     def enter_recipe(self, recipe_name: str) -> None:
         """Вводит название рецепта в соответствующее поле"""
         if not self.is_form_opened():
@@ -131,11 +194,11 @@ class MealPlanPage(BasePage):
 
     def choose_recipe(self, text: str) -> None:
         """Кликает на элемент выпадающего списка рецептов"""
-        locator = (By.XPATH, f"//span[text()='{text}']")
+        locator = (By.XPATH, f"//span[text()={xpath_literal(text)}]")
         self.click(locator)
         print(f"Выбран рецепт из выпадающего списка: {text}")
 
-    @allure.step("Ввести тип питания: {meal_type}")
+    @step("Ввести тип питания: {meal_type}")
     def enter_meal_type(self, meal_type: str) -> None:
         """Вводит тип плана питания в соответствующее поле и нажимает Enter"""
         if not self.is_form_opened():
@@ -149,20 +212,20 @@ class MealPlanPage(BasePage):
             # Находим элемент еще раз для нажатия Enter
             element = self.find_element(self.MEAL_TYPE_INPUT)
 
-            # Ждем немного для появления автодополнения (если есть)
-            time.sleep(1)
+            # Ждем результаты поиска автодополнения
+            self.wait_for_app_ready()
 
             # Нажимаем Enter
             element.send_keys(Keys.RETURN)
             print("Нажата клавиша Enter после ввода типа питания")
 
-            # Даем время на обработку
-            time.sleep(1)
+            # Ждем обработку выбора
+            self.wait_for_app_ready()
 
         except Exception as e:
             print(f"Ошибка при вводе типа питания: {e}")
 
-    @allure.step("Ввести количество порций: {servings}")
+    @step("Ввести количество порций: {servings}")
     def enter_servings(self, servings: str) -> None:
         """Вводит количество порций в соответствующее поле"""
         if not self.is_form_opened():
@@ -174,23 +237,41 @@ class MealPlanPage(BasePage):
             # Находим элемент еще раз для нажатия Enter
             element = self.find_element(self.SERVINGS_INPUT)
 
-            # Ждем немного
-            time.sleep(1)
-
             # Нажимаем TAB
             element.send_keys(Keys.TAB)
             print("Нажата клавиша TAB после ввода количества порции")
-
-            time.sleep(1)
+            self.wait_for_app_ready()
 
         except Exception as e:
             print(f"Ошибка при ввода количества порции: {e}")
 
+    @step("Заполнить форму плана: рецепт '{recipe_name}', заголовок '{title}'")
+    def fill_plan_form(self,
+                       recipe_name: str,
+                       title: str,
+                       meal_type: str,
+                       servings: str,
+                       add_to_shopping_list: bool = True) -> None:
+        """Заполняет форму плана одним скриптом вместо последовательного ввода в каждое поле"""
+        if not self.is_form_opened():
+            raise Exception("Форма не открыта. Нельзя заполнить план.")
+
+        errors = self.fill_form([
+            self.form_field(self.RECIPE_INPUT, recipe_name, action='select'),
+            self.form_field(self.ADD_SHOPPING_LIST_CHECKBOX, add_to_shopping_list, action='check'),
+            self.form_field(self.TITLE_INPUT, title),
+            self.form_field(self.MEAL_TYPE_INPUT, meal_type, action='select'),
+            self.form_field(self.SERVINGS_INPUT, servings),
+        ])
+        if errors:
+            raise Exception(f"Форма плана заполнена с ошибками: {errors}")
+        print(f"Форма плана заполнена: {recipe_name}, {title}, {meal_type}, {servings}")
+
     # === РАБОТА С ПЛАНАМИ ===
 
-    @allure.step("Создать план питания")
+    @step("Создать план питания")
     def create_plan_ui(self,
-                      day_number: int,
+                      plan_date: date,
                       recipe_name: str,
                       title: str,
                       meal_type: str,
@@ -198,9 +279,9 @@ class MealPlanPage(BasePage):
         """Создает план через UI и возвращает результат"""
         try:
             self.open_meal_plan_page()
-            allure.attach(
+            attach(
                 f"Создание плана с параметрами:\n"
-                f"- День: {day_number}\n"
+                f"- Дата: {plan_date}\n"
                 f"- Рецепт: {recipe_name}\n"
                 f"- Заголовок: {title}\n"
                 f"- Тип питания: {meal_type}\n"
@@ -208,33 +289,26 @@ class MealPlanPage(BasePage):
                 name="plan_parameters",
                 attachment_type=allure.attachment_type.TEXT
             )
-            self.get_day_locator_by_number(day_number)
-            time.sleep(2)
+            self.click_date(plan_date)
+            self.wait_for_app_ready()
 
             if not self.is_form_opened():
                 print("Форма не открылась автоматически. Пробуем еще раз...")
-                time.sleep(1)
-                self.get_day_locator_by_number(day_number)
-                time.sleep(1)
-
-            # Заполняем форму
-            self.enter_recipe(recipe_name)
-            self.choose_recipe(text=recipe_name)
-            self.click(self.ADD_SHOPPING_LIST_CHECKBOX)
-            time.sleep(0.5)
-            self.enter_title(title)
-            self.enter_meal_type(meal_type)
-            time.sleep(0.5)
-            self.enter_servings(servings)
+                self.click_date(plan_date)
+                self.wait_for_app_ready()
+
+            # Заполняем форму одним скриптом
+            self.fill_plan_form(recipe_name, title, meal_type, servings)
 
             # Сохраняем
             self.click(self.SAVE_BUTTON)
-            time.sleep(0.5)
+            self.wait_for_app_ready()
             self.click(self.SAVE_BUTTON_2)
+            self.wait_for_app_ready()
 
             # Проверяем результат
             if self.is_plan_visible(recipe_name, timeout=5):
-                allure.attach(
+                attach(
                     f"План '{recipe_name}' успешно создан",
                     name="plan_created",
                     attachment_type=allure.attachment_type.TEXT
@@ -242,7 +316,7 @@ class MealPlanPage(BasePage):
                 print(f"План '{recipe_name}' успешно создан и отображается")
                 return True
             else:
-                allure.attach(
+                attach(
                     f"План '{recipe_name}' не найден после создания",
                     name="plan_not_found",
                     attachment_type=allure.attachment_type.TEXT
@@ -251,7 +325,7 @@ class MealPlanPage(BasePage):
                 return False
 
         except Exception as e:
-            allure.attach(
+            attach(
                 f"Ошибка при создании плана: {str(e)}",
                 name="create_plan_error",
                 attachment_type=allure.attachment_type.TEXT
@@ -260,14 +334,14 @@ class MealPlanPage(BasePage):
             print(f"Ошибка при создании плана: {e}")
             return False
 
-    @allure.step("Удалить первый найденный план по названию '{plan_name}'")
+    @step("Удалить первый найденный план по названию '{plan_name}'")
     def delete_plan_by_name(self, plan_name: str) -> bool:
         """Удаляет план питания по названию и возвращает результат"""
         try:
             self.open_meal_plan_page()
 
             if not self.is_plan_visible(plan_name):
-                allure.attach(
+                attach(
                     f"План '{plan_name}' не найден для удаления",
                     name="plan_not_found_for_delete",
                     attachment_type=allure.attachment_type.TEXT
@@ -280,18 +354,18 @@ class MealPlanPage(BasePage):
 
             if not self.is_form_opened():
                 print("Пробуем еще раз открыть форму...")
-                time.sleep(2)
+                self.wait_for_app_ready()
                 self.click(locator)
-                time.sleep(1)
+                self.wait_for_app_ready()
 
             self.click(self.DELETE_BUTTON)
-            time.sleep(1)
+            self.wait_for_app_ready()
             print(f"Удаляем план: '{plan_name}'")
             self.click(self.DELETE_BUTTON_MODAL)
 
             # Проверяем результат
             if self.is_plan_invisibility(plan_name):
-                allure.attach(
+                attach(
                     f"План '{plan_name}' успешно удален",
                     name="plan_deleted",
                     attachment_type=allure.attachment_type.TEXT
@@ -299,7 +373,7 @@ class MealPlanPage(BasePage):
                 print(f"План: '{plan_name}' удален")
                 return True
             else:
-                allure.attach(
+                attach(
                     f"План '{plan_name}' не удален (все еще виден)",
                     name="delete_failed",
                     attachment_type=allure.attachment_type.TEXT
@@ -308,7 +382,7 @@ class MealPlanPage(BasePage):
                 return False
 
         except Exception as e:
-            allure.attach(
+            attach(
                 f"Ошибка при удалении плана '{plan_name}': {str(e)}",
                 name="delete_error",
                 attachment_type=allure.attachment_type.TEXT
@@ -316,7 +390,7 @@ class MealPlanPage(BasePage):
             print(f"Ошибка при удалении плана: {e}")
             return False
 
-    @allure.step("Удалить все планы c названием '{plan_name}'")
+    @step("Удалить все планы c названием '{plan_name}'")
     def delete_all_plans_with_name(self,
                                   plan_name: str,
                                   timeout: Optional[int] = None) -> None:
@@ -325,8 +399,10 @@ class MealPlanPage(BasePage):
         if timeout is None:
             timeout = self.timeout
         locator = self.get_plan_card_locator_by_name(plan_name)
-        plans = self.driver.find_elements(*locator)
-        for plan in plans:
+        # Количество карточек - из снимка календаря; карточка каждый раз ищется заново,
+        # потому что после удаления календарь перерисовывается
+        for _ in range(self._visible_plan_names().count(plan_name)):
+            plan = self.driver.find_element(*locator)
             plan.click()
             if not self.is_form_opened():
                 # попробуйте повторно
@@ -340,13 +416,28 @@ class MealPlanPage(BasePage):
             WebDriverWait(self.driver, timeout).until(EC.invisibility_of_element_located(locator))
             print(f"Удален план: {plan_name}")
 
+    @step("Получить все планы, видимые в календаре")
+    def get_visible_plans(self) -> List[Dict[str, Any]]:
+        """Все видимые карточки планов календаря одним вызовом: {'text': ..., 'name': ...}"""
+        self.wait_for_app_ready()
+        plans = self._snapshot_plans()
+        print(f"Планов в календаре: {len(plans)}")
+        return plans
+
+    def _snapshot_plans(self) -> List[Dict[str, Any]]:
+        plans = self.snapshot_list(self.PLAN_CARD, fields={'name': ('.one-line-text', 'text')})
+        return [plan for plan in plans if plan['visible']]
+
+    def _visible_plan_names(self) -> List[str]:
+        """Названия видимых планов одним снимком; пробелы схлопываются, как normalize-space() в локаторе"""
+        return [' '.join((plan['name'] or '').split()) for plan in self._snapshot_plans()]
 
     # ===ПРОВЕРКИ===
 
     def is_plan_visible(self, plan_name: str, timeout: Optional[int] = None) -> bool:
-        """Проверка видимости плана с настраиваемым таймаутом"""
-        plan_locator = self.get_plan_card_locator_by_name(plan_name)
-        is_visible = self.is_element_visible(plan_locator, timeout)
+        """Проверка видимости плана с настраиваемым таймаутом (по снимку карточек календаря)"""
+        wait_timeout = timeout if timeout is not None else self.timeout
+        is_visible = bool(self._poll(lambda: plan_name in self._visible_plan_names(), wait_timeout))
 
         if is_visible:
             print(f"План '{plan_name}' найден и видим")
@@ -355,15 +446,16 @@ class MealPlanPage(BasePage):
 
         return is_visible
 
-    @allure.step("Проверить невидимость плана: {plan_name}")
+    @step("Проверить невидимость плана: {plan_name}")
     def is_plan_invisibility(self,
                            plan_name: str,
                            timeout: Optional[int] = None) -> bool:
         """Проверяет, что план исчез со страницы"""
         if timeout is None:
             timeout = self.timeout
-        plan_locator = self.get_plan_card_locator_by_name(plan_name)
-        is_invisible = self.is_element_invisible(plan_locator, timeout)
+        # Пропавший план в простаивающем приложении уже не появится - не ждем таймаут
+        is_invisible = bool(self._poll(lambda: plan_name not in self._visible_plan_names(), timeout,
+                                       stop_when_idle=True))
 
         if is_invisible:
             print(f"План '{plan_name}' не видим (удален/скрыт)")
@@ -372,7 +464,7 @@ class MealPlanPage(BasePage):
 
         return is_invisible
 
-    @allure.step("Проверить, что форма открыта")
+    @step("Проверить, что форма открыта")
     def is_form_opened(self) -> bool:
         """Проверяет, открыта ли форма плана питания"""
         return self.is_element_visible(self.PLAN_FORM)
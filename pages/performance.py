@@ -0,0 +1,54 @@
+import json
+import os
+import threading
+from typing import Dict, List, Any
+from urllib.parse import urlparse
+
+
+class PerformanceLog:
+    """Метрики производительности всех навигаций page objects за сессию"""
+
+    def __init__(self) -> None:
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, timing: Dict[str, Any]) -> None:
+        """Сохраняет метрики одной навигации (результат NAVIGATION_TIMING_JS)"""
+        with self._lock:
+            self.records.append(timing)
+
+    def by_path(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Метрики, сгруппированные по пути страницы ('/mealplan', '/shopping', ...)"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for timing in self.records:
+            grouped.setdefault(urlparse(timing['url']).path, []).append(timing)
+        return grouped
+
+    def budget_violations(self, budgets: Dict[str, Dict[str, float]]) -> List[str]:
+        """
+        Проверяет бюджеты производительности для всех записанных навигаций
+
+        Args:
+            budgets: {путь страницы: {метрика: предел в мс}}, например {'/mealplan': {'tti_ms': 3000}}
+
+        Returns:
+            List[str]: описания превышений (пустой список - все в бюджете)
+        """
+        violations = []
+        for path, timings in self.by_path().items():
+            for metric, limit in budgets.get(path, {}).items():
+                for timing in timings:
+                    value = timing.get(metric)
+                    if value is not None and value > limit:
+                        violations.append(f"{path}: {metric} = {value:.0f} мс > {limit:.0f} мс")
+        return violations
+
+    def export(self, path: str) -> None:
+        """Сохраняет все метрики в JSON"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'navigations': self.records}, f, ensure_ascii=False, indent=2)
+
+
+# Общий журнал процесса pytest (у каждого воркера xdist свой)
+performance_log = PerformanceLog()
@@ -0,0 +1,433 @@
+"""JavaScript, который page objects выполняют в браузере"""
+
+# Счетчик незавершенных fetch/XHR и время последнего изменения DOM.
+# Устанавливается один раз на документ (повторный вызов ничего не делает).
+READY_INSTRUMENTATION_JS = """
+(function () {
+    if (window.__qaReady) { return; }
+    var state = window.__qaReady = {inflight: 0, lastChange: performance.now()};
+    function touch() { state.lastChange = performance.now(); }
+    function done() { state.inflight = Math.max(state.inflight - 1, 0); touch(); }
+
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            state.inflight++; touch();
+            var request = originalFetch.apply(this, arguments);
+            request.then(done, done);
+            return request;
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        state.inflight++; touch();
+        this.addEventListener('loadend', done);
+        return originalSend.apply(this, arguments);
+    };
+    // Только добавление/удаление узлов и атрибуты состояния элементов: смена классов и стилей
+    // (анимации, спиннеры) и текст (часы, таймеры) иначе бесконечно продлевали бы ожидание тишины.
+    // Корень Vue появляется позже этого скрипта, поэтому наблюдается весь документ
+    new MutationObserver(touch).observe(document, {
+        childList: true, subtree: true,
+        attributeFilter: ['disabled', 'hidden', 'open', 'aria-hidden', 'aria-expanded', 'aria-busy']
+    });
+    // Длинные задачи главного потока (> 50 мс) для метрик производительности
+    state.longTasks = [];
+    try {
+        new PerformanceObserver(function (list) {
+            list.getEntries().forEach(function (entry) {
+                state.longTasks.push({start: entry.startTime, duration: entry.duration});
+            });
+        }).observe({type: 'longtask', buffered: true});
+    } catch (e) { /* longtask не поддерживается */ }
+})();
+"""
+
+# Ждет очередной тик рендера Vue (nextTick + кадр отрисовки) и возвращает состояние
+# сети и DOM. null - инструментирование еще не установлено в этом документе.
+READY_STATE_JS = """
+var callback = arguments[arguments.length - 1];
+var finished = false;
+function report() {
+    if (finished) { return; }
+    finished = true;
+    var state = window.__qaReady;
+    callback(state ? {
+        document: document.readyState,
+        inflight: state.inflight,
+        quiet: performance.now() - state.lastChange
+    } : null);
+}
+function afterFrame() {
+    window.requestAnimationFrame(report);
+    setTimeout(report, 100);  // rAF не вызывается в фоновых вкладках
+}
+var root = document.querySelector('[data-v-app]');
+var app = root && root.__vue_app__;
+var proxy = app && app._instance && app._instance.proxy;
+if (proxy && proxy.$nextTick) {
+    proxy.$nextTick(afterFrame);
+} else {
+    afterFrame();
+}
+"""
+
+# Поиск элемента по локатору Selenium (By.CSS_SELECTOR / By.XPATH) внутри скрипта
+_LOCATE_JS = """
+function qaLocate(by, selector, root) {
+    root = root || document;
+    if (by === 'xpath') {
+        return document.evaluate(selector, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+            .singleNodeValue;
+    }
+    return root.querySelector(selector);
+}
+"""
+
+# Заполняет поля формы по порядку за один вызов execute_async_script.
+# Действия: value - ввод значения, check - отметить чекбокс, click - клик,
+# select - поиск в multiselect и выбор варианта с нужным текстом.
+FILL_FORM_JS = _LOCATE_JS + """
+var fields = arguments[0];
+var optionTimeout = arguments[1];
+var callback = arguments[arguments.length - 1];
+var errors = [];
+
+function setNativeValue(element, value) {
+    var prototype = element instanceof HTMLTextAreaElement
+        ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, value);
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+}
+
+function findOption(element, text) {
+    var container = element.closest('.multiselect') || document;
+    var options = Array.prototype.slice.call(container.querySelectorAll('.multiselect-option'));
+    var wanted = text.trim().toLowerCase();
+    var exact = options.filter(function (option) {
+        return option.textContent.trim().toLowerCase() === wanted;
+    });
+    if (exact.length) { return exact[0]; }
+    var partial = options.filter(function (option) {
+        return option.textContent.trim().toLowerCase().indexOf(wanted) !== -1;
+    });
+    return partial.length ? partial[0] : null;
+}
+
+function waitForOption(element, text, started) {
+    return new Promise(function (resolve) {
+        (function poll() {
+            var option = findOption(element, text);
+            if (option || performance.now() - started > optionTimeout) { return resolve(option); }
+            setTimeout(poll, 50);
+        })();
+    });
+}
+
+function fill(field) {
+    var element = qaLocate(field.by, field.selector);
+    if (!element) {
+        errors.push('Не найден элемент ' + field.selector);
+        return Promise.resolve();
+    }
+    element.scrollIntoView({block: 'center'});
+    if (field.action === 'click') {
+        element.click();
+    } else if (field.action === 'check') {
+        if (element.checked !== Boolean(field.value)) { element.click(); }
+    } else if (field.action === 'value') {
+        element.focus();
+        setNativeValue(element, String(field.value));
+        element.dispatchEvent(new FocusEvent('blur'));
+        element.dispatchEvent(new FocusEvent('focusout', {bubbles: true}));
+    } else if (field.action === 'select') {
+        element.focus();
+        setNativeValue(element, String(field.value));
+        return waitForOption(element, field.option || String(field.value), performance.now())
+            .then(function (option) {
+                if (option) {
+                    option.dispatchEvent(new MouseEvent('mousedown', {bubbles: true, cancelable: true}));
+                    option.click();
+                } else {
+                    element.dispatchEvent(new KeyboardEvent('keydown', {key: 'Enter', bubbles: true}));
+                }
+            });
+    }
+    return Promise.resolve();
+}
+
+fields.reduce(function (chain, field) {
+    return chain.then(function () { return fill(field); });
+}, Promise.resolve()).then(function () {
+    callback({errors: errors});
+}, function (error) {
+    errors.push(String(error));
+    callback({errors: errors});
+});
+"""
+
+# Читает текущие значения полей формы для проверки после заполнения
+READ_FORM_JS = _LOCATE_JS + """
+return arguments[0].map(function (field) {
+    var element = qaLocate(field.by, field.selector);
+    if (!element) { return null; }
+    if (field.action === 'check') { return element.checked; }
+    if (field.action === 'select') {
+        var container = element.closest('.multiselect');
+        return container ? container.textContent.trim() : element.value;
+    }
+    return element.value;
+});
+"""
+
+# Снимок списка за один вызов: текст, поля и заголовок группы каждого элемента.
+# Элементы и заголовки выбираются одним запросом, поэтому идут в порядке документа.
+SNAPSHOT_LIST_JS = _LOCATE_JS + """
+var item = arguments[0];
+var header = arguments[1];
+var fields = arguments[2] || {};
+var container = arguments[3] ? qaLocate(arguments[3].by, arguments[3].selector) : document;
+if (!container) { return []; }
+
+function queryAll(by, selector) {
+    if (by === 'xpath') {
+        var found = document.evaluate(selector, container, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var nodes = [];
+        for (var i = 0; i < found.snapshotLength; i++) { nodes.push(found.snapshotItem(i)); }
+        return nodes;
+    }
+    return Array.prototype.slice.call(container.querySelectorAll(selector));
+}
+
+function read(element, attribute) {
+    if (!element) { return null; }
+    if (attribute === 'text') { return (element.innerText || element.textContent || '').trim(); }
+    return element.getAttribute(attribute);
+}
+
+var nodes = header
+    ? queryAll('css selector', item.selector + ', ' + header)
+    : queryAll(item.by, item.selector);
+var headers = header ? new Set(queryAll('css selector', header)) : new Set();
+var group = null;
+var result = [];
+nodes.forEach(function (node) {
+    if (headers.has(node)) {
+        group = read(node, 'text');
+        return;
+    }
+    // Видимость как у WebElement.is_displayed в упрощенном виде: у элемента есть размеры
+    var entry = {text: read(node, 'text'), group: group, visible: node.getClientRects().length > 0};
+    Object.keys(fields).forEach(function (name) {
+        var spec = fields[name];
+        var target = spec[0] ? node.querySelector(spec[0]) : node;
+        entry[name] = read(target, spec[1]);
+    });
+    result.push(entry);
+});
+return result;
+"""
+
+# Карта дат видимого календаря vue-simple-calendar: у ячейки дня есть класс d<ГГГГ-ММ-ДД>.
+# Возвращает даты по порядку и ячейки по дате за один вызов.
+CALENDAR_CELLS_JS = """
+var dates = [];
+var cells = {};
+document.querySelectorAll('.cv-day').forEach(function (cell) {
+    var match = /(?:^|\\s)d(\\d{4}-\\d{2}-\\d{2})(?:\\s|$)/.exec(cell.className);
+    if (match) {
+        dates.push(match[1]);
+        cells[match[1]] = cell;
+    }
+});
+return {dates: dates, cells: cells};
+"""
+
+# Первая дата видимого периода календаря (меняется при переключении периода)
+CALENDAR_FIRST_DATE_JS = """
+var cell = document.querySelector('.cv-day');
+return cell ? cell.className : null;
+"""
+
+# Мгновенный снимок состояния сети и DOM без ожидания рендера (для быстрых проверок)
+IDLE_STATE_JS = """
+var state = window.__qaReady;
+return state ? {
+    document: document.readyState,
+    inflight: state.inflight,
+    quiet: performance.now() - state.lastChange
+} : null;
+"""
+
+# Navigation Timing, Resource Timing (сводка по типам) и длинные задачи текущего документа.
+# Время в мс от начала навигации. tti_ms - приближение: конец последней длинной задачи,
+# но не раньше DOMContentLoaded; app_ready_ms - последнее изменение DOM перед готовностью.
+NAVIGATION_TIMING_JS = """
+var navigation = performance.getEntriesByType('navigation')[0];
+if (!navigation) { return null; }
+var state = window.__qaReady || {};
+
+var paints = {};
+performance.getEntriesByType('paint').forEach(function (entry) { paints[entry.name] = entry.startTime; });
+
+var resources = {};
+performance.getEntriesByType('resource').forEach(function (entry) {
+    var type = resources[entry.initiatorType] = resources[entry.initiatorType] ||
+        {count: 0, transfer_bytes: 0, decoded_bytes: 0, max_duration_ms: 0};
+    type.count++;
+    type.transfer_bytes += entry.transferSize || 0;
+    type.decoded_bytes += entry.decodedBodySize || 0;
+    type.max_duration_ms = Math.max(type.max_duration_ms, entry.duration);
+});
+
+var longTasks = state.longTasks || [];
+var lastLongTaskEnd = 0, longTasksTotal = 0, longTasksMax = 0;
+longTasks.forEach(function (task) {
+    lastLongTaskEnd = Math.max(lastLongTaskEnd, task.start + task.duration);
+    longTasksTotal += task.duration;
+    longTasksMax = Math.max(longTasksMax, task.duration);
+});
+
+return {
+    url: location.href,
+    ttfb_ms: navigation.responseStart,
+    dom_content_loaded_ms: navigation.domContentLoadedEventEnd,
+    load_ms: navigation.loadEventEnd || null,
+    first_contentful_paint_ms: paints['first-contentful-paint'] || null,
+    tti_ms: Math.max(navigation.domContentLoadedEventEnd, lastLongTaskEnd),
+    app_ready_ms: state.lastChange || null,
+    transfer_bytes: navigation.transferSize,
+    resources: resources,
+    long_tasks: {count: longTasks.length, total_ms: longTasksTotal, max_ms: longTasksMax}
+};
+"""
+
+# Профилирование локаторов: для каждого {using: 'css'|'xpath', value, suggestion} считает совпадения,
+# видимые элементы и среднее время одного поиска (медиана и худший из rounds замеров по batch поисков).
+# suggestion - CSS-кандидат на замену XPath: проверяется, что он находит те же узлы в том же порядке.
+PROFILE_LOCATORS_JS = """
+var locators = arguments[0], rounds = arguments[1], batch = arguments[2];
+
+function find(using, value) {
+    if (using === 'xpath') {
+        var result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var nodes = [];
+        for (var i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+        return nodes;
+    }
+    return Array.prototype.slice.call(document.querySelectorAll(value));
+}
+
+function measure(using, value) {
+    var nodes;
+    try { nodes = find(using, value); } catch (e) { return {error: String(e.message || e)}; }
+    var samples = [];
+    for (var round = 0; round < rounds; round++) {
+        var start = performance.now();
+        for (var i = 0; i < batch; i++) { find(using, value); }
+        samples.push((performance.now() - start) / batch);
+    }
+    samples.sort(function (a, b) { return a - b; });
+    return {
+        nodes: nodes,
+        matches: nodes.length,
+        visible: nodes.filter(function (node) { return node.getClientRects().length > 0; }).length,
+        median_ms: samples[Math.floor(samples.length / 2)],
+        max_ms: samples[samples.length - 1]
+    };
+}
+
+function sameNodes(first, second) {
+    if (first.length !== second.length) { return false; }
+    for (var i = 0; i < first.length; i++) {
+        if (first[i] !== second[i]) { return false; }
+    }
+    return true;
+}
+
+return locators.map(function (locator) {
+    var result = measure(locator.using, locator.value);
+    if (locator.suggestion && !result.error) {
+        var css = measure('css', locator.suggestion);
+        result.suggestion = {
+            css: locator.suggestion,
+            equivalent: !css.error && sameNodes(result.nodes, css.nodes),
+            median_ms: css.median_ms === undefined ? null : css.median_ms,
+            error: css.error || null
+        };
+    }
+    delete result.nodes;
+    return result;
+});
+"""
+
+# Статический снимок отрисованной страницы для офлайн-замеров page objects: DOM без скриптов,
+# все правила CSS встроены в <style>, текущие значения полей и чекбоксов записаны в атрибуты.
+CAPTURE_SNAPSHOT_JS = """
+var clone = document.documentElement.cloneNode(true);
+
+var originals = document.querySelectorAll('input, textarea');
+var copies = clone.querySelectorAll('input, textarea');
+for (var i = 0; i < originals.length && i < copies.length; i++) {
+    if (originals[i].type === 'checkbox' || originals[i].type === 'radio') {
+        if (originals[i].checked) { copies[i].setAttribute('checked', ''); }
+        else { copies[i].removeAttribute('checked'); }
+    } else if (originals[i].tagName === 'TEXTAREA') {
+        copies[i].textContent = originals[i].value;
+    } else {
+        copies[i].setAttribute('value', originals[i].value);
+    }
+}
+
+Array.prototype.forEach.call(
+    clone.querySelectorAll('script, link[rel="stylesheet"], link[rel="modulepreload"], link[rel="preload"], style'),
+    function (node) { node.parentNode.removeChild(node); });
+
+var css = [];
+Array.prototype.forEach.call(document.styleSheets, function (sheet) {
+    try {
+        css.push(Array.prototype.map.call(sheet.cssRules, function (rule) { return rule.cssText; }).join('\\n'));
+    } catch (e) {
+        // Правила чужого домена недоступны
+    }
+});
+var style = document.createElement('style');
+style.textContent = css.join('\\n');
+clone.querySelector('head').appendChild(style);
+
+return '<!DOCTYPE html>\\n' + clone.outerHTML;
+"""
+
+# Замена компонента multiselect в статическом снимке: на ввод в поле поиска показывает
+# вариант с введенным текстом, клик по варианту записывает его как выбранное значение
+SNAPSHOT_MULTISELECT_JS = """
+document.addEventListener('input', function (event) {
+    var input = event.target;
+    var container = input.closest && input.closest('.multiselect');
+    if (!container || !input.classList.contains('multiselect-search')) { return; }
+    var list = container.querySelector('.multiselect-options');
+    if (!list) {
+        list = document.createElement('ul');
+        list.className = 'multiselect-options';
+        container.appendChild(list);
+    }
+    list.innerHTML = '';
+    if (!input.value) { return; }
+    var option = document.createElement('li');
+    option.className = 'multiselect-option';
+    option.textContent = input.value;
+    option.addEventListener('click', function () {
+        var label = container.querySelector('.multiselect-single-label');
+        if (!label) {
+            label = document.createElement('div');
+            label.className = 'multiselect-single-label';
+            container.appendChild(label);
+        }
+        label.textContent = option.textContent;
+        list.innerHTML = '';
+        input.value = '';
+    });
+    list.appendChild(option);
+}, true);
+"""
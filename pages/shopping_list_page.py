@@ -1,9 +1,10 @@
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional, Any
 
-import allure
 from selenium.webdriver.common.by import By
 
 from pages import BasePage
+from pages.base_page import xpath_literal
+from utils.reporting import step
 
 
 class ShoppingListPage(BasePage):
@@ -59,57 +60,61 @@ class ShoppingListPage(BasePage):
 
     #===НАВИГАЦИЯ===
 
-    @allure.step("Открыть по ссылке страницу плана")
+    @step("Открыть по ссылке страницу плана")
     def open_shopping_list_page(self) -> 'ShoppingListPage':
         """Открывает по ссылке страницу плана"""
         self.open_url(self.page_url)
         return self
 
-    @allure.step("Получить локатор(tuple) для элемента списка по названию продукта '{food_name}'")
+    @step("Получить локатор(tuple) для элемента списка по названию продукта '{food_name}'")
     def get_food_item_locator(self, food_name: str) -> Tuple[str, str]:
         """Локатор для элемента списка по названию продукта"""
-        return (By.XPATH, f"//div[contains(@class, 'v-list-item') and contains(., '{food_name}')]")
+        return (By.XPATH, f"//div[contains(@class, 'v-list-item') and contains(., {xpath_literal(food_name)})]")
 
-    @allure.step("Получить динамический локатор (tuple) для элемента по количеству '{amount}'")
+    @step("Получить динамический локатор (tuple) для элемента по количеству '{amount}'")
     def get_food_item_by_amount(self, amount: str, unit: str = "г") -> Tuple[str, str]:
         """Локатор для элемента по количеству"""
         return (By.XPATH, f"//div[contains(@class, 'v-list-item') and .//span[contains(., '{amount}{unit}')]]")
 
-    @allure.step("Получить динамический локатор (tuple) для получения продуктов,"
-                 " относящихся к рецепту '{recipe_name}' ")
+    @step("Получить динамический локатор (tuple) для получения продуктов,"
+          " относящихся к рецепту '{recipe_name}' ")
     def get_recipe_item_locator(self, recipe_name: str) -> Tuple[str, str]:
         """Локатор для получения информации, к какому рецепту относится продукт"""
-        return (By.XPATH, f"//small[contains(@class, 'text-disabled') and contains(text(), '{recipe_name}')]")
+        return (By.XPATH, f"//small[contains(@class, 'text-disabled') and contains(text(), {xpath_literal(recipe_name)})]")
 
-    @allure.step("Получить локатор (tuple) для кнопки галочки "
-                 "продукта '{food_name}' списка продуктов")
+    @step("Получить локатор (tuple) для кнопки галочки "
+          "продукта '{food_name}' списка продуктов")
     def get_check_button_for_food(self, food_name: str) -> Tuple[str, str]:
         """Локатор кнопки галочки для конкретного продукта"""
         return (By.XPATH,
-                f"//div[contains(@class, 'v-list-item') and contains(., '{food_name}')]//button[.//i[contains(@class, 'fa-check')]]")
+                f"//div[contains(@class, 'v-list-item') and contains(., {xpath_literal(food_name)})]//button[.//i[contains(@class, 'fa-check')]]")
 
     #===МЕТОДЫ ВОЗВРАЩАЮЩИЕ РЕЗУЛЬТАТ ДЛЯ ТЕСТОВ===
 
-    @allure.step("Получить все продукты в списке покупок с информацией о продуктах")
+    @step("Получить снимок списка покупок")
+    def get_shopping_list_snapshot(self) -> List[Dict[str, Any]]:
+        """Весь список покупок одним вызовом: текст продукта, рецепт и группа каждого элемента"""
+        self.wait_for_app_ready()
+        return self.snapshot_list(
+            self.ITEM_FULL_TEXT,
+            fields={'recipe_info': (self.RECIPE_INFO, 'text')},
+            group_header_css=self.GROUP_HEADER
+        )
+
+    @step("Получить все продукты в списке покупок с информацией о продуктах")
     def get_all_recipes(self) -> List[str]:
         """Получает список всех продуктов в списке покупок"""
-        recipes = []
-
-        # find_elements возвращает список элементов
-        recipe_elements = self.find_elements(self.ITEM_FULL_TEXT)
-        print(f"Найдено элементов : {len(recipe_elements)}")
-
-        for element in recipe_elements:
-            recipe_text = element.text.strip()
-            if recipe_text:
-                recipes.append(recipe_text)
-                print(f" Рецепт: {recipe_text}")
+        recipes = [item['text'] for item in self.get_shopping_list_snapshot() if item['text']]
+        print(f"Найдено элементов : {len(recipes)}")
+        for recipe_text in recipes:
+            print(f" Рецепт: {recipe_text}")
         return recipes
 
-    @allure.step("Получить все элементы, содержащие название рецепта: '{recipe_name}'")
+    @step("Получить все элементы, содержащие название рецепта: '{recipe_name}'")
     def get_all_the_elements_related_recipe(self, recipe_name: str) -> List[str]:
         """Возвращает все элементы, содержащие название рецепта, и логирует результат"""
         recipes = self.get_all_recipes()
+        # Первое слово названия; у копий рецептов UI-тестов это пространство имен воркера
         search_term = recipe_name.split()[0]
         related_items = [text for text in recipes if search_term in text]
         print(f"Найдено {len(related_items)} элементов, связанных с рецептом '{recipe_name}':")
@@ -117,14 +122,14 @@ class ShoppingListPage(BasePage):
             print(f"  - {item}")
         return related_items
 
-    @allure.step("Отметить продукт '{food_name}' как купленный")
+    @step("Отметить продукт '{food_name}' как купленный")
     def check_product(self, food_name: str) -> None:
         """Отмечает продукт как купленный (кликает на чекбокс)."""
         check_button = self.get_check_button_for_food(food_name)
         self.click(check_button)
         print(f"Продукт '{food_name}' отмечен как купленный")
 
-    @allure.step("Удалить продукт '{food_name}' из списка")
+    @step("Удалить продукт '{food_name}' из списка")
     def delete_product(self, food_name: str) -> bool:
         """Удаляет продукт из списка покупок."""
         try:
@@ -139,7 +144,7 @@ class ShoppingListPage(BasePage):
 
     #===ПРОВЕРКИ===
 
-    @allure.step("Проверить видимость продукта '{food_name}' в листе покупок")
+    @step("Проверить видимость продукта '{food_name}' в листе покупок")
     def is_product_visible(
             self,
             food_name: str,
@@ -155,8 +160,8 @@ class ShoppingListPage(BasePage):
             print(f" Продукт '{food_name}' не найден за {timeout} секунд")
         return visible
 
-    @allure.step("Проверить, есть ли в списке покупок продукты,"
-                 " связанные с рецептом '{recipe_name}'(частичное совпадение)")
+    @step("Проверить, есть ли в списке покупок продукты,"
+          " связанные с рецептом '{recipe_name}'(частичное совпадение)")
     def is_recipe_in_shopping_list(
             self,
             recipe_name: str,
@@ -164,7 +169,7 @@ class ShoppingListPage(BasePage):
     ) -> bool:
         """Проверяет, есть ли рецепт в списке покупок (частичное совпадение)"""
         recipes = self.get_all_recipes()
-        # Берем первое слово из названия рецепта для поиска
+        # Первое слово названия; у копий рецептов UI-тестов это пространство имен воркера
         search_term = recipe_name.split()[0]
 
         for recipe_text in recipes:
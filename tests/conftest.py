@@ -1,18 +1,25 @@
 import json
 import os
 import sys
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from selenium.webdriver.chrome.options import Options
 import allure
 import pytest
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 
 from api.client import TandoorAPIClient
+from api.mirror import TandoorMirror
+from api.search_index import RecipeSearchIndex
 from pages.login_page import LoginPage
+from pages.performance import performance_log
+from utils.auth_session import AuthSessionProvider, worker_id
+from utils.browser import BrowserPool, DeferredDriver
+from utils.browser_contexts import SharedChrome, SHARED_BROWSER_FLAG, SHARED_BROWSER_ADDRESS
+from utils.failure_artifacts import FailureArtifacts
+from utils.namespacing import unique_name, worker_plan_date
+from utils.network_control import BlockedRequestsReport
+from utils.reporting import attach, flush_attachments, discard_attachments
+from utils.step_tracer import tracer, STEP_TRACE_FLAG
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -25,18 +32,23 @@ load_dotenv()
 
 1. ПУТИ И НАСТРОЙКИ 
    ├── ROOT_DIR - корневая директория проекта
-   ├── get_test_data_path() - путь к тестовым данным
-   └── cleanup_old_screenshots() - очистка старых скриншотов
+   └── get_test_data_path() - путь к тестовым данным
 
 2. HOOKS PYTEST (перехватчики событий)
-   ├── pytest_sessionstart() - перед началом сессии
-   ├── pytest_sessionfinish() - после завершения сессии
-   └── pytest_runtest_makereport() - создание скриншотов при падении
+   ├── pytest_configure() / pytest_unconfigure() - общий Chrome для воркеров (UI_SHARED_BROWSER=1),
+   │   трассировка шагов (STEP_TRACE=1)
+   ├── pytest_runtest_protocol() - корневой интервал трассировки теста
+   ├── pytest_runtest_setup() - фоновая подготовка браузера и логина для UI-тестов
+   ├── pytest_sessionstart() - перед началом сессии (удаление старых артефактов по индексу)
+   ├── pytest_sessionfinish() - после завершения сессии (и экспорт метрик навигаций в reports/)
+   └── pytest_runtest_makereport() - артефакты падения (скриншот, DOM, консоль) в artifacts/
 
 3. ФИКСТУРЫ API 
    ├── api_client() - клиент Tandoor API
    ├── test_data() - ссылки на рецепты из recipe_links.json
-   └── recipe_data() - ГЛАВНАЯ: импорт рецептов с кешированием
+   ├── recipe_data() - ГЛАВНАЯ: импорт рецептов с кешированием
+   ├── tandoor_mirror() - локальная копия данных Tandoor (SQLite)
+   └── recipe_search_index() - поиск рецептов по названию без запросов к серверу
 
 4. ДАННЫЕ ДЛЯ ТЕСТОВ
    ├── basic_recipe_data() - простой рецепт для создания
@@ -53,15 +65,18 @@ load_dotenv()
    └── cleanup_test_data() - очистка тестовых данных
 
 6. UI ФИКСТУРЫ (браузер и авторизация)
-   ├── driver() - браузер Chrome
+   ├── browser_pool() - пул браузеров воркера
+   ├── driver() - браузер Chrome из пула (готовится в фоне, ожидание при первом обращении)
+   ├── auth_session() - сессия авторизации, общая для воркера
    ├── login() - авторизация (с проверкой)
-   ├── login_page() - страница логина
+   ├── login_page() - страница логина (подстановка cookies, при неудаче - вход через UI)
    ├── meal_plan_page() - страница планов питания
    └── shopping_list_page() - страница списка покупок
 
 7. UI ФИКСТУРЫ ДЛЯ ПЛАНОВ ПИТАНИЯ
-   ├── temporary_meal_plan_for_ui() - создание/использование плана
-   └── clean_test_plan_ui() - гарантия чистой среды для тестов
+   ├── worker_recipe_copy() - копии рецептов с уникальными для воркера названиями
+   ├── temporary_meal_plan_for_ui() - план копии рецепта, созданный через API, и открытая страница планов
+   └── clean_test_plan_ui() - очистка планов копии рецепта через API для теста создания через UI
 """
 
 # ======================== ПУТИ И НАСТРОЙКИ ========================
@@ -74,59 +89,167 @@ def get_test_data_path(filename):
     return os.path.join(ROOT_DIR, 'test_data', filename)
 
 
-def cleanup_old_screenshots(days=1):
-    """Удаляет скриншоты старше указанного количества дней"""
+# ======================== HOOKS PYTEST ========================
+_shared_chrome = None
+
+# Пул браузеров, сессия авторизации и поток фоновой подготовки браузера - одни на воркер
+_browser_pool = None
+_auth_session = None
+_boot_executor = None
+# Запросы, заблокированные в браузерах воркера (UI_BLOCK_RESOURCES=1)
+_blocked_requests = BlockedRequestsReport()
+# Скриншоты, DOM и консоль упавших тестов (пишутся в фоне в artifacts/)
+_failure_artifacts = FailureArtifacts()
+
+
+def worker_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+def worker_auth_session() -> AuthSessionProvider:
+    global _auth_session
+    if _auth_session is None:
+        _auth_session = AuthSessionProvider()
+    return _auth_session
+
+
+def boot_browser(with_login: bool):
+    """Берет браузер из пула, открывает Tandoor и при необходимости авторизуется.
+    Выполняется в фоновом потоке параллельно с API-фикстурами теста"""
+    driver = worker_browser_pool().lease(authenticated=with_login)
     try:
-        current_time = time.time()
-        for filename in os.listdir('.'):
-            if (filename.startswith(('screenshot_', 'failure_', 'fail_'))
-                    and filename.endswith('.png')):
-                file_path = os.path.join('.', filename)
-                if os.path.getctime(file_path) < current_time - (days * 24 * 60 * 60):
-                    os.remove(file_path)
-                    print(f"Удален старый скриншот: {filename}")
-    except Exception as e:
-        print(f"Ошибка при очистке скриншотов: {e}")
+        driver.get(os.getenv('BASE_URL'))
+        if with_login:
+            page = LoginPage(driver)
+            if not page.login_with_session(worker_auth_session()):
+                page.login_user()
+                worker_auth_session().save_from_driver(driver)
+    except Exception:
+        worker_browser_pool().release(driver)
+        raise
+    return driver
+
+
+@pytest.hookimpl
+def pytest_configure(config):
+    """Запускает один общий Chrome, если включен UI_SHARED_BROWSER.
+    Главный процесс передает адрес воркерам xdist через переменную окружения"""
+    global _shared_chrome
+    if os.getenv(STEP_TRACE_FLAG):
+        tracer.install()
+    if os.getenv(SHARED_BROWSER_FLAG) and not os.getenv(SHARED_BROWSER_ADDRESS):
+        _shared_chrome = SharedChrome()
+        os.environ[SHARED_BROWSER_ADDRESS] = _shared_chrome.start()
+
+
+@pytest.hookimpl
+def pytest_unconfigure(config):
+    """Останавливает общий Chrome, запущенный этим процессом"""
+    if _boot_executor:
+        _boot_executor.shutdown(wait=True)
+    if _shared_chrome:
+        _shared_chrome.stop()
+        os.environ.pop(SHARED_BROWSER_ADDRESS, None)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Корневой интервал трассировки шагов для теста (STEP_TRACE=1)"""
+    if not tracer.enabled:
+        yield
+        return
+    with tracer.test(item.nodeid):
+        yield
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Для UI-теста запускает подготовку браузера в фоне до настройки фикстур:
+    браузер и логин готовятся одновременно с API-фикстурами (поиск рецептов, создание планов)"""
+    global _boot_executor
+    if 'driver' not in item.fixturenames:
+        return
+    if _boot_executor is None:
+        _boot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser-boot')
+    item.browser_boot = _boot_executor.submit(boot_browser, 'login_page' in item.fixturenames)
+
+
+@pytest.hookimpl
+def pytest_runtest_teardown(item, nextitem):
+    """Возвращает в пул браузер, подготовленный в фоне для теста, который не дошел до фикстуры driver
+    (тест пропущен или упала фикстура, настроенная раньше)"""
+    boot = getattr(item, 'browser_boot', None)
+    if boot is None or getattr(item, 'browser_boot_claimed', False):
+        return
+    item.browser_boot = None
+    try:
+        driver = boot.result()
+    except Exception:
+        # Подготовка, завершившаяся ошибкой, уже вернула браузер в пул
+        return
+    worker_browser_pool().release(driver)
 
 
-# ======================== HOOKS PYTEST ========================
 @pytest.hookimpl
 def pytest_sessionstart(session):
-    """Удалить скриншоты старше 1 дня перед тестами"""
-    print(" Очистка старых скриншотов...")
-    cleanup_old_screenshots(days=1)
+    """Удалить артефакты падений старше 1 дня перед тестами"""
+    removed = _failure_artifacts.apply_retention(days=1)
+    if removed:
+        print(f" Удалено старых артефактов падений: {removed}")
 
 
 @pytest.hookimpl
 def pytest_sessionfinish(session, exitstatus):
-    """Удалить все скриншоты если все тесты прошли успешно"""
+    """Сохранить метрики и артефакты; при успешном прогоне хранить артефакты дольше"""
+    _failure_artifacts.flush()
+    if performance_log.records:
+        timing_path = os.path.join(ROOT_DIR, 'reports', f'navigation_timing_{worker_id()}.json')
+        performance_log.export(timing_path)
+        print(f" Метрики навигаций сохранены: {timing_path}")
+    if tracer.enabled and tracer.roots:
+        paths = tracer.export(os.path.join(ROOT_DIR, 'reports'), worker_id())
+        print(f" Трасса шагов: {paths['trace']}")
+        for step in tracer.summary(top=10):
+            print(f"   {step['total_ms']:>9.0f} мс (ожидание {step['wait_ms']:.0f}) x{step['calls']}: {step['step']}")
+    if _blocked_requests.requests:
+        summary = _blocked_requests.summary()
+        print(f" Заблокировано запросов: {summary['requests']} "
+              f"(уникальных URL: {summary['unique_urls']}): {summary['by_type']}")
     if exitstatus == 0:
-        print(" Все тесты прошли - удаляем все скриншоты")
-        cleanup_old_screenshots(days=3)
+        print(" Все тесты прошли - удаляем артефакты старше 3 дней")
+        _failure_artifacts.apply_retention(days=3)
     else:
         print(f"Упало тестов: {session.testsfailed}")
-        print(" Скриншоты сохранены для отладки")
-        cleanup_old_screenshots(days=1)
+        print(f" Артефакты падений сохранены для отладки: {_failure_artifacts.directory}")
+        _failure_artifacts.apply_retention(days=1)
 
 
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Хук для автоматического создания скриншотов при падении тестов"""
+    """Хук для сбора артефактов (скриншот, DOM, консоль) при падении UI-тестов.
+    При REPORTING_LEVEL=failures переносит отложенные вложения в отчет упавшего теста"""
     outcome = yield
     report = outcome.get_result()
 
-    if report.when == "call" and report.failed:
-        try:
-            for fixture_name in item.fixturenames:
-                if 'browser' in fixture_name:
-                    browser = item.funcargs[fixture_name]
-                    timestamp = datetime.now().strftime("%H%M%S")
-                    screenshot_name = f"fail_{item.name}_{timestamp}.png"
-                    browser.save_screenshot(screenshot_name)
-                    print(f"📸 Скриншот: {screenshot_name}")
-                    break
-        except Exception as e:
-            print(f"Ошибка скриншота: {e}")
+    if report.failed:
+        flush_attachments()
+    elif report.when == "teardown":
+        discard_attachments()
+
+    if report.when in ("setup", "call") and report.failed:
+        driver = item.funcargs.get('driver')
+        if isinstance(driver, DeferredDriver) and driver.is_ready:
+            try:
+                archive = _failure_artifacts.capture(driver.resolve(), item.nodeid)
+            except Exception as e:
+                # Браузер не запустился - снимать нечего
+                print(f"Артефакты не собраны: {e}")
+            else:
+                if archive:
+                    attach(archive, name='Артефакты падения', attachment_type=allure.attachment_type.TEXT)
 
 
 # ======================== ФИКСТУРЫ API ========================
@@ -137,6 +260,23 @@ def api_client():
     return TandoorAPIClient()
 
 
+@pytest.fixture(scope="session")
+def tandoor_mirror(api_client):
+    """Локальная копия данных Tandoor. При создании синхронизируются только рецепты
+    (по ним строится индекс названий для UI-фикстур); продукты, планы и список покупок
+    тест синхронизирует сам через mirror.sync([...]). Дальше копия читается без запросов к серверу"""
+    mirror = TandoorMirror(api_client)
+    mirror.sync(['recipe'])
+    yield mirror
+    mirror.close()
+
+
+@pytest.fixture(scope="session")
+def recipe_search_index(tandoor_mirror):
+    """Индекс рецептов по названиям, ключевым словам и продуктам"""
+    return RecipeSearchIndex.from_mirror(tandoor_mirror)
+
+
 @pytest.fixture(scope="session")
 def test_data():
     """Загрузка ссылок из файла"""
@@ -164,8 +304,8 @@ def recipe_data(api_client, test_data):
         if link in url_to_id_map:
             recipe_id = url_to_id_map[link]
             print(f"Рецепт уже импортирован ранее с ID: {recipe_id}")
-            allure.attach(json.dumps({'link': link, 'recipe_id': recipe_id}, ensure_ascii=False),
-                          name="Известный рецепт", attachment_type=allure.attachment_type.JSON)
+            attach(lambda known={'link': link, 'recipe_id': recipe_id}: json.dumps(known, ensure_ascii=False),
+                   name="Известный рецепт", attachment_type=allure.attachment_type.JSON)
             imported_recipes.append(recipe_id)
             continue
 
@@ -173,34 +313,32 @@ def recipe_data(api_client, test_data):
 
         if response_data is None:
             print(f"Пустой ответ при импорте: {link}")
-            allure.attach('Пустой ответ', name='Ошибка импорта', attachment_type=allure.attachment_type.TEXT)
+            attach('Пустой ответ', name='Ошибка импорта', attachment_type=allure.attachment_type.TEXT)
             continue
 
         status_code = response_data.get('status_code')
 
         if status_code != 200:
             print(f"Ошибка при импорте {link}, статус: {status_code}")
-            allure.attach(f'Статус: {status_code}\nОтвет: {response_data.get("content")}',
-                          name='Ошибка импорта', attachment_type=allure.attachment_type.TEXT)
+            attach(f'Статус: {status_code}\nОтвет: {response_data.get("content")}',
+                   name='Ошибка импорта', attachment_type=allure.attachment_type.TEXT)
             continue
 
         json_data = response_data.get('json')
         if json_data is None:
             print(f"Пустой JSON при импорте {link}")
-            allure.attach('Пустой JSON в ответе', name='Ошибка импорта', attachment_type=allure.attachment_type.TEXT)
+            attach('Пустой JSON в ответе', name='Ошибка импорта', attachment_type=allure.attachment_type.TEXT)
             continue
 
         if json_data.get('recipe_id') is not None:
             recipe_id = json_data['recipe_id']
             print(f"Рецепт успешно импортирован с ID: {recipe_id}")
-            allure.attach(json.dumps(json_data, ensure_ascii=False), name='Импортированный рецепт',
-                          attachment_type=allure.attachment_type.JSON)
+            # Логируем ответ в отчёте (сериализация - только если вложение попадет в отчет)
+            attach(lambda data=json_data: json.dumps(data, ensure_ascii=False), name='Импортированный рецепт',
+                   attachment_type=allure.attachment_type.JSON)
             # сохраняем в кеш
             url_to_id_map[link] = recipe_id
             imported_recipes.append(recipe_id)
-            # Логируем ответ в отчёте
-            allure.attach(str(json_data), name="Импортированный рецепт", attachment_type=allure.attachment_type.JSON)
-            print(f"Рецепт успешно импортирован с ID: {recipe_id}")
 
 
         elif 'recipe' in json_data and json_data.get('error') is False:
@@ -216,15 +354,15 @@ def recipe_data(api_client, test_data):
                     imported_recipes.append(recipe_id)
                 else:
                     print(f" Не удалось получить ID после сохранения: {saved_response}")
-                    allure.attach(str(saved_response), name='Ошибка сохранения',
-                                  attachment_type=allure.attachment_type.JSON)
+                    attach(str(saved_response), name='Ошибка сохранения',
+                           attachment_type=allure.attachment_type.JSON)
             else:
                 print(f" Ошибка при сохранении рецепта: {saved_response}")
-            allure.attach(str(saved_response), name='Ошибка сохранения', attachment_type=allure.attachment_type.JSON)
+            attach(str(saved_response), name='Ошибка сохранения', attachment_type=allure.attachment_type.JSON)
         else:
             error_msg = json_data.get('msg', 'Неизвестная ошибка импорта')
             print(f" Ошибка импорта {link}: {error_msg}")
-            allure.attach(error_msg, name="Ошибка импорта", attachment_type=allure.attachment_type.TEXT)
+            attach(error_msg, name="Ошибка импорта", attachment_type=allure.attachment_type.TEXT)
 
 
     with open(cache_file, 'w', encoding='utf-8') as f:
@@ -426,40 +564,42 @@ def cleanup_test_data(api_client):
 
 # ======================== ФИКСТУРЫ UI ========================
 
+@pytest.fixture(scope="session")
+def browser_pool():
+    """Пул браузеров воркера: один запуск Chrome на воркер вместо запуска на каждый тест"""
+    pool = worker_browser_pool()
+    yield pool
+    pool.close()
+
+
 @pytest.fixture(scope="function")
-def driver():
-    """Фикстура браузера с автоматическим скачиванием драйвера"""
-
-    # Создаем опции для Chrome
-    chrome_options = Options()
-
-    # Если запущено в CI, используем headless режим
-    if os.getenv('CI') or os.getenv('GITLAB_CI'):
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-
-        # ВАЖНО: Если используем Selenium контейнер, не устанавливаем ChromeDriver
-        if os.getenv('SELENIUM_REMOTE_URL'):
-            # Используем Remote WebDriver для контейнера
-            driver = webdriver.Remote(
-                command_executor=os.getenv('SELENIUM_REMOTE_URL'),
-                options=chrome_options
-            )
-        else:
-            # Используем локальный ChromeDriver (ваш текущий подход)
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+def driver(request, browser_pool):
+    """Браузер из пула, подготовленный в фоне (pytest_runtest_setup).
+    Тест ждет браузер только при первом обращении к нему; после теста браузер возвращается в пул"""
+    boot = getattr(request.node, 'browser_boot', None)
+    if boot is not None:
+        # Браузер вернет в пул эта фикстура, а не pytest_runtest_teardown
+        request.node.browser_boot_claimed = True
     else:
-        # Локальная разработка
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        # Фикстура запрошена без хука (getfixturevalue) - готовим браузер сразу
+        boot = Future()
+        try:
+            boot.set_result(boot_browser(with_login=False))
+        except Exception as e:
+            boot.set_exception(e)
+    deferred = DeferredDriver(boot)
 
-    driver.implicitly_wait(10)
-    driver.get(os.getenv('BASE_URL'))
+    yield deferred
+
+    # Подготовка, завершившаяся ошибкой, уже вернула браузер в пул
+    if boot.exception() is None:
+        blocked = _blocked_requests.collect(deferred.resolve())
+        if blocked:
+            attach(lambda: json.dumps(_blocked_requests.summary(blocked),
+                                      ensure_ascii=False, indent=2),
+                   name='Заблокированные запросы', attachment_type=allure.attachment_type.JSON)
+        browser_pool.release(deferred.resolve())
 
-    yield driver
-    driver.quit()
 
 @pytest.fixture
 def login(browser) -> LoginPage:
@@ -471,11 +611,22 @@ def login(browser) -> LoginPage:
     return login_page
 
 
+@pytest.fixture(scope="session")
+def auth_session():
+    """Сессия авторизации: логин один раз на воркер, дальше cookies подставляются в браузер"""
+    return worker_auth_session()
+
+
 @pytest.fixture
-def login_page(driver):
-    """Автоматический логин для UI"""
+def login_page(request, driver, auth_session):
+    """Автоматический логин для UI: подстановка cookies сессии, при неудаче - вход через форму.
+    Если браузер готовится в фоне, логин выполняется там же и фикстура не ждет браузер"""
     page = LoginPage(driver)
-    page.login_user()
+    if getattr(request.node, 'browser_boot', None) is not None:
+        return page
+    if not page.login_with_session(auth_session):
+        page.login_user()
+        auth_session.save_from_driver(driver)
     return page
 
 
@@ -494,58 +645,77 @@ def shopping_list_page(login_page):
 
 
 # ======================== ФИКСТУРЫ UI ДЛЯ ПЛАНОВ ========================
+@pytest.fixture(scope="session")
+def worker_recipe_copy(api_client, recipe_search_index):
+    """Копии рецептов с уникальными для воркера названиями (utils.namespacing.unique_name).
+    Планы и продукты списка покупок разных воркеров не пересекаются, поэтому UI-тесты
+    выполняются параллельно без общих блокировок. Копии удаляются в конце сессии воркера"""
+    copies = {}
+
+    def recipe_copy(base_name: str):
+        """Возвращает (ID копии, уникальное название) для рецепта base_name"""
+        if base_name not in copies:
+            name = unique_name(base_name)
+            response = api_client.copy_recipe(recipe_search_index.resolve_one(base_name), name)
+            assert response['status_code'] == 201, \
+                f"Не удалось скопировать рецепт '{base_name}': {response.get('status_code')}"
+            copies[base_name] = (response['json']['id'], name)
+            print(f" Создана копия рецепта '{base_name}': '{name}'")
+        return copies[base_name]
+
+    yield recipe_copy
+
+    for recipe_id, name in copies.values():
+        api_client.delete_meal_plans_for_recipe(recipe_id)
+        if api_client.delete_recipe(recipe_id):
+            print(f" Копия рецепта '{name}' удалена")
+
+
 @pytest.fixture
-def temporary_meal_plan_for_ui(meal_plan_page):
-    """Проверяет существование плана, при отсутствии создает новый"""
+def temporary_meal_plan_for_ui(api_client, worker_recipe_copy, meal_plan_page):
+    """Создает план копии рецепта через API (с добавлением продуктов в список покупок)
+    на день воркера и открывает страницу планов. После теста удаляет оставшиеся планы копии через API"""
+    recipe_id, recipe_and_plan_name = worker_recipe_copy('Карамельный пудинг')
+
+    # Планы копии мог оставить предыдущий тест этого воркера
+    api_client.delete_meal_plans_for_recipe(recipe_id)
+
+    print(f"Создаю план '{recipe_and_plan_name}' через API с добавлением продуктов в корзину")
+    response = api_client.create_meal_plan_for_recipe(
+        recipe_id=recipe_id,
+        plan_date=worker_plan_date(),
+        title="Еда на завтра",
+        meal_type='Завтрак',
+        servings=2,
+        add_to_shopping_list=True
+    )
+    assert response['status_code'] == 201, f"Не удалось создать план: {response.get('status_code')}"
     meal_plan_page.open_meal_plan_page()
-    recipe_and_plan_name = 'Карамельный пудинг'
-    tomorrow = datetime.today() + timedelta(days=1)
-
-    if meal_plan_page.is_plan_visible(recipe_and_plan_name, timeout=5):
-        print(f"План '{recipe_and_plan_name}' уже есть, используем его")
-    else:
-        print(f"Создаю новый план'{recipe_and_plan_name} с добавлением продуктов в корзину при создании'")
-        success_create = meal_plan_page.create_plan_ui(
-            day_number=tomorrow.day,
-            recipe_name=recipe_and_plan_name,
-            title="Еда на завтра",
-            meal_type='Завтрак',
-            servings='2'
-        )
-        assert success_create, "Не удалось создать план"
 
     yield recipe_and_plan_name
 
-    if meal_plan_page.is_plan_visible(recipe_and_plan_name, timeout=3):
-        meal_plan_page.delete_plan_by_name(recipe_and_plan_name)
-        assert not meal_plan_page.is_plan_visible(recipe_and_plan_name, timeout=5), \
-            f"План '{recipe_and_plan_name}' не удален фикстурой после теста"
+    deleted = api_client.delete_meal_plans_for_recipe(recipe_id)
+    if deleted:
+        print(f"План '{recipe_and_plan_name}' удален фикстурой после теста")
     else:
         print(f"План '{recipe_and_plan_name}' уже удален тестом")
 
 
 @pytest.fixture
-def clean_test_plan_ui(meal_plan_page):
-    """Фикстура для тестов планов питания с гарантией чистой среды"""
-    plan_name = 'Крем Рафаэлло'
-    meal_plan_page.open_meal_plan_page()
+def clean_test_plan_ui(api_client, worker_recipe_copy, meal_plan_page):
+    """Фикстура для тестов создания плана через UI: возвращает уникальное название копии рецепта,
+    ее планы удаляются через API до и после теста"""
+    recipe_id, plan_name = worker_recipe_copy('Крем Рафаэлло')
 
-    if meal_plan_page.is_plan_visible(plan_name, timeout=2):
-        print(f" Удаляю старый план '{plan_name}' перед тестом")
-        meal_plan_page.delete_plan_by_name(plan_name)
+    if api_client.delete_meal_plans_for_recipe(recipe_id):
+        print(f" Удален старый план '{plan_name}' перед тестом")
+    meal_plan_page.open_meal_plan_page()
 
     yield plan_name
 
     print(f" Очищаю план '{plan_name}' после теста")
-    time.sleep(1)
-    meal_plan_page.open_meal_plan_page()
-
     try:
-        if meal_plan_page.is_plan_visible(plan_name, timeout=1):
-            deleted = meal_plan_page.delete_plan_by_name(plan_name)
-            if deleted:
-                print(f" План '{plan_name}' удален после теста")
-            else:
-                print(f" Не удалось удалить план '{plan_name}'")
+        if api_client.delete_meal_plans_for_recipe(recipe_id):
+            print(f" План '{plan_name}' удален после теста")
     except Exception as e:
         print(f" Ошибка при очистке: {e}. Продолжаем...")
@@ -1,10 +1,14 @@
+import json
 from unittest.mock import Mock
 
 import allure
 import pytest
 
 from api.client import TandoorAPIClient
+from api.dedupe import RecipeDeduplicator
+from api.search_index import RecipeSearchIndex
 from tests.conftest import api_client, temporary_recipe
+from utils.reporting import attach
 
 
 @pytest.mark.api
@@ -55,6 +59,58 @@ def test_get_recipes(api_client):
     assert len(recipes_list) > 0, "Список рецептов пусой"
 
 
+@pytest.mark.api
+@allure.title("Синхронизация локальной копии рецептов")
+@allure.severity(allure.severity_level.NORMAL)
+def test_mirror_sync(api_client, tandoor_mirror, temporary_recipe):
+    """
+    Проверяет, что повторная синхронизация подхватывает созданный и измененный рецепт,
+    а удаленный рецепт убирает полная сверка. Сравниваются только свои рецепты:
+    другие воркеры меняют список параллельно
+    """
+    recipe_id = temporary_recipe['id']
+    new_name = f"{temporary_recipe['name']} (изменен)"
+    response = api_client.update_recipe(recipe_id, {'name': new_name})
+    assert response['status_code'] == 200, f"Ожидался код 200, получен {response.get('status_code')}"
+
+    tandoor_mirror.sync(['recipe'])
+    mirrored = tandoor_mirror.get('recipe', recipe_id)
+    assert mirrored is not None, "Созданный рецепт не попал в локальную копию"
+    assert mirrored['name'] == new_name, "Изменение рецепта не попало в локальную копию"
+
+    # Дельта по updated_at удалений не видит: рецепт остается в копии до полной сверки
+    assert api_client.delete_recipe(recipe_id), "Не удалось удалить рецепт"
+    tandoor_mirror.sync(['recipe'])
+    assert tandoor_mirror.get('recipe', recipe_id) is not None, "Дельта-синхронизация выполнила полную сверку"
+    tandoor_mirror.sync(['recipe'], force_full=True)
+    assert tandoor_mirror.get('recipe', recipe_id) is None, "Удаленный рецепт остался после полной сверки"
+
+
+@pytest.mark.unit
+@allure.title("Поиск рецептов по локальному индексу")
+@allure.severity(allure.severity_level.NORMAL)
+def test_recipe_search_index():
+    """Проверяет точный, пословный и префиксный поиск с нормализацией регистра, ё и диакритики"""
+    index = RecipeSearchIndex()
+    index.add_recipes([
+        {'id': 1, 'name': 'Карамельный пудинг', 'keywords': [{'name': 'Десерт'}]},
+        {'id': 2, 'name': 'Крем Рафаэлло',
+         'steps': [{'ingredients': [{'food': {'name': 'Сливки'}}]}]},
+        {'id': 3, 'name': 'Crème brûlée с ёжевикой'},
+    ])
+
+    assert index.resolve('карамельный  ПУДИНГ') == [1], "Точное название не найдено"
+    assert index.search('карам') == [1], "Префиксный поиск не сработал"
+    assert index.search('десерт', prefix=False) == [1], "Поиск по ключевому слову не сработал"
+    assert index.search('сливки') == [2], "Поиск по продукту ингредиента не сработал"
+    assert index.search('creme brulee ежевикой') == [3], "Нормализация ё и диакритики не сработала"
+
+    index.add_recipe({'id': 2, 'name': 'Крем Рафаэлло'})
+    assert index.search('сливки') == [], "Обновление рецепта не убрало старые слова"
+    index.remove_recipe(1)
+    assert index.resolve('Карамельный пудинг') == [], "Удаленный рецепт остался в индексе"
+
+
 @pytest.mark.api
 @allure.title("Импорт рецептов из внешних источников")
 @allure.severity(allure.severity_level.NORMAL)
@@ -116,62 +172,74 @@ def test_delete_recipe_by_id(api_client, temporary_recipe):
     print(f"Рецепт ID:{recipe_id} успешно удален (статус ответа: {status_code})")
 
 
-@pytest.mark.api
-@allure.title("Поиск и удаление дубликатов рецептов")
+@pytest.mark.unit
+@allure.title("Поиск дубликатов рецептов по названию и ингредиентам")
 @allure.severity(allure.severity_level.NORMAL)
-def test_remove_dublicate_recipes(api_client):
-    """Удаляет рубликаты рецептов"""
-    print("Ищем повторяющиея рецепты")
-
-    # 1. Получаем все рецепты из системы
-    response = api_client.get_recipes()
-    assert response['status_code'] == 200, f"Ожидался код 200, получен {response.get('status_code')}"
-    data_json = response['json']
-    assert 'results' in data_json, "Не получены данные 'results'"
-
-    recipes = data_json['results']
-    print(f"Всего найдено рецептов: {len(recipes)}")
-
-    # 2. Ищем с одинаковыми названиями
-
-    recipe_names = {}
-    dublicates = []
-
-    for recipe in recipes:
-        name = recipe['name']
-        recipe_id = recipe['id']
-
-        if name in recipe_names:
-            # Нашли дубликат
-            dublicates.append(recipe)
-            print(f"Найден дубликат: {name}, ID: {recipe_id}")
-        else:
-            # Первый раз видим название
-            recipe_names[name] = recipe_id
-
-    # 3. Если дубликатов нет -закачиваем
-    if not dublicates:
-        print("Дубликатов не найдено")
-        return
-
-    print(f"Найдено: {len(dublicates)} дубликатов для удаления")
-
-    # 4. Удаляем дубликаты
-    deleted_count = 0
-    for recipe in dublicates:
-        print(f" Удаляем: '{recipe['name']}'(ID: {recipe['id']})")
-
-    # 5. Пытаемся удалить рецепт
-    success = api_client.delete_recipe(recipe['id'])
-    if success:
-        deleted_count += 1
-        print(f"Успешно удален: {deleted_count}")
-
-    # 6. Результаты
-    print(f"Готово!Удалено: {deleted_count} дубликатов")
-    print(f" Осталось {len(recipes) - deleted_count} уникальных рецептов")
-
-
+def test_find_duplicates():
+    """Проверяет, что в кластер попадают только рецепты с похожими названиями и общими ингредиентами"""
+    potato = [{'ingredients': [{'food': {'name': 'Картофель'}}, {'food': {'name': 'Сливочное масло'}}]}]
+    report = RecipeDeduplicator().find_duplicates([
+        {'id': 1, 'name': 'Картофельное пюре', 'steps': potato},
+        {'id': 2, 'name': 'Картофельное пюре', 'steps': potato + [{'ingredients': [{'food': {'name': 'Молоко'}}]}]},
+        {'id': 3, 'name': 'картофельное  ПЮРЕ', 'steps': potato},
+        {'id': 4, 'name': 'Картофельное пюре 2024-05-01_10-00-00',
+         'steps': [{'ingredients': [{'food': {'name': 'Тыква'}}]}]},
+        {'id': 5, 'name': 'Картофельное пюре 2024-05-01_10-00-01'},
+        {'id': 6, 'name': 'Крем Рафаэлло', 'steps': potato},
+    ])
+
+    assert report['scanned'] == 6, f"Просмотрены не все рецепты: {report['scanned']}"
+    assert len(report['clusters']) == 1, f"Ожидался один кластер, получено: {report['clusters']}"
+    cluster = report['clusters'][0]
+    assert cluster['survivor']['id'] == 2, "Оставлен не рецепт с наибольшим числом ингредиентов"
+    assert {recipe['id'] for recipe in cluster['duplicates']} == {1, 3}, \
+        f"Неверный состав кластера: {cluster['duplicates']}"
+    assert report['to_delete'] == [1, 3], "Рецепты с другими ингредиентами или без них попали в удаление"
+
+    # Одинаковые сигнатуры - одна корзина LSH на все рецепты; дубликаты 11 и 13 в ней не соседние
+    # и не первые, совпадение решают только ингредиенты
+    deduplicator = RecipeDeduplicator()
+    deduplicator.signature = lambda features: (0,) * deduplicator.num_perm
+    report = deduplicator.find_duplicates([
+        {'id': recipe_id, 'name': 'Борщ', 'steps': [{'ingredients': [{'food': {'name': food}}]}]}
+        for recipe_id, food in ((10, 'Свекла'), (11, 'Капуста'), (12, 'Фасоль'), (13, 'Капуста'))
+    ])
+    assert report['to_delete'] == [13], f"Несоседние дубликаты в корзине не найдены: {report}"
 
 
+@pytest.mark.api
+@allure.title("Поиск и удаление дубликатов рецептов")
+@allure.severity(allure.severity_level.NORMAL)
+def test_remove_dublicate_recipes(api_client, temporary_recipe):
+    """
+    Строит отчет о дубликатах на сервере (только dry-run, без удаления),
+    затем удаляет дубликат рецепта, созданного самим тестом
+    """
+    deduplicator = RecipeDeduplicator()
+
+    # 1. Отчет по всем рецептам сервера: рецепты других тестов и пользователей не удаляем
+    server_report = deduplicator.find_duplicates_on_server(api_client)
+    attach(lambda: json.dumps(server_report, ensure_ascii=False, indent=2), name="Отчет о дубликатах",
+           attachment_type=allure.attachment_type.JSON)
+    for cluster in server_report['clusters']:
+        assert cluster['survivor']['id'] not in server_report['to_delete'], "Оставляемый рецепт попал в удаление"
+
+    # 2. Создаем копию временного рецепта с тем же названием и ингредиентами
+    copy = api_client.copy_recipe(temporary_recipe['id'], temporary_recipe['name'])
+    assert copy['status_code'] == 201, f"Не удалось создать дубликат: {copy}"
+    copy_id = copy['json']['id']
 
+    try:
+        # 3. Отчет только по своим рецептам: копия - дубликат, исходный рецепт остается
+        cards = [api_client.get_recipe_by_id(recipe_id)['json'] for recipe_id in (temporary_recipe['id'], copy_id)]
+        report = deduplicator.find_duplicates(cards)
+        assert report['to_delete'] == [copy_id], f"Дубликат не найден: {report}"
+
+        deleted, failed = deduplicator.apply(api_client, report)
+        assert not failed, f"Не удалось удалить дубликаты: {sorted(failed)}"
+
+        # 4. Проверяем, что дубликат удален, а исходный рецепт на месте
+        assert not api_client.verify_ids_deleted('recipe', deleted), "Дубликат найден после удаления"
+        assert not api_client.verify_ids_exist('recipe', [temporary_recipe['id']]), "Удален исходный рецепт"
+    finally:
+        api_client.delete_recipe(copy_id)
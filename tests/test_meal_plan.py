@@ -1,6 +1,10 @@
+from datetime import date, timedelta
+from unittest.mock import Mock
+
 import allure
 import pytest
 
+from api.client import TandoorAPIClient
 from tests.conftest import api_client
 
 
@@ -74,8 +78,53 @@ def test_delete_meal_plan(api_client, temporary_meal_plan):
     response = api_client.delete_meal_plan(meal_plan_id)
     assert response, "Не удалось удалить план"
 
-    all_meal_plans = api_client.get_all_meal_plans()
-    assert meal_plan_id not in all_meal_plans, "План найден после удаления"
+    still_existing = api_client.verify_ids_deleted('meal-plan', [meal_plan_id])
+    assert not still_existing, "План найден после удаления"
+
+
+@pytest.mark.unit
+@allure.title("Проверка удаления плана при ошибках API")
+@allure.severity(allure.severity_level.NORMAL)
+def test_verify_plan_deleted_on_api_errors(monkeypatch):
+    """verify_plan_deleted возвращает False, а не падает, если удаление не удалось проверить"""
+    monkeypatch.setenv('TANDOOR_TOKEN', 'offline')
+    client = TandoorAPIClient()
+
+    client._make_request = Mock(return_value={'status_code': 404})
+    assert client.verify_plan_deleted(1), "Ответ 404 не засчитан как удаление"
+
+    client._make_request = Mock(return_value={'status_code': 200})
+    assert not client.verify_plan_deleted(1), "Существующий план засчитан как удаленный"
+
+    for response in ({'status_code': None, 'error': 'timeout'}, {'status_code': 500}):
+        client._make_request = Mock(return_value=response)
+        assert client.verify_plan_deleted(1) is False, f"Ошибка API не обработана: {response}"
+
+
+@pytest.mark.api
+@allure.title("Массовое создание планов питания на диапазон дат")
+@allure.severity(allure.severity_level.NORMAL)
+def test_schedule_meal_plans(api_client, temporary_recipe):
+    """Создает планы на три дня для двух типов питания и проверяет группировку по датам"""
+    start = date.today() + timedelta(days=1)
+    end = start + timedelta(days=2)
+    created = api_client.schedule_meal_plans(
+        recipes=[temporary_recipe],
+        start_date=start,
+        end_date=end,
+        meal_types=['Завтрак', 'Обед'],
+        servings=lambda day, meal_type: 2 if meal_type == 'Обед' else 1
+    )
+    try:
+        assert len(created) == 3, f"Ожидались планы на 3 дня, получено {list(created)}"
+        for plan_date, plan_ids in created.items():
+            assert len(plan_ids) == 2, f"На {plan_date} ожидалось 2 плана, получено {len(plan_ids)}"
+        all_ids = {plan_id for plan_ids in created.values() for plan_id in plan_ids}
+        assert not api_client.verify_ids_exist('meal-plan', all_ids), "Не все созданные планы найдены"
+    finally:
+        for plan_ids in created.values():
+            for plan_id in plan_ids:
+                api_client.delete_meal_plan(plan_id)
 
 
 # ===ТЕСТЫ ДЛЯ СПИСКА ПОКУПОК===
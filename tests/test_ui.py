@@ -1,9 +1,16 @@
-from datetime import datetime
+import os
+import re
+from unittest.mock import Mock
 
 import allure
 import pytest
 
+from pages.meal_plan_page import MealPlanPage
 from tests.conftest import temporary_meal_plan_for_ui, clean_test_plan_ui
+from utils.namespacing import worker_plan_date
+
+# Бюджет времени до интерактивности страницы планов, мс (переопределяется для медленных стендов)
+MEAL_PLAN_TTI_BUDGET_MS = float(os.getenv('UI_BUDGET_MEALPLAN_TTI_MS', 5000))
 
 
 #===ТЕСТИРОВАНИЕ UI ПЛАНА ПИТАНИЯ===
@@ -15,14 +22,14 @@ def test_create_plan_with_fixture(meal_plan_page, clean_test_plan_ui):
     """Проверка корректности создания плана через UI
     Фикстура очищает данные до и после теста"""
 
-    # получает название плана "Крем Рафаэлло" из фикстуры.
+    # получает уникальное для воркера название копии рецепта "Крем Рафаэлло" из фикстуры.
     # Чтобы не дублировать планы recipe_name должен быть равен plan_name
 
     plan_name = clean_test_plan_ui
 
     created = meal_plan_page.create_plan_ui(
-        day_number=datetime.today().day,
-        recipe_name="Крем Рафаэлло",
+        plan_date=worker_plan_date(),
+        recipe_name=plan_name,
         title='Завтрак на понедельник',
         meal_type='Завтрак',
         servings='3'
@@ -96,3 +103,38 @@ def test_product_added_in_shopping_list(meal_plan_page, shopping_list_page, temp
         assert len(related_items) == 0, f"Нет элементов, связанных с рецептом '{plan_name}'"
     else:
         f"План '{plan_name}' не удален в тесте. Нельзя проверить удаление продуктов из списка покупок "
+
+
+#===ПРОИЗВОДИТЕЛЬНОСТЬ UI===
+
+@pytest.mark.ui
+@allure.title("Бюджет производительности страницы планов питания")
+@allure.severity(allure.severity_level.MINOR)
+def test_meal_plan_page_performance_budget(meal_plan_page):
+    """Страница планов становится интерактивной в пределах бюджета"""
+    meal_plan_page.open_meal_plan_page()
+    meal_plan_page.assert_performance_budget('tti_ms', MEAL_PLAN_TTI_BUDGET_MS)
+
+
+# Строковый литерал XPath 1.0: текст в одинарных или двойных кавычках либо concat() из таких литералов
+_XPATH_STRING = r"'[^']*'|\"[^\"]*\""
+
+
+@pytest.mark.unit
+@allure.title("Локатор карточки плана для названий с кавычками")
+@allure.severity(allure.severity_level.NORMAL)
+def test_plan_card_locator_with_quotes():
+    """Название плана с кавычками дает корректный литерал XPath, равный исходному названию"""
+    page = MealPlanPage(Mock())
+    for plan_name in ("gw0-1a2b3c Крем Рафаэлло", "Пирог 'Наполеон'", 'Салат "Оливье"',
+                      'Торт \'Птичье\' "молоко"'):
+        _, xpath = page.get_plan_card_locator_by_name(plan_name)
+        literal = re.search(r"normalize-space\(\.\)=(.*)\]\]$", xpath).group(1)
+        if literal.startswith('concat('):
+            parts = re.fullmatch(rf"concat\(((?:{_XPATH_STRING})(?:, (?:{_XPATH_STRING}))+)\)", literal)
+            assert parts, f"Некорректный concat() в локаторе: {xpath}"
+            value = ''.join(part[1:-1] for part in re.findall(_XPATH_STRING, parts.group(1)))
+        else:
+            assert re.fullmatch(_XPATH_STRING, literal), f"Некорректный литерал в локаторе: {xpath}"
+            value = literal[1:-1]
+        assert value == plan_name, f"Литерал '{literal}' не совпадает с названием '{plan_name}'"
@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import time
+from typing import Dict, Optional, Any, List
+
+import requests
+from dotenv import load_dotenv
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cookies, достаточные для авторизованной сессии Django
+AUTH_COOKIE_NAMES = ('sessionid', 'csrftoken')
+
+# Как долго считать сессию проверенной без повторного запроса к серверу, секунды
+DEFAULT_VALIDATION_TTL = 300
+
+_CSRF_INPUT_RE = re.compile(r'name=["\']csrfmiddlewaretoken["\']\s+value=["\']([^"\']+)["\']')
+
+
+def worker_id() -> str:
+    """ID воркера pytest-xdist ('gw0', 'gw1', ...) или 'master' без xdist"""
+    return os.getenv('PYTEST_XDIST_WORKER', 'master')
+
+
+class AuthSessionProvider:
+    """
+    Авторизованная сессия Tandoor, общая для всех UI-тестов воркера.
+    Логин выполняется один раз (по HTTP или через UI), дальше в каждый
+    новый браузер подставляются cookies sessionid/csrftoken.
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 cookies_path: Optional[str] = None,
+                 validation_ttl: float = DEFAULT_VALIDATION_TTL) -> None:
+        """
+        Args:
+            base_url: адрес Tandoor (по умолчанию BASE_URL из окружения)
+            cookies_path: файл для сохранения cookies между запусками (свой у каждого воркера)
+            validation_ttl: период, в течение которого повторная проверка сессии не нужна
+        """
+        load_dotenv()
+        self.base_url = (base_url or os.getenv('BASE_URL', 'http://localhost:8080')).rstrip('/')
+        self.cookies_path = cookies_path or os.path.join(ROOT_DIR, '.cache', f'session_{worker_id()}.json')
+        self.validation_ttl = validation_ttl
+        self._cookies: Optional[List[Dict[str, Any]]] = None
+        self._validated_at = 0.0
+
+    # === ПОЛУЧЕНИЕ СЕССИИ ===
+
+    def get_cookies(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Возвращает действующие cookies авторизации.
+        Порядок: кеш в памяти -> файл -> логин по HTTP. None - получить сессию не удалось.
+        """
+        if self._cookies and time.time() - self._validated_at < self.validation_ttl:
+            return self._cookies
+
+        for candidate in (self._cookies, self._load()):
+            if candidate and self.is_valid(candidate):
+                self._remember(candidate)
+                return candidate
+
+        cookies = self.login_over_http()
+        if cookies:
+            self._remember(cookies)
+            self._save(cookies)
+        return cookies
+
+    def login_over_http(self) -> Optional[List[Dict[str, Any]]]:
+        """Логин через форму Django по HTTP, без браузера"""
+        username = os.getenv('TANDOOR_USERNAME')
+        password = os.getenv('TANDOOR_PASSWORD')
+        if not username or not password:
+            return None
+
+        login_url = f"{self.base_url}/accounts/login/"
+        session = requests.Session()
+        try:
+            page = session.get(login_url, timeout=30)
+            match = _CSRF_INPUT_RE.search(page.text)
+            csrf_token = match.group(1) if match else session.cookies.get('csrftoken')
+            session.post(login_url,
+                         data={'login': username, 'password': password, 'csrfmiddlewaretoken': csrf_token},
+                         headers={'Referer': login_url},
+                         timeout=30)
+        except requests.exceptions.RequestException as e:
+            print(f"[AUTH] Ошибка логина по HTTP: {e}")
+            return None
+
+        cookies = [{'name': cookie.name, 'value': cookie.value, 'path': cookie.path or '/'}
+                   for cookie in session.cookies if cookie.name in AUTH_COOKIE_NAMES]
+        if not any(cookie['name'] == 'sessionid' for cookie in cookies):
+            print("[AUTH] Логин по HTTP не вернул sessionid")
+            return None
+        print("[AUTH] Сессия получена логином по HTTP")
+        return cookies
+
+    def is_valid(self, cookies: List[Dict[str, Any]]) -> bool:
+        """Быстрая проверка сессии одним запросом к API"""
+        jar = {cookie['name']: cookie['value'] for cookie in cookies}
+        try:
+            response = requests.get(f"{self.base_url}/api/user/", cookies=jar,
+                                    allow_redirects=False, timeout=10)
+        except requests.exceptions.RequestException:
+            return False
+        return response.status_code == 200
+
+    # === РАБОТА С БРАУЗЕРОМ ===
+
+    def save_from_driver(self, driver) -> None:
+        """Сохраняет cookies после логина через UI"""
+        cookies = [{'name': cookie['name'], 'value': cookie['value'], 'path': cookie.get('path', '/')}
+                   for cookie in driver.get_cookies() if cookie['name'] in AUTH_COOKIE_NAMES]
+        if cookies:
+            self._remember(cookies)
+            self._save(cookies)
+
+    def invalidate(self) -> None:
+        """Сбрасывает сессию: следующий get_cookies() выполнит логин заново"""
+        self._cookies = None
+        self._validated_at = 0.0
+        if os.path.exists(self.cookies_path):
+            os.remove(self.cookies_path)
+
+    # === ХРАНЕНИЕ ===
+
+    def _remember(self, cookies: List[Dict[str, Any]]) -> None:
+        self._cookies = cookies
+        self._validated_at = time.time()
+
+    def _load(self) -> Optional[List[Dict[str, Any]]]:
+        if not os.path.exists(self.cookies_path):
+            return None
+        try:
+            with open(self.cookies_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, cookies: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(self.cookies_path), exist_ok=True)
+        with open(self.cookies_path, 'w', encoding='utf-8') as f:
+            json.dump(cookies, f)
@@ -0,0 +1,284 @@
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, List, Optional, Set
+
+from selenium import webdriver
+from selenium.common import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from utils.auth_session import AUTH_COOKIE_NAMES
+from utils.browser_contexts import BrowserContextManager, SHARED_BROWSER_ADDRESS
+from utils.chromedriver import resolve_chromedriver
+from utils.network_control import configure_options, enable_request_blocking
+
+# Сколько тестов может обслужить один браузер до принудительного перезапуска
+DEFAULT_MAX_USES = 100
+
+# Неявное ожидание отключено: все ожидания явные (BasePage), иначе проверки
+# отсутствия элемента каждый раз ждут полный неявный таймаут
+IMPLICIT_WAIT = 0
+
+
+def is_ci() -> bool:
+    """Запуск в CI (GitHub Actions / GitLab CI)"""
+    return bool(os.getenv('CI') or os.getenv('GITLAB_CI'))
+
+
+def build_chrome_options(headless: bool = False) -> Options:
+    """Опции Chrome: в CI (или по запросу) - headless режим; при UI_BLOCK_RESOURCES - загрузка 'eager'"""
+    chrome_options = Options()
+    # Журнал консоли браузера для артефактов упавших тестов
+    chrome_options.set_capability('goog:loggingPrefs', {'browser': 'ALL'})
+    if is_ci() or headless:
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+    return configure_options(chrome_options)
+
+
+_context_managers = {}
+
+
+def _shared_browser_contexts() -> Optional[BrowserContextManager]:
+    """Менеджер контекстов общего Chrome, если он запущен (UI_SHARED_BROWSER=1)"""
+    address = os.getenv(SHARED_BROWSER_ADDRESS)
+    if not address:
+        return None
+    if address not in _context_managers:
+        _context_managers[address] = BrowserContextManager(address)
+    return _context_managers[address]
+
+
+def create_chrome_driver(headless: bool = False) -> webdriver.Remote:
+    """
+    Запускает Chrome: изолированный контекст общего Chrome (если включен),
+    Remote WebDriver для Selenium-контейнера в CI, иначе локальный ChromeDriver.
+    headless=True - без окна и вне CI (офлайн-замеры page objects)
+    """
+    shared = _shared_browser_contexts()
+    if shared:
+        driver = shared.open_context_driver()
+        driver.implicitly_wait(IMPLICIT_WAIT)
+        enable_request_blocking(driver)
+        return driver
+
+    chrome_options = build_chrome_options(headless)
+
+    # Если используем Selenium контейнер, не устанавливаем ChromeDriver
+    if is_ci() and os.getenv('SELENIUM_REMOTE_URL'):
+        driver = webdriver.Remote(
+            command_executor=os.getenv('SELENIUM_REMOTE_URL'),
+            options=chrome_options
+        )
+    else:
+        # Путь к драйверу определяется один раз на машину и кешируется на диске
+        service = Service(resolve_chromedriver())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+
+    driver.implicitly_wait(IMPLICIT_WAIT)
+    enable_request_blocking(driver)
+    return driver
+
+
+def close_chrome_driver(driver: webdriver.Remote) -> None:
+    """Закрывает браузер; для контекста общего Chrome закрывается только контекст"""
+    shared = _shared_browser_contexts()
+    if shared and getattr(driver, 'browser_context_id', None):
+        shared.close_context_driver(driver)
+    else:
+        driver.quit()
+
+
+def own_window_handles(driver: webdriver.Remote) -> List[str]:
+    """Вкладки браузера драйвера; для контекста общего Chrome - только вкладки этого контекста"""
+    shared = _shared_browser_contexts()
+    if shared and getattr(driver, 'browser_context_id', None):
+        return shared.context_handles(driver)
+    return driver.window_handles
+
+
+class BrowserPool:
+    """
+    Пул долгоживущих браузеров воркера pytest.
+    Тест берет браузер через lease() и возвращает через release(): состояние
+    сбрасывается (кроме авторизации), сломанные браузеры перезапускаются.
+    Браузер с авторизацией выдается без нее, если тест не просит авторизацию (lease(authenticated=False)).
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_uses: int = DEFAULT_MAX_USES) -> None:
+        """
+        Args:
+            base_url: адрес Tandoor, для которого очищается storage
+            max_uses: после стольких тестов браузер перезапускается (защита от утечек памяти)
+        """
+        self.base_url = (base_url or os.getenv('BASE_URL', 'http://localhost:8080')).rstrip('/')
+        self.max_uses = max_uses
+        self.launch_count = 0
+        self._idle: List[webdriver.Remote] = []
+        self._leased: Set[webdriver.Remote] = set()
+        # Браузеры в пуле, которые могут хранить cookies авторизации
+        self._signed_in: Set[webdriver.Remote] = set()
+        self._uses = {}
+        self._lock = threading.Lock()
+
+    def lease(self, authenticated: bool = False) -> webdriver.Remote:
+        """
+        Выдает исправный браузер из пула или запускает новый.
+        Предпочитает браузер с тем же состоянием авторизации; если тесту авторизация не нужна,
+        а у браузера она осталась от прошлого теста, cookies Tandoor удаляются
+
+        Args:
+            authenticated: тест авторизуется (сессия будет подставлена или введена через форму)
+        """
+        while True:
+            with self._lock:
+                driver = self._pop_idle(authenticated)
+                signed_in = driver in self._signed_in
+                self._signed_in.discard(driver)
+            if driver is None:
+                driver = self._launch()
+            elif not self._is_healthy(driver):
+                self._discard(driver)
+                continue
+            elif signed_in and not authenticated:
+                try:
+                    self._sign_out(driver)
+                except WebDriverException as e:
+                    print(f"[POOL] Не удалось удалить авторизацию, перезапуск: {e.msg}")
+                    self._discard(driver)
+                    continue
+            with self._lock:
+                self._leased.add(driver)
+            return driver
+
+    def _pop_idle(self, authenticated: bool) -> Optional[webdriver.Remote]:
+        """Берет из пула браузер с нужным состоянием авторизации, иначе последний свободный"""
+        for index in range(len(self._idle) - 1, -1, -1):
+            if (self._idle[index] in self._signed_in) == authenticated:
+                return self._idle.pop(index)
+        return self._idle.pop() if self._idle else None
+
+    def _sign_out(self, driver: webdriver.Remote) -> None:
+        """Удаляет все cookies Tandoor (cookies доступны только на домене Tandoor)"""
+        driver.get(self.base_url)
+        driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    def release(self, driver: webdriver.Remote) -> None:
+        """Возвращает браузер в пул после сброса состояния; неисправный браузер закрывается"""
+        with self._lock:
+            self._leased.discard(driver)
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        if self._uses[id(driver)] >= self.max_uses:
+            self._discard(driver)
+            return
+        try:
+            signed_in = self.reset(driver)
+        except Exception as e:
+            # Кроме ошибок WebDriver - ошибки CDP общего Chrome при поиске вкладок контекста
+            print(f"[POOL] Браузер не удалось сбросить, перезапуск: {getattr(e, 'msg', None) or e}")
+            self._discard(driver)
+            return
+        with self._lock:
+            self._idle.append(driver)
+            if signed_in:
+                self._signed_in.add(driver)
+
+    def reset(self, driver: webdriver.Remote) -> bool:
+        """
+        Закрывает лишние вкладки, очищает storage и cookies (кроме авторизации), открывает about:blank.
+        В общем Chrome закрываются только вкладки своего контекста, основной остается его первая вкладка
+
+        Returns:
+            bool: у браузера могла остаться авторизация (cookies не видны вне домена Tandoor)
+        """
+        handles = own_window_handles(driver)
+        if not handles:
+            raise WebDriverException('У браузера не осталось вкладок')
+        main = getattr(driver, 'context_handle', None)
+        if main not in handles:
+            main = handles[0]
+        for handle in handles:
+            if handle != main:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(main)
+        if getattr(driver, 'browser_context_id', None):
+            driver.context_handle = main
+
+        # Storage и cookies доступны только пока открыт домен Tandoor
+        signed_in = True
+        if driver.current_url.startswith(self.base_url):
+            driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+            cookies = driver.get_cookies()
+            for cookie in cookies:
+                if cookie['name'] not in AUTH_COOKIE_NAMES:
+                    driver.delete_cookie(cookie['name'])
+            # csrftoken выдается и без входа, авторизацию означает только сессия Django
+            signed_in = any(cookie['name'] == 'sessionid' for cookie in cookies)
+        driver.get('about:blank')
+        return signed_in
+
+    def close(self) -> None:
+        """Закрывает все браузеры пула, в том числе выданные и не возвращенные"""
+        with self._lock:
+            drivers = self._idle + list(self._leased)
+            self._idle, self._leased, self._signed_in = [], set(), set()
+        for driver in drivers:
+            self._discard(driver)
+        print(f"[POOL] Запусков браузера за сессию: {self.launch_count}")
+
+    def _launch(self) -> webdriver.Remote:
+        driver = create_chrome_driver()
+        with self._lock:
+            self.launch_count += 1
+        return driver
+
+    @staticmethod
+    def _is_healthy(driver: webdriver.Remote) -> bool:
+        try:
+            return driver.execute_script('return 1') == 1 and bool(own_window_handles(driver))
+        except Exception:
+            return False
+
+    def _discard(self, driver: webdriver.Remote) -> None:
+        with self._lock:
+            self._leased.discard(driver)
+            self._signed_in.discard(driver)
+        self._uses.pop(id(driver), None)
+        try:
+            close_chrome_driver(driver)
+        except Exception as e:
+            print(f"[POOL] Ошибка при закрытии браузера: {e}")
+
+
+class DeferredDriver:
+    """
+    WebDriver, который готовится в фоновом потоке (запуск браузера, логин).
+    Любое обращение к атрибуту ждет окончания подготовки и передается настоящему драйверу,
+    поэтому тест блокируется только при первом действии с браузером.
+    """
+
+    def __init__(self, future: Future) -> None:
+        object.__setattr__(self, '_future', future)
+
+    @property
+    def is_ready(self) -> bool:
+        """Подготовка браузера завершена (успешно или с ошибкой)"""
+        return self._future.done()
+
+    def resolve(self) -> webdriver.Remote:
+        """Настоящий драйвер; ошибка фоновой подготовки пробрасывается здесь"""
+        return self._future.result()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = 'готов' if self.is_ready else 'запускается'
+        return f"<DeferredDriver ({state})>"
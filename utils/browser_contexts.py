@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+import requests
+import websocket
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from utils.chromedriver import find_chrome_binary, resolve_chromedriver
+from utils.network_control import configure_options
+
+# Включает режим одного общего Chrome для всех воркеров
+SHARED_BROWSER_FLAG = 'UI_SHARED_BROWSER'
+# Адрес отладки общего Chrome (host:port), передается воркерам xdist через окружение
+SHARED_BROWSER_ADDRESS = 'UI_SHARED_BROWSER_ADDRESS'
+
+
+class SharedChrome:
+    """
+    Один headless Chrome с открытым портом отладки.
+    Запускается главным процессом pytest, воркеры подключаются к нему по адресу.
+    """
+
+    def __init__(self) -> None:
+        self.process: Optional[subprocess.Popen] = None
+        self.user_data_dir: Optional[str] = None
+        self.address: Optional[str] = None
+
+    def start(self, timeout: float = 30) -> str:
+        """Запускает Chrome и возвращает адрес отладки host:port"""
+        binary = find_chrome_binary()
+        if not binary:
+            raise RuntimeError('Chrome не найден: укажите путь в CHROME_BINARY')
+
+        self.user_data_dir = tempfile.mkdtemp(prefix='qa_tandoor_chrome_')
+        self.process = subprocess.Popen(
+            [binary, '--headless=new', '--remote-debugging-port=0', f'--user-data-dir={self.user_data_dir}',
+             '--no-first-run', '--no-default-browser-check', '--no-sandbox', '--disable-dev-shm-usage',
+             'about:blank'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # С портом 0 Chrome сам выбирает свободный порт и записывает его в DevToolsActivePort
+        port_file = os.path.join(self.user_data_dir, 'DevToolsActivePort')
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.path.exists(port_file):
+                with open(port_file, 'r', encoding='utf-8') as f:
+                    port = f.readline().strip()
+                if port:
+                    self.address = f'127.0.0.1:{port}'
+                    print(f"[SHARED CHROME] Запущен общий Chrome: {self.address}")
+                    return self.address
+            time.sleep(0.1)
+        self.stop()
+        raise TimeoutError('Общий Chrome не открыл порт отладки')
+
+    def stop(self) -> None:
+        """Останавливает Chrome и удаляет временный профиль"""
+        if self.process:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+
+class BrowserContextManager:
+    """
+    Изолированные контексты (свои cookies и storage) внутри общего Chrome через CDP
+    Target.createBrowserContext. Каждый контекст получает свою вкладку и свою сессию chromedriver.
+    """
+
+    def __init__(self, address: str) -> None:
+        """
+        Args:
+            address: адрес отладки общего Chrome (host:port)
+        """
+        self.address = address
+        self._lock = threading.Lock()
+        self._message_id = 0
+
+    def _browser_ws_url(self) -> str:
+        return requests.get(f'http://{self.address}/json/version', timeout=10).json()['webSocketDebuggerUrl']
+
+    def cdp(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Выполняет команду CDP на уровне браузера (не вкладки)"""
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        connection = websocket.create_connection(self._browser_ws_url(), timeout=30, suppress_origin=True)
+        try:
+            connection.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+            while True:
+                message = json.loads(connection.recv())
+                if message.get('id') != message_id:
+                    continue
+                if 'error' in message:
+                    raise RuntimeError(f"CDP {method}: {message['error']}")
+                return message.get('result', {})
+        finally:
+            connection.close()
+
+    def open_context_driver(self) -> webdriver.Remote:
+        """Создает контекст с пустой вкладкой и подключенный к ней WebDriver"""
+        context_id = self.cdp('Target.createBrowserContext', {'disposeOnDetach': False})['browserContextId']
+        target_id = self.cdp('Target.createTarget',
+                             {'url': 'about:blank', 'browserContextId': context_id})['targetId']
+
+        options = Options()
+        options.set_capability('goog:loggingPrefs', {'browser': 'ALL'})
+        options = configure_options(options)
+        options.debugger_address = self.address
+        driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+
+        # Дескриптор окна chromedriver совпадает с ID вкладки (в старых версиях - с префиксом)
+        handle = next((handle for handle in driver.window_handles if handle.endswith(target_id)), None)
+        if handle is None:
+            driver.quit()
+            self.cdp('Target.disposeBrowserContext', {'browserContextId': context_id})
+            raise RuntimeError(f"Вкладка контекста {context_id} не видна в chromedriver")
+        driver.switch_to.window(handle)
+        driver.browser_context_id = context_id
+        driver.context_handle = handle
+        return driver
+
+    def context_handles(self, driver: webdriver.Remote) -> List[str]:
+        """
+        Дескрипторы вкладок контекста драйвера. Сессия chromedriver общего Chrome видит вкладки
+        всех воркеров, поэтому вкладки отбираются по browserContextId
+        """
+        context_id = getattr(driver, 'browser_context_id', None)
+        target_ids = {target['targetId'] for target in self.cdp('Target.getTargets')['targetInfos']
+                      if target.get('type') == 'page' and target.get('browserContextId') == context_id}
+        return [handle for handle in driver.window_handles
+                if any(handle.endswith(target_id) for target_id in target_ids)]
+
+    def close_context_driver(self, driver: webdriver.Remote) -> None:
+        """Отключает WebDriver (общий Chrome продолжает работать) и удаляет контекст"""
+        context_id = getattr(driver, 'browser_context_id', None)
+        try:
+            driver.quit()
+        finally:
+            if context_id:
+                self.cdp('Target.disposeBrowserContext', {'browserContextId': context_id})
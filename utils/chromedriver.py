@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Общий для всех проектов и воркеров кеш на машине
+CACHE_DIR = os.getenv('CHROMEDRIVER_CACHE_DIR',
+                      os.path.join(os.path.expanduser('~'), '.cache', 'qa_tandoor'))
+CACHE_FILE = os.path.join(CACHE_DIR, 'chromedriver.json')
+LOCK_FILE = os.path.join(CACHE_DIR, 'chromedriver.lock')
+
+# Блокировка старше этого времени считается брошенной (упавший процесс), секунды
+LOCK_STALE_AFTER = 300
+
+_VERSION_RE = re.compile(r'(\d+)\.\d+\.\d+\.\d+')
+
+_CHROME_COMMANDS = (
+    'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+)
+
+
+def _major_version(output: str) -> Optional[str]:
+    match = _VERSION_RE.search(output or '')
+    return match.group(1) if match else None
+
+
+def find_chrome_binary() -> Optional[str]:
+    """Путь к исполняемому файлу Chrome (CHROME_BINARY из окружения или поиск по известным именам)"""
+    preset = os.getenv('CHROME_BINARY')
+    if preset and os.path.exists(preset):
+        return preset
+    for command in _CHROME_COMMANDS:
+        path = shutil.which(command) or (command if os.path.exists(command) else None)
+        if path:
+            return path
+    return None
+
+
+def installed_chrome_major() -> Optional[str]:
+    """Основная версия локально установленного Chrome (например '120') или None"""
+    if sys.platform.startswith('win'):
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\Google\Chrome\BLBeacon') as key:
+                return _major_version(winreg.QueryValueEx(key, 'version')[0])
+        except OSError:
+            return None
+
+    for command in _CHROME_COMMANDS:
+        if not (shutil.which(command) or os.path.exists(command)):
+            continue
+        try:
+            output = subprocess.run([command, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        major = _major_version(output)
+        if major:
+            return major
+    return None
+
+
+def chromedriver_major(path: str) -> Optional[str]:
+    """Основная версия бинарника chromedriver"""
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return _major_version(output)
+
+
+class _FileLock:
+    """Межпроцессная блокировка через эксклюзивное создание файла"""
+
+    def __init__(self, path: str, timeout: float = 120) -> None:
+        self.path = path
+        self.timeout = timeout
+
+    def __enter__(self) -> '_FileLock':
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > LOCK_STALE_AFTER:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Не дождались блокировки {self.path}")
+                time.sleep(0.2)
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _read_cache() -> Dict[str, str]:
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache: Dict[str, str]) -> None:
+    temporary = CACHE_FILE + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(temporary, CACHE_FILE)
+
+
+def _cached_path(cache: Dict[str, str], chrome_major: Optional[str]) -> Optional[str]:
+    path = cache.get(chrome_major or 'unknown')
+    return path if path and os.path.exists(path) else None
+
+
+@lru_cache(maxsize=1)
+def resolve_chromedriver() -> Optional[str]:
+    """
+    Путь к chromedriver, подходящему к установленному Chrome. Порядок:
+    1. CHROMEDRIVER_PATH из окружения (заранее подготовленный бинарник, работает без сети);
+    2. кеш на диске по основной версии Chrome;
+    3. скачивание через webdriver-manager под блокировкой (один воркер качает, остальные ждут);
+    4. chromedriver из PATH.
+    None - пусть Selenium Manager найдет драйвер сам.
+    """
+    preset = os.getenv('CHROMEDRIVER_PATH')
+    if preset and os.path.exists(preset):
+        return preset
+
+    chrome_major = installed_chrome_major()
+    cached = _cached_path(_read_cache(), chrome_major)
+    if cached:
+        return cached
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        with _FileLock(LOCK_FILE):
+            # Пока ждали блокировку, драйвер мог скачать другой воркер
+            cache = _read_cache()
+            cached = _cached_path(cache, chrome_major)
+            if cached:
+                return cached
+
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            driver_major = chromedriver_major(path)
+            if chrome_major and driver_major and driver_major != chrome_major:
+                print(f"[CHROMEDRIVER] Версия драйвера {driver_major} не совпадает с Chrome {chrome_major}")
+            else:
+                cache[chrome_major or 'unknown'] = path
+                _write_cache(cache)
+                return path
+    except Exception as e:
+        print(f"[CHROMEDRIVER] Не удалось получить драйвер через webdriver-manager: {e}")
+
+    return shutil.which('chromedriver')
@@ -0,0 +1,159 @@
+import base64
+import glob
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Any
+
+from selenium.common import WebDriverException
+
+from utils.auth_session import worker_id
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Каталог артефактов упавших тестов (FAILURE_ARTIFACTS_DIR переопределяет)
+DEFAULT_ARTIFACTS_DIR = os.path.join(ROOT_DIR, 'artifacts')
+# Индекс архивов: у каждого воркера xdist свой файл, чтобы воркеры не перезаписывали записи друг друга
+INDEX_FILE = 'index_{worker}.json'
+INDEX_PATTERN = 'index_*.json'
+
+_UNSAFE_CHARS_RE = re.compile(r'[^\w.-]+')
+
+
+class FailureArtifacts:
+    """
+    Артефакты упавших UI-тестов: скриншот, DOM и консоль браузера.
+    В момент падения из браузера только забираются данные; декодирование, сжатие
+    в zip и запись на диск выполняются в фоновом потоке. Архивы воркера учтены
+    в его индексе index_<воркер>.json, по индексам же удаляются старые артефакты.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or os.getenv('FAILURE_ARTIFACTS_DIR', DEFAULT_ARTIFACTS_DIR)
+        self.index_path = os.path.join(self.directory, INDEX_FILE.format(worker=worker_id()))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # === СБОР ===
+
+    def capture(self, driver, nodeid: str) -> Optional[str]:
+        """
+        Забирает из браузера скриншот (base64, без декодирования), DOM и консоль
+        и ставит запись архива в очередь.
+
+        Returns:
+            Optional[str]: путь к будущему архиву или None, если браузер недоступен
+        """
+        captured_at = time.time()
+        try:
+            screenshot = driver.get_screenshot_as_base64()
+            dom = driver.page_source
+            url = driver.current_url
+        except WebDriverException as e:
+            print(f"[ARTIFACTS] Браузер недоступен, артефакты не собраны: {e}")
+            return None
+        try:
+            console = driver.get_log('browser')
+        except (WebDriverException, ValueError):
+            # Remote WebDriver без журнала браузера
+            console = []
+
+        stamp = datetime.fromtimestamp(captured_at).strftime('%Y%m%d_%H%M%S_%f')
+        archive = os.path.join(self.directory, f"{stamp}_{_UNSAFE_CHARS_RE.sub('_', nodeid)[-120:]}.zip")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='failure-artifacts')
+        self._executor.submit(self._write, archive, nodeid, captured_at, url, screenshot, dom, console)
+        return archive
+
+    def _write(self, archive: str, nodeid: str, captured_at: float, url: str,
+               screenshot: str, dom: str, console: List[Dict[str, Any]]) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                # PNG уже сжат - повторное сжатие только тратит время
+                zf.writestr('screenshot.png', base64.b64decode(screenshot), compress_type=zipfile.ZIP_STORED)
+                zf.writestr('dom.html', dom)
+                zf.writestr('console.json', json.dumps(console, ensure_ascii=False, indent=2))
+                zf.writestr('meta.json', json.dumps({'test': nodeid, 'url': url, 'captured_at': captured_at},
+                                                    ensure_ascii=False, indent=2))
+            with self._lock:
+                entries = self._read_index()
+                entries.append({'test': nodeid, 'archive': os.path.basename(archive),
+                                'created': captured_at, 'bytes': os.path.getsize(archive)})
+                self._write_index(entries)
+            print(f"[ARTIFACTS] {nodeid}: {archive}")
+        except Exception as e:
+            print(f"[ARTIFACTS] Не удалось сохранить артефакты {nodeid}: {e}")
+
+    def flush(self) -> None:
+        """Дожидается записи всех архивов из очереди"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # === ИНДЕКС И ХРАНЕНИЕ ===
+
+    def _read_index(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        try:
+            with open(path or self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _write_index(self, entries: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(temporary, self.index_path)
+
+    def _foreign_indexes(self) -> List[str]:
+        return [path for path in glob.glob(os.path.join(self.directory, INDEX_PATTERN))
+                if os.path.abspath(path) != os.path.abspath(self.index_path)]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Записи индексов всех воркеров (от старых к новым)"""
+        with self._lock:
+            entries = self._read_index()
+        for path in self._foreign_indexes():
+            entries.extend(self._read_index(path))
+        return sorted(entries, key=lambda entry: entry['created'])
+
+    def apply_retention(self, days: float) -> int:
+        """
+        Удаляет архивы старше days дней по индексам, без обхода каталога архивов.
+        Переписывается только индекс своего воркера: устаревшие архивы из индексов других
+        воркеров удаляются, а их записи уберет сам воркер при своей очистке
+
+        Returns:
+            int: количество удаленных архивов
+        """
+        threshold = time.time() - days * 24 * 60 * 60
+        removed = 0
+        with self._lock:
+            entries = self._read_index()
+            keep = [entry for entry in entries if entry['created'] >= threshold]
+            removed += self._remove_archives(entry for entry in entries if entry['created'] < threshold)
+            if len(keep) != len(entries):
+                self._write_index(keep)
+        for path in self._foreign_indexes():
+            removed += self._remove_archives(entry for entry in self._read_index(path)
+                                             if entry['created'] < threshold)
+        return removed
+
+    def _remove_archives(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Удаляет архивы записей; возвращает число реально удаленных файлов"""
+        removed = 0
+        for entry in entries:
+            try:
+                os.remove(os.path.join(self.directory, entry['archive']))
+                removed += 1
+            except OSError:
+                # Архив уже удален (другим воркером или вручную)
+                pass
+        return removed
@@ -0,0 +1,43 @@
+import uuid
+from datetime import date, timedelta
+from typing import Optional
+
+from utils.auth_session import worker_id
+
+# Метка запуска: у каждого процесса pytest (воркера xdist) своя
+RUN_TOKEN = uuid.uuid4().hex[:6]
+
+# Календарь планов открывается на текущей неделе и показывает три недели
+CALENDAR_VISIBLE_WEEKS = 3
+
+
+def worker_index() -> int:
+    """Номер воркера pytest-xdist (gw3 -> 3), без xdist - 0"""
+    worker = worker_id()
+    return int(worker[2:]) if worker.startswith('gw') and worker[2:].isdigit() else 0
+
+
+def namespace() -> str:
+    """Пространство имен тестовых данных воркера в этом запуске: 'gw0-1a2b3c'"""
+    return f"{worker_id()}-{RUN_TOKEN}"
+
+
+def unique_name(base: str) -> str:
+    """
+    Название тестовых данных, уникальное для воркера и запуска: 'gw0-1a2b3c Крем Рафаэлло'.
+    Пространство имен стоит в начале: это первое слово названия, по нему page objects
+    находят продукты рецепта в списке покупок
+    """
+    return f"{namespace()} {base}"
+
+
+def worker_plan_date(today: Optional[date] = None) -> date:
+    """
+    Дата планов UI-тестов воркера: у каждого воркера свой день среди видимых в календаре
+    без переключения периода (текущая неделя и следующие). Воркер 0 получает завтрашний день,
+    следующие - дни после него; если дней периода не хватает, отсчет начинается заново.
+    """
+    today = today or date.today()
+    period_end = today - timedelta(days=today.weekday()) + timedelta(weeks=CALENDAR_VISIBLE_WEEKS, days=-1)
+    days_ahead = (period_end - today).days
+    return today + timedelta(days=worker_index() % days_ahead + 1)
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional
+
+from selenium.common import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+# Включает блокировку ресурсов, которые тесты не проверяют
+BLOCK_RESOURCES_FLAG = 'UI_BLOCK_RESOURCES'
+# Свои шаблоны URL через запятую вместо DEFAULT_BLOCK_PATTERNS
+BLOCK_PATTERNS_VAR = 'UI_BLOCK_PATTERNS'
+# Отключает кеш браузера (по умолчанию кеш работает)
+DISABLE_CACHE_FLAG = 'UI_DISABLE_CACHE'
+
+# Шаблоны Network.setBlockedURLs ('*' - любая последовательность символов)
+DEFAULT_BLOCK_PATTERNS = (
+    # Изображения рецептов и пользователей Tandoor
+    '*/media/*',
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.ico',
+    # Веб-шрифты и наборы иконок
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # Аналитика
+    '*google-analytics.com*', '*googletagmanager.com*', '*plausible.io*',
+)
+
+
+def is_enabled() -> bool:
+    """Блокировка ресурсов включена (UI_BLOCK_RESOURCES=1)"""
+    return bool(os.getenv(BLOCK_RESOURCES_FLAG))
+
+
+def block_patterns() -> List[str]:
+    """Шаблоны блокируемых URL: из UI_BLOCK_PATTERNS или по умолчанию"""
+    custom = os.getenv(BLOCK_PATTERNS_VAR)
+    if custom:
+        return [pattern.strip() for pattern in custom.split(',') if pattern.strip()]
+    return list(DEFAULT_BLOCK_PATTERNS)
+
+
+def configure_options(options: Options) -> Options:
+    """
+    При включенной блокировке: стратегия загрузки 'eager' (не ждать картинки и шрифты)
+    и журнал производительности, из которого читаются заблокированные запросы
+    """
+    if is_enabled():
+        options.page_load_strategy = 'eager'
+        logging_prefs = dict(options.capabilities.get('goog:loggingPrefs') or {})
+        logging_prefs['performance'] = 'ALL'
+        options.set_capability('goog:loggingPrefs', logging_prefs)
+    return options
+
+
+def enable_request_blocking(driver) -> bool:
+    """
+    Включает блокировку URL через CDP для текущей вкладки.
+
+    Returns:
+        bool: True - блокировка включена, False - выключена флагом или CDP недоступен
+    """
+    if not is_enabled():
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': block_patterns()})
+        if os.getenv(DISABLE_CACHE_FLAG):
+            driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': True})
+        return True
+    except (AttributeError, WebDriverException) as e:
+        print(f"[NETWORK] Блокировка ресурсов недоступна: {e}")
+        return False
+
+
+def _blocked_from_log(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Заблокированные запросы из журнала производительности chromedriver"""
+    sent = {}
+    blocked = []
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        params = message.get('params', {})
+        if message.get('method') == 'Network.requestWillBeSent':
+            sent[params['requestId']] = params['request']['url']
+        elif (message.get('method') == 'Network.loadingFailed'
+              and params.get('blockedReason') == 'inspector'):
+            blocked.append({'url': sent.get(params['requestId'], ''), 'type': params.get('type', 'Other')})
+    return blocked
+
+
+class BlockedRequestsReport:
+    """
+    Заблокированные запросы за сессию. Сводка содержит только количества: заблокированный запрос
+    не получает ответа, а узнавать размер отдельным запросом - значит вернуть трафик, который убрали
+    """
+
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+
+    def collect(self, driver) -> List[Dict[str, str]]:
+        """Читает (и очищает) журнал браузера, возвращает запросы, заблокированные с прошлого вызова"""
+        if not is_enabled():
+            return []
+        try:
+            blocked = _blocked_from_log(driver.get_log('performance'))
+        except (WebDriverException, ValueError, KeyError) as e:
+            print(f"[NETWORK] Не удалось прочитать журнал запросов: {e}")
+            return []
+        with self._lock:
+            self.requests.extend(blocked)
+        return blocked
+
+    def summary(self, requests_list: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Сводка по заблокированным запросам (по умолчанию - за всю сессию)
+
+        Args:
+            requests_list: запросы для сводки (например, одного теста)
+
+        Returns:
+            Dict[str, Any]: {'requests', 'unique_urls', 'by_type'}
+        """
+        blocked = self.requests if requests_list is None else requests_list
+        urls = sorted({request['url'] for request in blocked if request['url']})
+        return {
+            'requests': len(blocked),
+            'unique_urls': len(urls),
+            'by_type': dict(Counter(request['type'] for request in blocked)),
+        }
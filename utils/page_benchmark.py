@@ -0,0 +1,352 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from dotenv import load_dotenv
+
+from pages import LoginPage
+from pages.meal_plan_page import MealPlanPage
+from pages.scripts import CAPTURE_SNAPSHOT_JS, SNAPSHOT_MULTISELECT_JS
+from pages.shopping_list_page import ShoppingListPage
+from utils.auth_session import AuthSessionProvider
+from utils.browser import create_chrome_driver, close_chrome_driver
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Локальные снимки страниц (вне git: DOM содержит данные пользователя). Снимаются один раз командой
+# capture с живого Tandoor, после этого замеры run запущенного Tandoor не требуют
+DEFAULT_SNAPSHOTS_DIR = os.path.join(ROOT_DIR, 'test_data', 'page_snapshots')
+# История замеров по коммитам (одна строка JSON на запуск)
+DEFAULT_HISTORY_PATH = os.path.join(ROOT_DIR, 'reports', 'page_benchmark_history.jsonl')
+MANIFEST_FILE = 'manifest.json'
+
+DEFAULT_ITERATIONS = 10
+DEFAULT_WARMUP = 2
+# Замедление медианы относительно прошлого коммита, после которого метод считается регрессией
+REGRESSION_THRESHOLD = 0.2
+
+# Снимаемые экраны: (имя, путь на локальном сервере, класс page object, открытие экрана, нужен ли логин).
+# Форма плана снимается открытой: в статическом снимке клик по календарю ее не откроет.
+SNAPSHOT_VIEWS: Tuple[Tuple[str, str, type, Callable[[Any], Any], bool], ...] = (
+    ('login', '/accounts/login/', LoginPage, lambda page: page.open_login_page(), False),
+    ('mealplan', '/mealplan', MealPlanPage, lambda page: page.open_meal_plan_page(), True),
+    ('mealplan-form', '/mealplan?view=form', MealPlanPage,
+     lambda page: (page.open_meal_plan_page(), page.click_date(date.today())), True),
+    ('shopping', '/shopping', ShoppingListPage, lambda page: page.open_shopping_list_page(), True),
+)
+
+
+# === СНЯТИЕ СНИМКОВ ===
+
+def capture_snapshots(driver, directory: str) -> Dict[str, Any]:
+    """
+    Снимает экраны SNAPSHOT_VIEWS с живого Tandoor (BASE_URL) и сохраняет их в directory
+    вместе с manifest.json: пути экранов и данные для замеров (названия планов и продуктов)
+
+    Returns:
+        Dict[str, Any]: содержимое manifest.json
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest: Dict[str, Any] = {'captured_at': datetime.now().isoformat(timespec='seconds'),
+                                'source': os.getenv('BASE_URL'), 'views': {}, 'data': {}}
+    logged_in = False
+    for name, path, page_class, open_page, needs_login in SNAPSHOT_VIEWS:
+        if needs_login and not logged_in:
+            login_page = LoginPage(driver)
+            if not login_page.login_with_session(AuthSessionProvider()):
+                login_page.login_user()
+            logged_in = True
+        page = page_class(driver)
+        open_page(page)
+        page.wait_for_app_ready()
+
+        if name == 'mealplan':
+            manifest['data']['plan_names'] = [plan['name'] for plan in page.get_visible_plans() if plan['name']]
+        elif name == 'shopping':
+            manifest['data']['shopping_items'] = page.get_all_recipes()
+
+        file_name = f'{name}.html'
+        with open(os.path.join(directory, file_name), 'w', encoding='utf-8') as f:
+            f.write(driver.execute_script(CAPTURE_SNAPSHOT_JS))
+        manifest['views'][name] = {'path': path, 'file': file_name}
+        print(f"[BENCHMARK] Снят экран {name}: {file_name}")
+
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def load_manifest(directory: str) -> Dict[str, Any]:
+    """manifest.json снимков; FileNotFoundError - снимки еще не сняты (команда capture)"""
+    with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# === ЛОКАЛЬНЫЙ СЕРВЕР ===
+
+class SnapshotServer:
+    """
+    HTTP-сервер снимков на 127.0.0.1 (свободный порт). Пути экранов совпадают с путями Tandoor,
+    поэтому page objects работают без изменений при BASE_URL = server.url.
+    В каждую страницу добавляется SNAPSHOT_MULTISELECT_JS.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.routes = {view['path']: view['file'] for view in load_manifest(directory)['views'].values()}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _page(self, request_path: str) -> Optional[bytes]:
+        """Страница по пути запроса: сначала точное совпадение с параметрами, затем путь без них"""
+        file_name = self.routes.get(request_path) or self.routes.get(request_path.split('?', 1)[0])
+        if not file_name:
+            return None
+        with open(os.path.join(self.directory, file_name), 'r', encoding='utf-8') as f:
+            html = f.read()
+        shim = f'<script>{SNAPSHOT_MULTISELECT_JS}</script>'
+        position = html.rfind('</body>')
+        html = html[:position] + shim + html[position:] if position != -1 else html + shim
+        return html.encode('utf-8')
+
+    def start(self) -> 'SnapshotServer':
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = server._page(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='snapshot-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'SnapshotServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+# === ЗАМЕРЫ ===
+
+class BenchmarkCase:
+    """
+    Замеряемый метод page object на снимке экрана
+
+    Args:
+        name: имя в отчете и истории
+        view: экран из SNAPSHOT_VIEWS
+        action: замеряемый вызов action(page, data), data - данные manifest.json
+        reload: открывать экран заново перед каждым замером (метод меняет DOM)
+    """
+
+    def __init__(self, name: str, view: str, action: Callable[[Any, Dict[str, Any]], Any],
+                 reload: bool = False) -> None:
+        self.name = name
+        self.view = view
+        self.action = action
+        self.reload = reload
+
+
+def _first(data: Dict[str, Any], key: str, default: str) -> str:
+    return (data.get(key) or [default])[0]
+
+
+BENCHMARK_CASES = (
+    BenchmarkCase('LoginPage.open_login_page', 'login', lambda page, data: page.open_login_page()),
+    BenchmarkCase('MealPlanPage.open_meal_plan_page', 'mealplan', lambda page, data: page.open_meal_plan_page()),
+    BenchmarkCase('MealPlanPage.is_plan_visible', 'mealplan',
+                  lambda page, data: page.is_plan_visible(_first(data, 'plan_names', ''), timeout=1)),
+    BenchmarkCase('MealPlanPage.get_visible_plans', 'mealplan', lambda page, data: page.get_visible_plans()),
+    # Заполнение формы из create_plan_ui (клик по календарю и сохранение требуют живого Tandoor)
+    BenchmarkCase('MealPlanPage.fill_plan_form', 'mealplan-form',
+                  lambda page, data: page.fill_plan_form(_first(data, 'plan_names', 'Крем Рафаэлло'),
+                                                         'Замер', 'Завтрак', '2'),
+                  reload=True),
+    BenchmarkCase('ShoppingListPage.get_all_recipes', 'shopping', lambda page, data: page.get_all_recipes()),
+)
+
+
+def run_benchmarks(driver,
+                   server: SnapshotServer,
+                   cases: Tuple[BenchmarkCase, ...] = BENCHMARK_CASES,
+                   iterations: int = DEFAULT_ITERATIONS,
+                   warmup: int = DEFAULT_WARMUP) -> Dict[str, Dict[str, float]]:
+    """
+    Замеряет методы page objects на снимках. Вывод методов (print) подавляется.
+
+    Returns:
+        Dict[str, Dict[str, float]]: {метод: {'median_ms', 'min_ms', 'max_ms', 'iterations'}}
+    """
+    manifest = load_manifest(server.directory)
+    views = manifest['views']
+    page_classes = {view[0]: view[2] for view in SNAPSHOT_VIEWS}
+    # BasePage читает адрес приложения из BASE_URL
+    os.environ['BASE_URL'] = server.url
+
+    results = {}
+    for case in cases:
+        if case.view not in views:
+            print(f"[BENCHMARK] {case.name} пропущен: нет снимка {case.view}")
+            continue
+        page = page_classes[case.view](driver)
+        view_url = server.url + views[case.view]['path']
+        samples = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            page.open_url(view_url)
+            for iteration in range(warmup + iterations):
+                if case.reload and iteration:
+                    page.open_url(view_url)
+                started = time.perf_counter()
+                case.action(page, manifest['data'])
+                elapsed = (time.perf_counter() - started) * 1000
+                if iteration >= warmup:
+                    samples.append(elapsed)
+        results[case.name] = {'median_ms': round(statistics.median(samples), 2),
+                              'min_ms': round(min(samples), 2),
+                              'max_ms': round(max(samples), 2),
+                              'iterations': iterations}
+    return results
+
+
+# === ИСТОРИЯ ПО КОММИТАМ ===
+
+def git_revision() -> Dict[str, Any]:
+    """Текущий коммит и наличие незакоммиченных изменений"""
+    def git(*args: str) -> str:
+        return subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None,
+            'subject': git('log', '-1', '--format=%s') or None,
+            'dirty': bool(git('status', '--porcelain', '--', 'pages', 'utils'))}
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def record_run(path: str, results: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    """Добавляет запуск в историю и возвращает запись"""
+    entry = {**git_revision(), 'created': datetime.now().isoformat(timespec='seconds'), 'results': results}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return entry
+
+
+def compare_runs(previous: Dict[str, Any],
+                 current: Dict[str, Any],
+                 threshold: float = REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Сравнивает медианы двух запусков
+
+    Returns:
+        List[Dict[str, Any]]: [{'method', 'before_ms', 'after_ms', 'change', 'regression'}]
+    """
+    rows = []
+    for method, result in current['results'].items():
+        before = previous['results'].get(method)
+        if not before or not before['median_ms']:
+            continue
+        change = result['median_ms'] / before['median_ms'] - 1
+        rows.append({'method': method, 'before_ms': before['median_ms'], 'after_ms': result['median_ms'],
+                     'change': round(change, 3), 'regression': change > threshold})
+    return rows
+
+
+def previous_commit_run(history: List[Dict[str, Any]], current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Последний запуск на другом коммите (или на том же коммите до незакоммиченных изменений)"""
+    for entry in reversed(history):
+        if entry.get('commit') != current.get('commit') or (current.get('dirty') and not entry.get('dirty')):
+            return entry
+    return None
+
+
+# === ЗАПУСК ===
+
+def main():
+    parser = argparse.ArgumentParser(description='Офлайн-замеры page objects на снимках экранов Tandoor')
+    parser.add_argument('command', choices=['capture', 'run'],
+                        help='capture - снять экраны с живого Tandoor, run - замерить методы на снимках')
+    parser.add_argument('--snapshots', default=DEFAULT_SNAPSHOTS_DIR, help='каталог снимков')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_PATH, help='файл истории замеров')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP)
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='допустимое замедление медианы (0.2 - на 20%%)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.command == 'capture':
+        driver = create_chrome_driver()
+        try:
+            capture_snapshots(driver, args.snapshots)
+        finally:
+            close_chrome_driver(driver)
+        return
+
+    if not os.path.exists(os.path.join(args.snapshots, MANIFEST_FILE)):
+        raise SystemExit(f"Снимки не найдены в {args.snapshots}: сначала выполните "
+                         f"'python -m utils.page_benchmark capture' с доступным Tandoor")
+
+    driver = create_chrome_driver(headless=True)
+    try:
+        with SnapshotServer(args.snapshots) as server:
+            results = run_benchmarks(driver, server, iterations=args.iterations, warmup=args.warmup)
+    finally:
+        close_chrome_driver(driver)
+
+    history = load_history(args.history)
+    current = record_run(args.history, results)
+    print(f"{'метод':<36} {'медиана, мс':>12} {'мин, мс':>9} {'макс, мс':>9}")
+    for method, result in results.items():
+        print(f"{method:<36} {result['median_ms']:>12.2f} {result['min_ms']:>9.2f} {result['max_ms']:>9.2f}")
+
+    previous = previous_commit_run(history, current)
+    if previous is None:
+        print(f"\nПервый замер в истории {args.history}")
+        return
+    rows = compare_runs(previous, current, args.threshold)
+    print(f"\nСравнение с {previous.get('commit')} ({previous.get('subject')}):")
+    for row in rows:
+        marker = '  РЕГРЕССИЯ' if row['regression'] else ''
+        print(f"{row['method']:<36} {row['before_ms']:>9.2f} -> {row['after_ms']:>9.2f} мс "
+              f"({row['change']:+.0%}){marker}")
+    if any(row['regression'] for row in rows):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
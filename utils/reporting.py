@@ -0,0 +1,83 @@
+import os
+import threading
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+import allure
+
+# Уровень отчетности Allure (REPORTING_LEVEL): full - шаги и все вложения,
+# failures - шаги, вложения только упавших тестов, off - без шагов и вложений
+REPORTING_LEVEL_VAR = 'REPORTING_LEVEL'
+FULL = 'full'
+FAILURES = 'failures'
+OFF = 'off'
+
+_buffer: List[Tuple[Any, Optional[str], Any, Optional[str]]] = []
+_lock = threading.Lock()
+
+
+def reporting_level() -> str:
+    """Текущий уровень отчетности (неизвестное значение считается full)"""
+    level = os.getenv(REPORTING_LEVEL_VAR, FULL).lower()
+    return level if level in (FULL, FAILURES, OFF) else FULL
+
+
+class _NoStep:
+    """Заглушка allure.step для уровня off: и декоратор, и контекстный менеджер"""
+
+    def __call__(self, function: Callable) -> Callable:
+        return function
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+def step(title: str):
+    """
+    allure.step с учетом уровня отчетности. Для декораторов уровень
+    определяется при импорте модуля, поэтому задается до запуска pytest.
+    """
+    if reporting_level() == OFF:
+        return _NoStep()
+    return allure.step(title)
+
+
+def _resolve(body: Union[Any, Callable[[], Any]]) -> Any:
+    return body() if callable(body) else body
+
+
+def attach(body: Union[Any, Callable[[], Any]],
+           name: Optional[str] = None,
+           attachment_type: Any = None,
+           extension: Optional[str] = None) -> None:
+    """
+    allure.attach с учетом уровня отчетности.
+    body может быть функцией без аргументов: тогда тяжелая сериализация (json.dumps)
+    выполняется, только если вложение действительно попадет в отчет.
+    """
+    level = reporting_level()
+    if level == OFF:
+        return
+    if level == FAILURES:
+        with _lock:
+            _buffer.append((body, name, attachment_type, extension))
+        return
+    allure.attach(_resolve(body), name=name, attachment_type=attachment_type, extension=extension)
+
+
+def flush_attachments() -> int:
+    """Переносит отложенные вложения в отчет (тест упал). Возвращает их количество"""
+    with _lock:
+        pending = list(_buffer)
+        _buffer.clear()
+    for body, name, attachment_type, extension in pending:
+        allure.attach(_resolve(body), name=name, attachment_type=attachment_type, extension=extension)
+    return len(pending)
+
+
+def discard_attachments() -> None:
+    """Отбрасывает отложенные вложения (тест прошел)"""
+    with _lock:
+        _buffer.clear()
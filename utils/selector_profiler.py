@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import re
+from datetime import date
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from dotenv import load_dotenv
+from selenium.common import WebDriverException
+from selenium.webdriver.common.by import By
+
+from pages import BasePage, LoginPage
+from pages.base_page import xpath_literal
+from pages.header_component import HeaderComponent
+from pages.meal_plan_page import MealPlanPage
+from pages.scripts import PROFILE_LOCATORS_JS
+from pages.shopping_list_page import ShoppingListPage
+from utils.auth_session import AuthSessionProvider
+from utils.browser import create_chrome_driver, close_chrome_driver
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Замеров на локатор и поисков в одном замере (время одного поиска = замер / batch)
+DEFAULT_ROUNDS = 20
+DEFAULT_BATCH = 10
+# Поиск дольше этого (медиана, мс) считается медленным
+SLOW_LOCATOR_MS = 0.5
+
+# Страницы для профилирования: (имя, класс page object, открытие страницы, нужен ли логин).
+# Локаторы форм и диалогов ищутся в том состоянии, которое создает функция открытия.
+PROFILE_TARGETS: Tuple[Tuple[str, type, Callable[[Any], Any], bool], ...] = (
+    ('login', LoginPage, lambda page: page.open_login_page(), False),
+    ('header', HeaderComponent, lambda page: page.open_base_page(), True),
+    ('mealplan', MealPlanPage, lambda page: page.open_meal_plan_page(), True),
+    ('mealplan-form', MealPlanPage,
+     lambda page: (page.open_meal_plan_page(), page.click_date(date.today())), True),
+    ('shopping', ShoppingListPage, lambda page: page.open_shopping_list_page(), True),
+)
+
+_LOCATOR_STRATEGIES = {By.ID, By.XPATH, By.LINK_TEXT, By.PARTIAL_LINK_TEXT, By.NAME,
+                       By.TAG_NAME, By.CLASS_NAME, By.CSS_SELECTOR}
+_XPATH_STEP_RE = re.compile(r"(\.?//|/)([A-Za-z][\w-]*|\*)((?:\[[^\[\]]+\])*)")
+_XPATH_PREDICATE_RE = re.compile(r"\[([^\[\]]+)\]")
+_XPATH_AND_RE = re.compile(r"\s+and\s+")
+_XPATH_EQUALS_RE = re.compile(r"^@([\w-]+)\s*=\s*(['\"])(.*?)\2$")
+_XPATH_FUNCTION_RE = re.compile(r"^(contains|starts-with)\(\s*@([\w-]+)\s*,\s*(['\"])(.*?)\3\s*\)$")
+_XPATH_HAS_ATTRIBUTE_RE = re.compile(r"^@([\w-]+)$")
+_CSS_IDENTIFIER_RE = re.compile(r"^-?[A-Za-z_][\w-]*$")
+
+
+def declared_locators(page_class: type) -> Dict[str, Tuple[str, str]]:
+    """Локаторы (By, значение), объявленные в классе page object и его родителях"""
+    locators = {}
+    for klass in reversed(page_class.__mro__):
+        for name, value in vars(klass).items():
+            if (name.isupper() and isinstance(value, tuple) and len(value) == 2
+                    and value[0] in _LOCATOR_STRATEGIES and isinstance(value[1], str)):
+                locators[name] = value
+    return locators
+
+
+def to_query(by: str, value: str) -> Tuple[str, str]:
+    """
+    Переводит локатор Selenium в запрос браузера ('css' или 'xpath') так же,
+    как это делает WebDriver при find_element
+    """
+    if by == By.XPATH:
+        return 'xpath', value
+    if by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+        literal = xpath_literal(value)
+        if by == By.LINK_TEXT:
+            return 'xpath', f"//a[normalize-space()={literal}]"
+        return 'xpath', f"//a[contains(., {literal})]"
+    if by == By.ID:
+        return 'css', f'[id="{_css_string(value)}"]'
+    if by == By.NAME:
+        return 'css', f'[name="{_css_string(value)}"]'
+    if by == By.CLASS_NAME:
+        return 'css', f".{value}"
+    return 'css', value
+
+
+def _css_string(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _condition_to_css(condition: str) -> Optional[str]:
+    """Одно условие предиката XPath -> селектор CSS (None - эквивалента нет)"""
+    condition = condition.strip()
+    match = _XPATH_EQUALS_RE.match(condition)
+    if match:
+        attribute, value = match.group(1), match.group(3)
+        if attribute == 'id' and _CSS_IDENTIFIER_RE.match(value):
+            return f"#{value}"
+        return f'[{attribute}="{_css_string(value)}"]'
+    match = _XPATH_FUNCTION_RE.match(condition)
+    if match:
+        function, attribute, value = match.group(1), match.group(2), match.group(4)
+        if function == 'starts-with':
+            return f'[{attribute}^="{_css_string(value)}"]'
+        if attribute == 'class' and _CSS_IDENTIFIER_RE.match(value):
+            # Подстрока класса, а не класс целиком: совпадение проверяется в браузере
+            return f".{value}"
+        return f'[{attribute}*="{_css_string(value)}"]'
+    match = _XPATH_HAS_ATTRIBUTE_RE.match(condition)
+    if match:
+        return f"[{match.group(1)}]"
+    return None
+
+
+def xpath_to_css(xpath: str) -> Optional[str]:
+    """
+    CSS-эквивалент простого XPath: шаги '//' и '/', предикаты из сравнений атрибутов,
+    contains()/starts-with() по атрибуту и 'and'. Для text(), позиций, осей и вложенных
+    путей возвращает None.
+
+    Например, //div[contains(@class, 'cv-item') and contains(@class, 'card')] -> div.cv-item.card
+    """
+    parts = []
+    position = 0
+    while position < len(xpath):
+        step_match = _XPATH_STEP_RE.match(xpath, position)
+        if not step_match:
+            return None
+        axis, tag, predicates = step_match.groups()
+        if axis == '/' and not parts:
+            # Абсолютный путь от корня документа
+            return None
+        selector = '' if tag == '*' else tag
+        for predicate in _XPATH_PREDICATE_RE.findall(predicates):
+            for condition in _XPATH_AND_RE.split(predicate):
+                css = _condition_to_css(condition)
+                if css is None:
+                    return None
+                selector += css
+        if parts:
+            parts.append('>' if axis == '/' else '')
+        parts.append(selector or '*')
+        position = step_match.end()
+    return ' '.join(part for part in parts if part) if parts else None
+
+
+class SelectorProfiler:
+    """
+    Замеряет в браузере стоимость поиска каждого локатора page objects: число совпадений,
+    уникальность и время одного поиска. Отмечает медленные и неоднозначные локаторы
+    и предлагает CSS вместо XPath, если CSS находит те же элементы.
+    """
+
+    def __init__(self,
+                 driver,
+                 rounds: int = DEFAULT_ROUNDS,
+                 batch: int = DEFAULT_BATCH,
+                 slow_ms: float = SLOW_LOCATOR_MS) -> None:
+        self.driver = driver
+        self.rounds = rounds
+        self.batch = batch
+        self.slow_ms = slow_ms
+        self.results: List[Dict[str, Any]] = []
+
+    def profile(self, page_name: str, locators: Dict[str, Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Профилирует локаторы на открытой странице одним вызовом execute_script
+
+        Args:
+            page_name: имя страницы в отчете
+            locators: {имя: (By, значение)}, например результат declared_locators()
+
+        Returns:
+            List[Dict[str, Any]]: результаты по локаторам с флагами
+        """
+        queries = []
+        for by, value in locators.values():
+            using, query = to_query(by, value)
+            queries.append({'using': using, 'value': query,
+                            'suggestion': xpath_to_css(query) if using == 'xpath' else None})
+        measurements = self.driver.execute_script(PROFILE_LOCATORS_JS, queries, self.rounds, self.batch)
+
+        results = []
+        for (name, (by, value)), measurement in zip(locators.items(), measurements):
+            result = {'page': page_name, 'locator': name, 'by': by, 'value': value, **measurement}
+            result['flags'] = self._flags(result)
+            results.append(result)
+        self.results.extend(results)
+        return results
+
+    def _flags(self, result: Dict[str, Any]) -> List[str]:
+        if result.get('error'):
+            return ['invalid']
+        flags = []
+        if result['median_ms'] > self.slow_ms:
+            flags.append('slow')
+        if result['matches'] == 0:
+            flags.append('not-found')
+        elif result['matches'] > 1:
+            flags.append('ambiguous')
+        suggestion = result.get('suggestion')
+        if suggestion and suggestion['equivalent'] and result['matches'] > 0:
+            flags.append('css-equivalent')
+        return flags
+
+    def flagged(self) -> List[Dict[str, Any]]:
+        """Результаты с проблемами: некорректные, медленные, неоднозначные или заменимые на CSS"""
+        return [result for result in self.results
+                if {'invalid', 'slow', 'ambiguous', 'css-equivalent'} & set(result['flags'])]
+
+    def format_report(self) -> str:
+        """Текстовая таблица: самые медленные локаторы сверху"""
+        lines = [f"{'страница':<14} {'локатор':<28} {'by':<16} {'совп.':>5} {'видим.':>6} "
+                 f"{'медиана, мс':>12}  флаги"]
+        ordered = sorted(self.results, key=lambda result: result.get('median_ms') or 0, reverse=True)
+        for result in ordered:
+            if result.get('error'):
+                lines.append(f"{result['page']:<14} {result['locator']:<28} {result['by']:<16} "
+                             f"{'-':>5} {'-':>6} {'-':>12}  invalid: {result['error']}")
+                continue
+            lines.append(f"{result['page']:<14} {result['locator']:<28} {result['by']:<16} "
+                         f"{result['matches']:>5} {result['visible']:>6} {result['median_ms']:>12.4f}  "
+                         f"{', '.join(result['flags'])}")
+            suggestion = result.get('suggestion')
+            if suggestion and not suggestion['error']:
+                status = 'те же элементы' if suggestion['equivalent'] and result['matches'] else (
+                    'не проверено (нет совпадений)' if suggestion['equivalent'] else 'другие элементы')
+                lines.append(f"{'':<14}   CSS: {suggestion['css']} "
+                             f"({suggestion['median_ms']:.4f} мс, {status})")
+        return '\n'.join(lines)
+
+    def export(self, path: str) -> None:
+        """Сохраняет результаты в JSON"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'rounds': self.rounds, 'batch': self.batch, 'slow_ms': self.slow_ms,
+                       'locators': self.results}, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Профилирование локаторов page objects в браузере')
+    parser.add_argument('--pages', nargs='*', choices=[target[0] for target in PROFILE_TARGETS],
+                        help='страницы для профилирования (по умолчанию все)')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help='замеров на локатор')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='поисков в одном замере')
+    parser.add_argument('--slow-ms', type=float, default=SLOW_LOCATOR_MS, help='порог медленного поиска, мс')
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'reports', 'selector_profile.json'))
+    args = parser.parse_args()
+
+    load_dotenv()
+    driver = create_chrome_driver()
+    profiler = SelectorProfiler(driver, args.rounds, args.batch, args.slow_ms)
+    logged_in = False
+    try:
+        for name, page_class, open_page, needs_login in PROFILE_TARGETS:
+            if args.pages and name not in args.pages:
+                continue
+            try:
+                if needs_login and not logged_in:
+                    login_page = LoginPage(driver)
+                    if not login_page.login_with_session(AuthSessionProvider()):
+                        login_page.login_user()
+                    logged_in = True
+                page: BasePage = page_class(driver)
+                open_page(page)
+                page.wait_for_app_ready()
+                profiler.profile(name, declared_locators(page_class))
+            except (WebDriverException, ValueError) as e:
+                print(f"[SELECTORS] Страница {name} пропущена: {e}")
+    finally:
+        close_chrome_driver(driver)
+
+    print(profiler.format_report())
+    profiler.export(args.output)
+    print(f"\nПроблемных локаторов: {len(profiler.flagged())}. Результаты: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
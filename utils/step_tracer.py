@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Dict, List, Optional, Any, Iterator
+
+import allure_commons
+from selenium.webdriver.support.wait import WebDriverWait
+
+# Включает трассировку шагов (STEP_TRACE=1)
+STEP_TRACE_FLAG = 'STEP_TRACE'
+
+
+class Span:
+    """Интервал трассировки: тест, шаг allure или ожидание"""
+
+    __slots__ = ('name', 'kind', 'start', 'end', 'tid', 'test', 'children')
+
+    def __init__(self, name: str, kind: str, start: float, tid: int, test: Optional[str]) -> None:
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end: Optional[float] = None
+        self.tid = tid
+        self.test = test
+        self.children: List['Span'] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def wait_time(self) -> float:
+        """Время ожиданий внутри интервала (включая вложенные шаги)"""
+        if self.kind == 'wait':
+            return self.duration
+        return sum(child.wait_time for child in self.children)
+
+    @property
+    def active_time(self) -> float:
+        return self.duration - self.wait_time
+
+    def walk(self) -> Iterator['Span']:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class StepTracer:
+    """
+    Дерево интервалов для каждого теста: шаги allure (page objects, API-клиент)
+    и ожидания внутри них. Подключается к allure как плагин (start_step/stop_step).
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.roots: List[Span] = []
+        self.current_test: Optional[str] = None
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._steps: Dict[str, Span] = {}
+        self._lock = threading.Lock()
+
+    # === ЗАПИСЬ ИНТЕРВАЛОВ ===
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _open(self, name: str, kind: str) -> Span:
+        stack = self._stack()
+        span = Span(name, kind, time.perf_counter(), threading.get_ident(), self.current_test)
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            with self._lock:
+                self.roots.append(span)
+        stack.append(span)
+        return span
+
+    def _close(self, span: Span) -> None:
+        span.end = time.perf_counter()
+        stack = self._stack()
+        if span in stack:
+            del stack[stack.index(span):]
+
+    @allure_commons.hookimpl
+    def start_step(self, uuid, title, params) -> None:
+        self._steps[uuid] = self._open(title, 'step')
+
+    @allure_commons.hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb) -> None:
+        span = self._steps.pop(uuid, None)
+        if span:
+            self._close(span)
+
+    @contextmanager
+    def test(self, nodeid: str) -> Iterator[None]:
+        """Корневой интервал теста (setup, call и teardown)"""
+        self.current_test = nodeid
+        span = self._open(nodeid, 'test')
+        try:
+            yield
+        finally:
+            self._close(span)
+            self.current_test = None
+
+    @contextmanager
+    def waiting(self, label: str) -> Iterator[None]:
+        """Интервал ожидания; вложенные ожидания не дублируются"""
+        stack = self._stack()
+        if stack and stack[-1].kind == 'wait':
+            yield
+            return
+        span = self._open(label, 'wait')
+        try:
+            yield
+        finally:
+            self._close(span)
+
+    # === ПОДКЛЮЧЕНИЕ ===
+
+    def install(self) -> None:
+        """Регистрирует плагин allure и учитывает WebDriverWait как ожидание"""
+        if self.enabled:
+            return
+        allure_commons.plugin_manager.register(self)
+        for method_name in ('until', 'until_not'):
+            original = getattr(WebDriverWait, method_name)
+            setattr(WebDriverWait, method_name, traced_wait(f'WebDriverWait.{method_name}')(original))
+        self.enabled = True
+
+    # === ОТЧЕТЫ ===
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """События в формате Chrome Trace (chrome://tracing, Perfetto, speedscope)"""
+        pid = os.getpid()
+        events = []
+        for root in self.roots:
+            for span in root.walk():
+                events.append({
+                    'name': span.name,
+                    'cat': span.kind,
+                    'ph': 'X',
+                    'ts': (span.start - self._origin) * 1e6,
+                    'dur': span.duration * 1e6,
+                    'pid': pid,
+                    'tid': span.tid,
+                    'args': {'test': span.test,
+                             'wait_ms': round(span.wait_time * 1000, 1),
+                             'active_ms': round(span.active_time * 1000, 1)},
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def summary(self, top: int = 20) -> List[Dict[str, Any]]:
+        """Самые медленные шаги по суммарному времени: вызовы, ожидание и активное время"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for root in self.roots:
+            for span in root.walk():
+                if span.kind != 'step':
+                    continue
+                total = totals.setdefault(span.name, {'step': span.name, 'calls': 0, 'total_ms': 0.0,
+                                                      'wait_ms': 0.0, 'active_ms': 0.0, 'max_ms': 0.0})
+                total['calls'] += 1
+                total['total_ms'] += span.duration * 1000
+                total['wait_ms'] += span.wait_time * 1000
+                total['active_ms'] += span.active_time * 1000
+                total['max_ms'] = max(total['max_ms'], span.duration * 1000)
+        slowest = sorted(totals.values(), key=lambda total: total['total_ms'], reverse=True)[:top]
+        for total in slowest:
+            for key in ('total_ms', 'wait_ms', 'active_ms', 'max_ms'):
+                total[key] = round(total[key], 1)
+        return slowest
+
+    def export(self, directory: str, suffix: str) -> Dict[str, str]:
+        """Сохраняет трассу и сводку в directory, возвращает пути к файлам"""
+        os.makedirs(directory, exist_ok=True)
+        paths = {'trace': os.path.join(directory, f'step_trace_{suffix}.json'),
+                 'summary': os.path.join(directory, f'step_summary_{suffix}.json')}
+        with open(paths['trace'], 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        with open(paths['summary'], 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return paths
+
+
+# Трассировщик процесса pytest (у каждого воркера xdist свой)
+tracer = StepTracer()
+
+
+def waiting(label: str):
+    """Контекст ожидания для трассировки; без STEP_TRACE ничего не делает"""
+    return tracer.waiting(label) if tracer.enabled else nullcontext()
+
+
+def traced_wait(label: str):
+    """Декоратор: время вызова учитывается как ожидание, а не активная работа"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with waiting(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator